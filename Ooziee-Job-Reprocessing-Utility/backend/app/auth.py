@@ -1,21 +1,23 @@
 from datetime import datetime, timedelta
 import jwt
-from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from .settings import settings
-from .db import get_db
+from .db import get_async_db
 from . import models
+from .passwords import hash_with, verify_and_update_with
+from .principals import principal_cache
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
+# Sync helpers for startup and scripts; request handlers use ``passwords.hasher``.
 def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+    return hash_with(password, settings.bcrypt_rounds)
 
 def verify_password(password: str, password_hash: str) -> bool:
-    return pwd_context.verify(password, password_hash)
+    return verify_and_update_with(password, password_hash, settings.bcrypt_rounds)[0]
 
 def create_access_token(username: str, role: str) -> str:
     issued_at = datetime.utcnow()
@@ -31,14 +33,20 @@ def decode_token(token: str) -> dict:
     except jwt.PyJWTError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
 
-def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)) -> models.User:
+async def get_current_user(db: AsyncSession = Depends(get_async_db), token: str = Depends(oauth2_scheme)) -> models.User:
     payload = decode_token(token)
     username = payload.get("sub")
     if not username:
         raise HTTPException(status_code=401, detail="Invalid token")
-    user = db.query(models.User).filter(models.User.username == username).first()
+    key = (username, payload.get("iat"))
+    cached = principal_cache.get(key)
+    if cached is not None:
+        return cached
+    generation = principal_cache.generation
+    user = (await db.scalars(select(models.User).filter(models.User.username == username))).first()
     if not user or not user.is_active:
         raise HTTPException(status_code=401, detail="Inactive user")
+    principal_cache.put(key, user, generation)
     return user
 
 def require_role(*roles: str):
@@ -1,47 +1,348 @@
 import asyncio
 import json
 import logging
-from typing import Set
+import time
+from collections import deque
+import re
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Set, Tuple
 
 from fastapi import WebSocket
 from redis import asyncio as aioredis
 
+from .events import SUMMARY_TOPIC, channel_topic, parse_stream_id, stream_message, topic_channels, topic_stream
+from .metrics import WS_CONNECTIONS, WS_DROPPED, WS_FANOUT, WS_SEND
 from .settings import settings
 
 logger = logging.getLogger(__name__)
 
 
+TOPIC_RE = re.compile(r"^(plans|plan:\d+)$")
+STREAM_ID_RE = re.compile(r"^\d+(-\d+)?$")
+MAX_TOPICS_PER_CONNECTION = 64
+
+
+def coalesce_key(message: dict) -> Optional[str]:
+    """Key under which a newer event may replace a queued one.
+
+    Task state events supersede each other; log chunks must not be merged.
+    """
+    event = message.get("event")
+    if event == "task_log":
+        return None
+    if event == "worker_heartbeat":
+        return f"heartbeat:{message.get('worker_id')}"
+    if message.get("task_id") is not None:
+        return f"task:{message.get('plan_id')}:{message.get('task_id')}"
+    return None
+
+
+class LazyKey:
+    """Coalesce key of a serialized event, parsed only if a queue overflows."""
+
+    def __init__(self, data: str):
+        self.data = data
+        self.parsed = False
+        self.key: Optional[str] = None
+
+    def __call__(self) -> Optional[str]:
+        if not self.parsed:
+            self.parsed = True
+            try:
+                self.key = coalesce_key(json.loads(self.data))
+            except (TypeError, ValueError, AttributeError):
+                self.key = None
+        return self.key
+
+
+class Connection:
+    """One WebSocket with its own bounded send queue and writer task."""
+
+    def __init__(self, websocket: WebSocket, maxsize: int, policy: str, send_timeout: float, on_close):
+        self.websocket = websocket
+        self.maxsize = max(1, maxsize)
+        self.policy = policy
+        self.send_timeout = send_timeout
+        self.on_close = on_close
+        self.topics: Set[str] = set()
+        # Live messages held back while a topic's backlog is being replayed.
+        self.replaying: Dict[str, List[str]] = {}
+        self.queue: Deque[Tuple[Optional[Callable[[], Optional[str]]], str, float]] = deque()
+        self.ready = asyncio.Event()
+        self.closed = False
+        self.close_code: Optional[int] = None
+        self.sending = False
+        self.writer: Optional[asyncio.Task] = None
+        self.connected_at = time.time()
+        self.sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.max_depth = 0
+        self.send_ms_avg = 0.0
+        self.send_ms_max = 0.0
+        self.queue_ms_avg = 0.0
+
+    def start(self) -> None:
+        self.writer = asyncio.create_task(self._write_loop())
+
+    def offer(self, data: str, key_fn: Optional[Callable[[], Optional[str]]] = None) -> None:
+        """Queue a message without waiting; applies the overflow policy when full."""
+        if self.closed:
+            return
+        if len(self.queue) >= self.maxsize:
+            if self.policy == "disconnect":
+                self.dropped += 1
+                WS_DROPPED.labels("disconnect").inc()
+                self.abort(1013)
+                return
+            key = key_fn() if key_fn is not None else None
+            if self.policy == "coalesce" and key is not None:
+                for i, (queued_fn, _, queued_at) in enumerate(self.queue):
+                    if queued_fn is not None and queued_fn() == key:
+                        # Keep the original position and age; newest state wins.
+                        self.queue[i] = (key_fn, data, queued_at)
+                        self.coalesced += 1
+                        WS_DROPPED.labels("coalesced").inc()
+                        return
+            self.queue.popleft()
+            self.dropped += 1
+            WS_DROPPED.labels("drop_oldest").inc()
+        self.queue.append((key_fn, data, time.monotonic()))
+        self.max_depth = max(self.max_depth, len(self.queue))
+        self.ready.set()
+
+    def abort(self, code: Optional[int] = None) -> None:
+        """Stop the writer; it closes the socket with ``code`` if one is given."""
+        if self.closed:
+            return
+        self.closed = True
+        self.close_code = code
+        self.ready.set()
+        if self.sending and self.writer is not None:
+            # Interrupt a send that may be stuck on a slow client.
+            self.writer.cancel()
+
+    async def _write_loop(self) -> None:
+        try:
+            while not self.closed:
+                if not self.queue:
+                    self.ready.clear()
+                    await self.ready.wait()
+                    continue
+                _, data, queued_at = self.queue.popleft()
+                started = time.monotonic()
+                self.sending = True
+                await asyncio.wait_for(self.websocket.send_text(data), timeout=self.send_timeout)
+                self.sending = False
+                elapsed = time.monotonic() - started
+                WS_SEND.observe(elapsed)
+                send_ms = elapsed * 1000
+                self.send_ms_avg += (send_ms - self.send_ms_avg) * 0.1
+                self.send_ms_max = max(self.send_ms_max, send_ms)
+                self.queue_ms_avg += ((started - queued_at) * 1000 - self.queue_ms_avg) * 0.1
+                self.sent += 1
+        except asyncio.CancelledError:
+            pass
+        except Exception:
+            # Stalled past send_timeout or the socket went away.
+            self.close_code = 1011
+        self.closed = True
+        self.queue.clear()
+        await self.on_close(self)
+        if self.close_code is not None:
+            try:
+                await self.websocket.close(code=self.close_code)
+            except Exception:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "client": f"{self.websocket.client.host}:{self.websocket.client.port}" if self.websocket.client else "",
+            "connected_seconds": round(time.time() - self.connected_at, 1),
+            "topics": sorted(self.topics),
+            "queue_depth": len(self.queue),
+            "max_depth": self.max_depth,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+            "send_ms_avg": round(self.send_ms_avg, 3),
+            "send_ms_max": round(self.send_ms_max, 3),
+            "queue_ms_avg": round(self.queue_ms_avg, 3),
+        }
+
+
 class ConnectionManager:
     def __init__(self):
-        self.active: Set[WebSocket] = set()
+        self.active: Dict[WebSocket, Connection] = {}
+        self.topics: Dict[str, Set[Connection]] = {}
         self.lock = asyncio.Lock()
 
-    async def connect(self, websocket: WebSocket):
+    async def connect(self, websocket: WebSocket, last_id: Optional[str] = None) -> Connection:
         await websocket.accept()
+        conn = Connection(
+            websocket,
+            maxsize=settings.ws_queue_size,
+            policy=settings.ws_overflow_policy,
+            send_timeout=settings.ws_send_timeout,
+            on_close=self._remove,
+        )
         async with self.lock:
-            self.active.add(websocket)
+            self.active[websocket] = conn
+            WS_CONNECTIONS.inc()
+        conn.start()
+        # Until a client says otherwise it gets the plan summary feed.
+        await self.subscribe(conn, [SUMMARY_TOPIC], since={SUMMARY_TOPIC: last_id} if last_id else None)
+        return conn
 
-    async def disconnect(self, websocket: WebSocket):
+    async def subscribe(
+        self, conn: Connection, topics: Iterable[str], since: Optional[Dict[str, str]] = None
+    ) -> List[str]:
+        """Follow topics; with ``since`` (topic -> last seen event id) the
+        missed events are replayed from the topic's stream before live ones."""
+        since = since or {}
+        added = []
         async with self.lock:
-            self.active.discard(websocket)
+            for topic in topics:
+                if topic in conn.topics or len(conn.topics) >= MAX_TOPICS_PER_CONNECTION:
+                    continue
+                if topic in since:
+                    conn.replaying[topic] = []
+                conn.topics.add(topic)
+                subscribers = self.topics.setdefault(topic, set())
+                subscribers.add(conn)
+                if len(subscribers) == 1:
+                    await broadcaster.watch(topic)
+                added.append(topic)
+        for topic in added:
+            if topic in since:
+                await self._replay(conn, topic, since[topic])
+        return added
 
-    async def broadcast(self, message: dict):
-        data = json.dumps(message, default=str)
-        async with self.lock:
-            conns = list(self.active)
-        for ws in conns:
+    async def _replay(self, conn: Connection, topic: str, last_id: str) -> None:
+        limit = max(1, settings.event_replay_max)
+        try:
+            entries, truncated = await broadcaster.read_since(topic, last_id, limit + 1)
+        except Exception as exc:
+            logger.warning("event replay failed: %s", exc.__class__.__name__)
+            entries, truncated = [], True
+        if len(entries) > limit:
+            entries, truncated = entries[:limit], True
+        if truncated:
+            # Some events are gone; the client has to take a fresh snapshot.
+            conn.offer(json.dumps({"event": "replay_truncated", "topic": topic}))
+        last = parse_stream_id(last_id)
+        for entry_id, data in entries:
+            conn.offer(stream_message(entry_id, data))
+            last = parse_stream_id(entry_id)
+        for data in conn.replaying.pop(topic, []):
             try:
-                await ws.send_text(data)
-            except Exception:
-                await self.disconnect(ws)
+                entry_id = json.loads(data).get("id")
+            except (TypeError, ValueError, AttributeError):
+                entry_id = None
+            # Live events already covered by the replay are skipped.
+            if entry_id is None or parse_stream_id(entry_id) > last:
+                conn.offer(data)
+
+    async def unsubscribe(self, conn: Connection, topics: Iterable[str]) -> List[str]:
+        removed = []
+        async with self.lock:
+            for topic in topics:
+                if topic not in conn.topics:
+                    continue
+                conn.topics.discard(topic)
+                conn.replaying.pop(topic, None)
+                subscribers = self.topics.get(topic)
+                if subscribers is not None:
+                    subscribers.discard(conn)
+                    if not subscribers:
+                        del self.topics[topic]
+                        await broadcaster.unwatch(topic)
+                removed.append(topic)
+        return removed
+
+    async def _remove(self, conn: Connection) -> None:
+        async with self.lock:
+            if self.active.get(conn.websocket) is conn:
+                del self.active[conn.websocket]
+                WS_CONNECTIONS.dec()
+        await self.unsubscribe(conn, list(conn.topics))
+
+    async def disconnect(self, websocket: WebSocket):
+        conn = self.active.get(websocket)
+        if conn is not None:
+            conn.abort()
+            await self._remove(conn)
+
+    def publish(self, topic: str, data: str) -> None:
+        """Hand a serialized event to the queues of the topic's subscribers."""
+        subscribers = self.topics.get(topic)
+        if not subscribers:
+            return
+        start = time.perf_counter()
+        key_fn = LazyKey(data)
+        for conn in list(subscribers):
+            held = conn.replaying.get(topic)
+            if held is not None:
+                held.append(data)
+            else:
+                conn.offer(data, key_fn)
+        WS_FANOUT.observe(time.perf_counter() - start)
+
+    def stats(self) -> Dict[str, Any]:
+        conns = list(self.active.values())
+        return {
+            "connections": len(conns),
+            "queue_size": settings.ws_queue_size,
+            "overflow_policy": settings.ws_overflow_policy,
+            "topics": {topic: len(subs) for topic, subs in self.topics.items()},
+            "clients": [c.stats() for c in conns],
+        }
 
 manager = ConnectionManager()
 
 class RedisBroadcaster:
+    """Relays Redis events to WebSocket topics.
+
+    The global channel is always subscribed; per-plan channels are subscribed
+    only while a local connection follows that plan.
+    """
+
     def __init__(self):
         self.redis = None
         self.task = None
         self.pubsub = None
+        self.channels: Set[str] = set()
+
+    async def watch(self, topic: str) -> None:
+        new = [c for c in topic_channels(topic) if c not in self.channels]
+        self.channels.update(new)
+        if new and self.pubsub is not None:
+            try:
+                await self.pubsub.subscribe(*new)
+            except Exception as exc:
+                logger.warning("redis subscribe failed: %s", exc.__class__.__name__)
+
+    async def read_since(self, topic: str, last_id: str, count: int) -> Tuple[List[Tuple[str, str]], bool]:
+        """Stream entries after ``last_id``; flags truncation when ``last_id``
+        itself has already been trimmed away."""
+        if self.redis is None:
+            raise RuntimeError("redis is not connected")
+        stream = topic_stream(topic)
+        truncated = False
+        if parse_stream_id(last_id) != (0, 0):
+            truncated = not await self.redis.xrange(stream, min=last_id, max=last_id, count=1)
+        entries = await self.redis.xrange(stream, min=f"({last_id}", max="+", count=count)
+        return [(entry_id, fields.get("data", "")) for entry_id, fields in entries], truncated
+
+    async def unwatch(self, topic: str) -> None:
+        if topic == SUMMARY_TOPIC:
+            return
+        old = [c for c in topic_channels(topic) if c in self.channels]
+        self.channels.difference_update(old)
+        if old and self.pubsub is not None:
+            try:
+                await self.pubsub.unsubscribe(*old)
+            except Exception as exc:
+                logger.warning("redis unsubscribe failed: %s", exc.__class__.__name__)
 
     async def start(self):
         if self.task and not self.task.done():
@@ -49,7 +350,8 @@ class RedisBroadcaster:
 
         self.redis = aioredis.from_url(settings.redis_url, decode_responses=True)
         self.pubsub = self.redis.pubsub()
-        await self.pubsub.subscribe(settings.redis_channel)
+        self.channels.add(settings.redis_channel)
+        await self.pubsub.subscribe(*self.channels)
 
         async def _loop():
             try:
@@ -58,11 +360,9 @@ class RedisBroadcaster:
                         continue
                     if msg.get("type") != "message":
                         continue
-                    try:
-                        payload = json.loads(msg.get("data"))
-                        await manager.broadcast(payload)
-                    except Exception:
-                        continue
+                    topic = channel_topic(msg.get("channel") or "")
+                    if topic is not None:
+                        manager.publish(topic, msg.get("data"))
             except asyncio.CancelledError:
                 raise
             except Exception as exc:
@@ -70,7 +370,7 @@ class RedisBroadcaster:
             finally:
                 try:
                     if self.pubsub:
-                        await self.pubsub.unsubscribe(settings.redis_channel)
+                        await self.pubsub.unsubscribe()
                         await self.pubsub.close()
                 except Exception:
                     pass
@@ -0,0 +1,79 @@
+"""Claim leases on RUNNING tasks.
+
+A worker stamps the tasks it claims with its id and renews ``heartbeat_at``
+while it runs them. A RUNNING task whose lease has expired belonged to a
+worker that died or was killed; it goes back to PENDING so it stops holding a
+``max_concurrency`` slot of its plan.
+"""
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List
+
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+
+from . import models
+
+Task = models.Task
+
+REQUEUE_VALUES = {
+    Task.status: "PENDING",
+    Task.claimed_by: None,
+    Task.heartbeat_at: None,
+    Task.batch_id: None,
+    Task.pid: None,
+    Task.started_at: None,
+}
+
+
+def _last_renewed():
+    # Rows claimed before leases existed have no heartbeat yet.
+    return func.coalesce(Task.heartbeat_at, Task.started_at)
+
+
+def lease_expired(task: models.Task, lease_seconds: int, now: datetime) -> bool:
+    last = task.heartbeat_at or task.started_at
+    return last is None or last < now - timedelta(seconds=lease_seconds)
+
+
+def renew_claims(db: Session, worker_id: str, task_ids: Iterable[int], now: datetime) -> int:
+    """Extend this worker's lease on the given tasks and the batches they lead; the caller commits."""
+    ids = list(task_ids)
+    if not ids:
+        return 0
+    return (
+        db.query(Task)
+        .filter(
+            Task.status == "RUNNING",
+            Task.claimed_by == worker_id,
+            or_(Task.id.in_(ids), Task.batch_id.in_(ids)),
+        )
+        .update({Task.heartbeat_at: now}, synchronize_session=False)
+    )
+
+
+def _requeue(db: Session, *criteria) -> Dict[int, List[int]]:
+    rows = db.query(Task.id, Task.plan_id).filter(Task.status == "RUNNING", *criteria).all()
+    if not rows:
+        return {}
+    # Guarded on the same criteria, so a claim renewed in between is kept.
+    db.query(Task).filter(
+        Task.id.in_([row.id for row in rows]), Task.status == "RUNNING", *criteria
+    ).update(REQUEUE_VALUES, synchronize_session=False)
+    requeued: Dict[int, List[int]] = {}
+    for row in rows:
+        requeued.setdefault(row.plan_id, []).append(row.id)
+    return requeued
+
+
+def requeue_expired_claims(db: Session, lease_seconds: int, now: datetime) -> Dict[int, List[int]]:
+    """Put RUNNING tasks with an expired lease back to PENDING; the caller commits.
+
+    Returns the requeued task ids per plan.
+    """
+    cutoff = now - timedelta(seconds=lease_seconds)
+    return _requeue(db, or_(_last_renewed() < cutoff, _last_renewed().is_(None)))
+
+
+def requeue_worker_claims(db: Session, worker_id: str) -> Dict[int, List[int]]:
+    """Release every claim held under ``worker_id``, left by an earlier process with the same id."""
+    return _requeue(db, Task.claimed_by == worker_id)
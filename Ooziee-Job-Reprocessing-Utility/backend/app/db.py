@@ -1,12 +1,14 @@
 from sqlalchemy import create_engine
-from sqlalchemy.engine import make_url
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
+from .metrics import InstrumentedAsyncQueuePool, InstrumentedQueuePool
 from .settings import settings
 
 class Base(DeclarativeBase):
     pass
 
-def build_engine(db_url: str):
+def _engine_kwargs(db_url: str, pool_class) -> dict:
     engine_kwargs = {
         "pool_pre_ping": True,
         "pool_recycle": 1800,
@@ -17,6 +19,10 @@ def build_engine(db_url: str):
     except Exception:
         parsed = None
 
+    if parsed and (parsed.get_backend_name() == "mysql" or parsed.database not in (None, "", ":memory:")):
+        # Same pool class the dialect would pick, plus checkout-wait metrics.
+        engine_kwargs["poolclass"] = pool_class
+
     if parsed and parsed.get_backend_name() == "mysql":
         engine_kwargs.update(
             {
@@ -28,15 +34,68 @@ def build_engine(db_url: str):
         if not parsed.query.get("charset"):
             engine_kwargs["connect_args"] = {"charset": "utf8mb4"}
 
-    return create_engine(db_url, **engine_kwargs)
+    return engine_kwargs
+
+
+def build_engine(db_url: str):
+    return create_engine(db_url, **_engine_kwargs(db_url, InstrumentedQueuePool))
+
+
+# Async drivers for the sync URLs DB_URL accepts.
+ASYNC_DRIVERS = {"mysql": "mysql+aiomysql", "sqlite": "sqlite+aiosqlite"}
+
+
+def async_url(db_url: str) -> URL:
+    parsed = make_url(db_url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None:
+        raise RuntimeError(f"no async driver for DB_URL backend {parsed.get_backend_name()!r}")
+    return parsed.set(drivername=driver)
+
+
+def build_async_engine(db_url: str) -> AsyncEngine:
+    url = async_url(db_url)
+    return create_async_engine(url, **_engine_kwargs(url.render_as_string(hide_password=False), InstrumentedAsyncQueuePool))
 
 
 engine = build_engine(settings.db_url)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Created on first use so processes that never serve async reads (the
+# worker) do not need the async drivers installed.
+_async_engine = None
+_async_session_factory = None
+
+
+def get_async_engine() -> AsyncEngine:
+    global _async_engine
+    if _async_engine is None:
+        _async_engine = build_async_engine(settings.db_url)
+    return _async_engine
+
+
+def AsyncSessionLocal() -> AsyncSession:
+    global _async_session_factory
+    if _async_session_factory is None:
+        _async_session_factory = async_sessionmaker(get_async_engine(), autoflush=False, expire_on_commit=False)
+    return _async_session_factory()
+
+
+async def dispose_async_engine() -> None:
+    global _async_engine, _async_session_factory
+    if _async_engine is not None:
+        await _async_engine.dispose()
+    _async_engine = None
+    _async_session_factory = None
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    """Async session for read endpoints; they do not hold a threadpool slot."""
+    async with AsyncSessionLocal() as db:
+        yield db
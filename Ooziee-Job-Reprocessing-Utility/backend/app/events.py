@@ -1,25 +1,251 @@
 import json
 import logging
+import queue
+import threading
+from typing import List, Optional, Tuple
 
 import redis
+from redis import asyncio as aioredis
 
 from .settings import settings
 
 logger = logging.getLogger(__name__)
 _redis_client = None
+_publish_script = None
+_async_redis_client = None
+
+# Atomically take the plan's next sequence number, append the event to the
+# stream behind each channel and publish it there with the entry id, so
+# subscribers see per-plan seq values in order and without holes and can
+# replay anything they missed from the stream.
+#   KEYS[1]    plan seq key      KEYS[2..]  stream per channel
+#   ARGV[1]    event JSON        ARGV[2]    stream MAXLEN (approximate)
+#   ARGV[3]    plan stream TTL   ARGV[4..]  channels, aligned with KEYS[2..]
+PUBLISH_SEQ_LUA = """
+local seq = redis.call('INCR', KEYS[1])
+local data = '{"seq":' .. seq .. ',' .. string.sub(ARGV[1], 2)
+for i = 2, #KEYS do
+  local id = redis.call('XADD', KEYS[i], 'MAXLEN', '~', ARGV[2], '*', 'data', data)
+  redis.call('PUBLISH', ARGV[i + 2], '{"id":"' .. id .. '",' .. string.sub(data, 2))
+end
+if tonumber(ARGV[3]) > 0 then
+  redis.call('EXPIRE', KEYS[2], ARGV[3])
+end
+return seq
+"""
+
+# Plan-level changes are also sent on the global channel, which carries the
+# summary feed for plan lists (topic "plans") and worker wakeups.
+SUMMARY_EVENTS = {"plan_created", "plan_updated", "plan_status", "plan_completed", "plan_stopped", "plan_tasks_imported"}
+SUMMARY_TOPIC = "plans"
 
 
 def _client():
-    global _redis_client
+    global _redis_client, _publish_script
     if _redis_client is None:
         _redis_client = redis.from_url(settings.redis_url, decode_responses=True)
+        _publish_script = _redis_client.register_script(PUBLISH_SEQ_LUA)
     return _redis_client
 
 
-def publish_event(payload: dict):
-    global _redis_client
+def seq_key(plan_id: int) -> str:
+    return f"{settings.redis_channel}:seq:{plan_id}"
+
+
+def plan_channel(plan_id: int) -> str:
+    return f"{settings.redis_channel}:plan:{plan_id}"
+
+
+def log_channel(plan_id: int) -> str:
+    # Kept apart from plan_channel so subscribers to plan state (the worker)
+    # never receive live output.
+    return f"{settings.redis_channel}:log:{plan_id}"
+
+
+def auth_channel() -> str:
+    return f"{settings.redis_channel}:auth"
+
+
+def stream_key(channel: str) -> str:
+    return f"{channel}:stream"
+
+
+def channels_for(payload: dict) -> List[str]:
+    plan_id = payload.get("plan_id")
+    if plan_id is None:
+        return [settings.redis_channel]
+    if payload.get("event") == "task_log":
+        return [log_channel(plan_id)]
+    channels = [plan_channel(plan_id)]
+    if payload.get("event") in SUMMARY_EVENTS:
+        channels.append(settings.redis_channel)
+    return channels
+
+
+def topic_channels(topic: str) -> List[str]:
+    """Redis channels behind a client topic: ``plans`` or ``plan:<id>``."""
+    if topic == SUMMARY_TOPIC:
+        return [settings.redis_channel]
+    plan_id = int(topic.split(":", 1)[1])
+    return [plan_channel(plan_id), log_channel(plan_id)]
+
+
+def topic_stream(topic: str) -> str:
+    """Stream holding the replayable (sequenced) events of a topic."""
+    return stream_key(topic_channels(topic)[0])
+
+
+def channel_topic(channel: str) -> Optional[str]:
+    if channel == settings.redis_channel:
+        return SUMMARY_TOPIC
+    _, sep, rest = channel.partition(f"{settings.redis_channel}:")
+    kind, _, plan_id = rest.partition(":")
+    if sep and kind in ("plan", "log") and plan_id.isdigit():
+        return f"plan:{plan_id}"
+    return None
+
+
+def stream_message(entry_id: str, data: str) -> str:
+    """Rebuild the live message for a stream entry (same shape as the Lua publish)."""
+    return '{"id":"' + entry_id + '",' + data[1:]
+
+
+def parse_stream_id(entry_id: str) -> Tuple[int, int]:
+    ms, _, seq = entry_id.partition("-")
+    return int(ms), int(seq or 0)
+
+
+class EventWriter:
+    """Publishes events from a background thread in pipelined batches.
+
+    Callers only enqueue. The writer drains whatever is queued (up to
+    ``EVENT_BATCH_MAX``) into one Redis round trip, so bursts of task events
+    cost one pipeline instead of one call each. Order is preserved per process.
+    """
+
+    def __init__(self):
+        self.queue: "queue.Queue[Optional[Tuple[str, List[str], Optional[int]]]]" = queue.Queue(
+            maxsize=max(1, settings.event_queue_max)
+        )
+        self.thread: Optional[threading.Thread] = None
+        self.lock = threading.Lock()
+        self.published = 0
+        self.batches = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def _ensure_started(self) -> None:
+        if self.thread is not None and self.thread.is_alive():
+            return
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name="event-writer", daemon=True)
+                self.thread.start()
+
+    def submit(self, data: str, channels: List[str], plan_id: Optional[int]) -> None:
+        self._ensure_started()
+        try:
+            self.queue.put_nowait((data, channels, plan_id))
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self) -> None:
+        while True:
+            item = self.queue.get()
+            if item is None:
+                self.queue.task_done()
+                return
+            batch = [item]
+            stop = False
+            while len(batch) < settings.event_batch_max:
+                try:
+                    nxt = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if nxt is None:
+                    stop = True
+                    break
+                batch.append(nxt)
+            self._write(batch)
+            for _ in range(len(batch) + (1 if stop else 0)):
+                self.queue.task_done()
+            if stop:
+                return
+
+    def _write(self, batch) -> None:
+        global _redis_client
+        try:
+            client = _client()
+            pipe = client.pipeline(transaction=False)
+            for data, channels, plan_id in batch:
+                if plan_id is not None:
+                    _publish_script(
+                        keys=[seq_key(plan_id), *[stream_key(c) for c in channels]],
+                        args=[data, settings.event_stream_maxlen, settings.event_stream_ttl_seconds, *channels],
+                        client=pipe,
+                    )
+                else:
+                    for channel in channels:
+                        pipe.publish(channel, data)
+            pipe.execute()
+            self.published += len(batch)
+            self.batches += 1
+        except Exception as exc:
+            self.failed += len(batch)
+            logger.warning("failed to publish %d event(s): %s", len(batch), exc.__class__.__name__)
+            _redis_client = None
+
+    def flush(self, timeout: float = 5.0) -> None:
+        """Wait until queued events are written (best effort, bounded by ``timeout``)."""
+        if self.thread is None:
+            return
+        done = threading.Event()
+        threading.Thread(target=lambda: (self.queue.join(), done.set()), daemon=True).start()
+        done.wait(timeout)
+
+    def close(self, timeout: float = 5.0) -> None:
+        if self.thread is None or not self.thread.is_alive():
+            return
+        try:
+            self.queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self.thread.join(timeout)
+
+    def stats(self) -> dict:
+        return {
+            "queued": self.queue.qsize(),
+            "published": self.published,
+            "batches": self.batches,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+
+writer = EventWriter()
+
+
+def publish_event(payload: dict, sequenced: bool = True) -> None:
+    """Queue an event for publishing.
+
+    Events that carry a ``plan_id`` go to that plan's channel, get the plan's
+    next ``seq`` and are appended to the plan's replay stream, unless
+    ``sequenced`` is false (used for high-volume, stateless events such as
+    live log chunks, which are only published).
+    """
+    data = json.dumps(payload, default=str)
+    plan_id = payload.get("plan_id")
+    writer.submit(data, channels_for(payload), plan_id if sequenced else None)
+
+
+async def current_seq(plan_id: int) -> int:
+    """Last seq published for a plan; read it before taking a snapshot."""
+    global _async_redis_client
     try:
-        _client().publish(settings.redis_channel, json.dumps(payload, default=str))
+        if _async_redis_client is None:
+            _async_redis_client = aioredis.from_url(settings.redis_url, decode_responses=True)
+        return int(await _async_redis_client.get(seq_key(plan_id)) or 0)
     except Exception as exc:
-        logger.warning("failed to publish event: %s", exc.__class__.__name__)
-        _redis_client = None
+        logger.warning("failed to read event seq: %s", exc.__class__.__name__)
+        _async_redis_client = None
+        return 0
@@ -0,0 +1,141 @@
+import csv
+import json
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from . import models, schemas
+from .settings import settings
+from .tracking import TRACKABLE_TYPES, untracked_type_error
+
+FORMATS = ("ndjson", "csv")
+
+
+def task_row(plan_id: int, t: schemas.TaskCreate) -> Dict[str, Any]:
+    return {
+        "plan_id": plan_id,
+        "name": t.name,
+        "type": t.type,
+        "job_id": t.job_id,
+        "action": t.action or "",
+        "date": t.date or "",
+        "coordinator": t.coordinator or "",
+        "wf_failnodes": bool(t.wf_failnodes),
+        "wf_skip_nodes": t.wf_skip_nodes or "",
+        "refresh": bool(t.refresh),
+        "failed": bool(t.failed),
+        "extra_props": t.extra_props or {},
+        "status": "PENDING",
+        "attempt": 0,
+    }
+
+
+def insert_tasks(db: Session, plan_id: int, tasks: Iterable[schemas.TaskCreate]) -> int:
+    """Insert tasks with chunked executemany core INSERTs; the caller commits."""
+    chunk_size = max(1, settings.import_chunk_size)
+    inserted = 0
+    batch: List[Dict[str, Any]] = []
+    for t in tasks:
+        batch.append(task_row(plan_id, t))
+        if len(batch) >= chunk_size:
+            db.execute(insert(models.Task), batch)
+            inserted += len(batch)
+            batch = []
+    if batch:
+        db.execute(insert(models.Task), batch)
+        inserted += len(batch)
+    return inserted
+
+
+def _error_message(exc: Exception) -> str:
+    if isinstance(exc, ValidationError):
+        parts = []
+        for err in exc.errors():
+            loc = ".".join(str(x) for x in err.get("loc", ()))
+            parts.append(f"{loc}: {err['msg']}" if loc else err["msg"])
+        return "; ".join(parts)
+    return str(exc)
+
+
+class TaskImporter:
+    """Validate NDJSON or CSV task rows batch by batch and bulk insert the good ones.
+
+    CSV input needs a header row naming TaskCreate fields and one record per
+    line; empty cells fall back to the field default and ``extra_props`` is a
+    JSON object. Rows are numbered by input line. Plans with ``track_outcome``
+    only accept task types that can be tracked.
+    """
+
+    def __init__(self, plan_id: int, fmt: str, dry_run: bool = False, track_outcome: bool = False):
+        if fmt not in FORMATS:
+            raise ValueError(f"unsupported import format: {fmt}")
+        self.plan_id = plan_id
+        self.fmt = fmt
+        self.dry_run = dry_run
+        self.track_outcome = track_outcome
+        self.header: Optional[List[str]] = None
+        self.valid = 0
+        self.inserted = 0
+        self.failed = 0
+        self.errors: List[schemas.TaskImportError] = []
+
+    def wants_header(self) -> bool:
+        return self.fmt == "csv" and self.header is None
+
+    def set_header(self, line: str) -> None:
+        header = [h.strip() for h in next(csv.reader([line]))]
+        unknown = set(header) - set(schemas.TaskCreate.model_fields)
+        if unknown:
+            raise ValueError(f"unknown CSV columns: {', '.join(sorted(unknown))}")
+        self.header = header
+
+    def _parse(self, line: str) -> Dict[str, Any]:
+        if self.fmt == "ndjson":
+            data = json.loads(line)
+            if not isinstance(data, dict):
+                raise ValueError("row must be a JSON object")
+            return data
+        values = next(csv.reader([line]))
+        if len(values) != len(self.header):
+            raise ValueError(f"expected {len(self.header)} columns, got {len(values)}")
+        data: Dict[str, Any] = {}
+        for key, value in zip(self.header, values):
+            if value == "":
+                continue
+            if key == "extra_props":
+                value = json.loads(value)
+            data[key] = value
+        return data
+
+    def _record_error(self, row: int, message: str) -> None:
+        self.failed += 1
+        if len(self.errors) < settings.import_max_errors:
+            self.errors.append(schemas.TaskImportError(row=row, error=message))
+
+    def process(self, db: Session, rows: List[Tuple[int, str]]) -> None:
+        valid: List[schemas.TaskCreate] = []
+        for row, line in rows:
+            try:
+                task = schemas.TaskCreate.model_validate(self._parse(line))
+                if self.track_outcome and task.type not in TRACKABLE_TYPES:
+                    raise ValueError(untracked_type_error(task.type))
+                valid.append(task)
+            except (ValidationError, ValueError, csv.Error) as exc:
+                self._record_error(row, _error_message(exc))
+        self.valid += len(valid)
+        if valid and not self.dry_run:
+            self.inserted += insert_tasks(db, self.plan_id, valid)
+            db.commit()
+
+    def result(self) -> schemas.TaskImportResult:
+        return schemas.TaskImportResult(
+            plan_id=self.plan_id,
+            dry_run=self.dry_run,
+            valid=self.valid,
+            inserted=self.inserted,
+            failed=self.failed,
+            errors=self.errors,
+            errors_truncated=self.failed > len(self.errors),
+        )
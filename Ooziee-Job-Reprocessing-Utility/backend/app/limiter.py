@@ -0,0 +1,251 @@
+import logging
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+import redis
+
+from .metrics import OOZIE_LIMITER
+from .settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Take up to ARGV[9] rerun slots for one Oozie server. Expired leases
+# (workers that died mid-rerun) are dropped first. The bucket refills at
+# OOZIE_LIMIT_RATE scaled by how far AIMD has cut the concurrency limit, so
+# both shrink together. Lease ids are ARGV[2] .. ":" .. n for n = 1..granted.
+#   KEYS[1]  state hash          KEYS[2]  lease zset (score = expiry)
+#   ARGV[1]  now                 ARGV[2]  lease prefix ARGV[3]  lease expiry
+#   ARGV[4]  max concurrency     ARGV[5]  min concurrency
+#   ARGV[6]  rate at max         ARGV[7]  burst        ARGV[8]  state TTL
+#   ARGV[9]  slots wanted
+# Returns {granted, wait}: wait is why fewer were granted, -1 when every
+# slot is taken, else the time until the next token.
+ACQUIRE_LUA = """
+local now = tonumber(ARGV[1])
+local max_c = tonumber(ARGV[4])
+redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', now)
+local s = redis.call('HMGET', KEYS[1], 'limit', 'tokens', 'ts')
+local limit = math.min(math.max(tonumber(s[1]) or max_c, tonumber(ARGV[5])), max_c)
+local rate = tonumber(ARGV[6]) * limit / max_c
+local burst = tonumber(ARGV[7])
+local tokens = tonumber(s[2]) or burst
+tokens = math.min(burst, tokens + math.max(0, now - (tonumber(s[3]) or now)) * rate)
+local held = redis.call('ZCARD', KEYS[2])
+local want = tonumber(ARGV[9])
+local granted = 0
+local wait = 0
+while granted < want do
+  if held + granted >= math.floor(limit) then
+    wait = -1
+    break
+  elseif tokens < 1 then
+    wait = (1 - tokens) / rate
+    break
+  end
+  tokens = tokens - 1
+  granted = granted + 1
+  redis.call('ZADD', KEYS[2], ARGV[3], ARGV[2] .. ':' .. granted)
+end
+redis.call('HSET', KEYS[1], 'limit', limit, 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], ARGV[8])
+redis.call('EXPIRE', KEYS[2], ARGV[8])
+return {granted, tostring(wait)}
+"""
+
+# Return a slot and apply AIMD: a congested rerun (5xx, connection error,
+# timeout or over the latency target) cuts the limit by ARGV[6], at most once
+# per cooldown so one burst of failures counts once; any other rerun adds
+# 1/limit, i.e. about one slot per limit's worth of healthy reruns. A slot
+# that was never used ("unused") only gives its token back.
+#   KEYS as above   ARGV[1] now   ARGV[2] lease id
+#   ARGV[3] "1" congested, "0" healthy, "unused" never used
+#   ARGV[4] max concurrency   ARGV[5] min concurrency
+#   ARGV[6] decrease factor   ARGV[7] cooldown seconds
+RELEASE_LUA = """
+local now = tonumber(ARGV[1])
+local max_c = tonumber(ARGV[4])
+local min_c = tonumber(ARGV[5])
+redis.call('ZREM', KEYS[2], ARGV[2])
+local s = redis.call('HMGET', KEYS[1], 'limit', 'decreased_at')
+local limit = tonumber(s[1]) or max_c
+if ARGV[3] == 'unused' then
+  redis.call('HINCRBYFLOAT', KEYS[1], 'tokens', 1)
+  return tostring(limit)
+end
+if ARGV[3] == '1' then
+  redis.call('HINCRBY', KEYS[1], 'congested', 1)
+  if now - (tonumber(s[2]) or 0) >= tonumber(ARGV[7]) then
+    limit = math.max(min_c, limit * tonumber(ARGV[6]))
+    redis.call('HSET', KEYS[1], 'decreased_at', now)
+    redis.call('HINCRBY', KEYS[1], 'decreases', 1)
+  end
+else
+  limit = math.min(max_c, limit + 1 / limit)
+end
+redis.call('HSET', KEYS[1], 'limit', limit)
+return tostring(limit)
+"""
+
+
+def limit_key(oozie_url: str) -> str:
+    return f"{settings.redis_channel}:oozie_limit:{oozie_url.strip().rstrip('/')}"
+
+
+def urls_key() -> str:
+    return f"{settings.redis_channel}:oozie_limits"
+
+
+class OozieLimiter:
+    """Token bucket plus AIMD concurrency limit per Oozie server, shared
+    by every plan and worker process through Redis.
+
+    Reruns against one ``oozie_url`` need a lease from :meth:`acquire` (or
+    :meth:`try_acquire`) and hand it back with :meth:`release`, or with
+    :meth:`cancel` if the rerun never ran. When Redis is unreachable the
+    limiter fails open so reprocessing is never blocked by it.
+    """
+
+    def __init__(self):
+        self._client = None
+        self._acquire = None
+        self._release = None
+        self.failures = 0
+
+    def _redis(self):
+        if self._client is None:
+            self._client = redis.from_url(settings.redis_url, decode_responses=True)
+            self._acquire = self._client.register_script(ACQUIRE_LUA)
+            self._release = self._client.register_script(RELEASE_LUA)
+        return self._client
+
+    @staticmethod
+    def _state_ttl(lease_seconds: float) -> int:
+        return int(max(lease_seconds, 3600))
+
+    def try_acquire(self, oozie_url: str, lease_seconds: float) -> Tuple[Optional[str], float]:
+        """Return ``(lease, 0)`` when a slot was taken, else ``(None, wait)``.
+
+        ``wait`` is the time until the next token, or -1 when the server is
+        at its concurrency limit. The lease is ``""`` when limiting is off
+        or Redis is unavailable.
+        """
+        leases, wait = self.acquire(oozie_url, 1, lease_seconds)
+        return (leases[0], 0.0) if leases else (None, wait)
+
+    def acquire(self, oozie_url: str, count: int, lease_seconds: float) -> Tuple[List[str], float]:
+        """Take up to ``count`` slots in one round trip.
+
+        Returns the leases and, when fewer than ``count`` were granted, the
+        wait hint of :meth:`try_acquire`.
+        """
+        if count <= 0:
+            return [], 0.0
+        if not settings.oozie_limit_enabled:
+            return [""] * count, 0.0
+        key = limit_key(oozie_url)
+        prefix = uuid.uuid4().hex
+        now = time.time()
+        try:
+            client = self._redis()
+            granted, wait = self._acquire(
+                keys=[key, f"{key}:leases"],
+                args=[
+                    now,
+                    prefix,
+                    now + lease_seconds,
+                    settings.oozie_limit_max_concurrency,
+                    settings.oozie_limit_min_concurrency,
+                    settings.oozie_limit_rate,
+                    settings.oozie_limit_burst,
+                    self._state_ttl(lease_seconds),
+                    count,
+                ],
+            )
+            granted = int(granted)
+            if granted:
+                client.sadd(urls_key(), oozie_url.strip().rstrip("/"))
+                OOZIE_LIMITER.labels("granted").inc(granted)
+        except Exception as exc:
+            self.failures += 1
+            OOZIE_LIMITER.labels("bypassed").inc()
+            logger.warning("oozie limiter unavailable, not limiting: %s", exc.__class__.__name__)
+            return [""] * count, 0.0
+        leases = [f"{prefix}:{n}" for n in range(1, granted + 1)]
+        if granted == count:
+            return leases, 0.0
+        wait = float(wait)
+        OOZIE_LIMITER.labels("concurrency" if wait < 0 else "rate").inc()
+        return leases, wait
+
+    def release(self, oozie_url: str, lease: str, congested: bool) -> None:
+        if congested:
+            OOZIE_LIMITER.labels("congested").inc()
+        self._release_lease(oozie_url, lease, "1" if congested else "0")
+
+    def cancel(self, oozie_url: str, lease: str) -> None:
+        """Hand back a slot whose rerun never ran: no AIMD update, token refunded."""
+        self._release_lease(oozie_url, lease, "unused")
+
+    def _release_lease(self, oozie_url: str, lease: str, outcome: str) -> None:
+        if not lease:
+            return
+        key = limit_key(oozie_url)
+        try:
+            self._redis()
+            self._release(
+                keys=[key, f"{key}:leases"],
+                args=[
+                    time.time(),
+                    lease,
+                    outcome,
+                    settings.oozie_limit_max_concurrency,
+                    settings.oozie_limit_min_concurrency,
+                    settings.oozie_limit_decrease,
+                    settings.oozie_limit_cooldown,
+                ],
+            )
+        except Exception as exc:
+            # The lease expires on its own; only the AIMD update is lost.
+            self.failures += 1
+            logger.warning("oozie limiter release failed: %s", exc.__class__.__name__)
+
+    def states(self) -> List[Dict[str, Any]]:
+        client = self._redis()
+        now = time.time()
+        states = []
+        for oozie_url in sorted(client.smembers(urls_key())):
+            key = limit_key(oozie_url)
+            raw = client.hgetall(key)
+            if not raw:
+                client.srem(urls_key(), oozie_url)
+                continue
+            limit = float(raw.get("limit") or settings.oozie_limit_max_concurrency)
+            states.append(
+                {
+                    "oozie_url": oozie_url,
+                    "limit": round(limit, 2),
+                    "max_concurrency": settings.oozie_limit_max_concurrency,
+                    "inflight": client.zcount(f"{key}:leases", now, "+inf"),
+                    "rate": round(settings.oozie_limit_rate * limit / settings.oozie_limit_max_concurrency, 3),
+                    "tokens": round(float(raw.get("tokens") or 0), 2),
+                    "congested": int(raw.get("congested") or 0),
+                    "decreases": int(raw.get("decreases") or 0),
+                    "decreased_at": float(raw["decreased_at"]) if raw.get("decreased_at") else None,
+                }
+            )
+        return states
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": settings.oozie_limit_enabled,
+            "max_concurrency": settings.oozie_limit_max_concurrency,
+            "min_concurrency": settings.oozie_limit_min_concurrency,
+            "rate": settings.oozie_limit_rate,
+            "burst": settings.oozie_limit_burst,
+            "latency_target_seconds": settings.oozie_limit_latency_target,
+            "servers": self.states(),
+        }
+
+
+limiter = OozieLimiter()
@@ -1,17 +1,24 @@
+import json
 import logging
 import re
 from contextlib import asynccontextmanager
 
-import redis
-from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi import Depends, FastAPI, HTTPException, Response, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from redis import asyncio as aioredis
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 
 from . import models
-from .auth import decode_token, hash_password
-from .broadcast import broadcaster, manager
-from .db import Base, SessionLocal, engine
+from .auth import decode_token, hash_password, require_role
+from .broadcast import STREAM_ID_RE, TOPIC_RE, broadcaster, manager
+from .db import AsyncSessionLocal, Base, SessionLocal, dispose_async_engine, engine
+from .events import writer as event_writer
+from .metrics import render as render_metrics
+from .oozie import close_async_clients
+from .oozie_cache import job_info_cache
+from .passwords import hasher as password_hasher
+from .principals import principal_cache
 from .routes.auth import router as auth_router
 from .routes.oozie_api import router as oozie_router
 from .routes.plans import router as plans_router
@@ -24,6 +31,7 @@ logging.basicConfig(
     level=getattr(logging, settings.log_level.upper(), logging.INFO),
     format="%(asctime)s %(levelname)s [%(name)s] %(message)s",
 )
+logging.getLogger("httpx").setLevel(logging.WARNING)
 
 
 def _parse_major(version: str) -> int:
@@ -32,7 +40,10 @@ def _parse_major(version: str) -> int:
 
 
 def _check_mysql_compatibility(db: Session) -> dict:
-    row = db.execute(text("SELECT VERSION()")).scalar()
+    return _mysql_details(db.execute(text("SELECT VERSION()")).scalar())
+
+
+def _mysql_details(row) -> dict:
     version = str(row or "").strip()
     lower_version = version.lower()
 
@@ -85,10 +96,17 @@ async def lifespan(app: FastAPI):
         db.close()
 
     await broadcaster.start()
+    await principal_cache.start()
     try:
         yield
     finally:
+        await principal_cache.stop()
         await broadcaster.stop()
+        password_hasher.close()
+        event_writer.close()
+        await dispose_async_engine()
+        await job_info_cache.close()
+        await close_async_clients()
 
 
 app = FastAPI(title="Oozie Reprocessing Manager", version="0.1.0", lifespan=lifespan)
@@ -112,34 +130,75 @@ def health():
     return {"ok": True}
 
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    if not settings.metrics_enabled:
+        raise HTTPException(status_code=404, detail="Not Found")
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+
 @app.get("/ready")
-def ready():
+async def ready():
     checks = {}
 
-    db: Session = SessionLocal()
     try:
-        db.execute(text("SELECT 1"))
-        checks["database"] = "ok"
-        checks["database_backend"] = engine.url.get_backend_name()
-        if checks["database_backend"] == "mysql":
-            checks.update(_check_mysql_compatibility(db))
+        async with AsyncSessionLocal() as db:
+            await db.execute(text("SELECT 1"))
+            checks["database"] = "ok"
+            checks["database_backend"] = engine.url.get_backend_name()
+            if checks["database_backend"] == "mysql":
+                checks.update(_mysql_details((await db.execute(text("SELECT VERSION()"))).scalar()))
     except Exception as exc:
         checks["database"] = f"error: {exc.__class__.__name__}"
-    finally:
-        db.close()
 
+    client = aioredis.from_url(settings.redis_url, decode_responses=True)
     try:
-        redis.from_url(settings.redis_url, decode_responses=True).ping()
+        await client.ping()
         checks["redis"] = "ok"
     except Exception as exc:
         checks["redis"] = f"error: {exc.__class__.__name__}"
+    finally:
+        await client.close()
 
-    if any(v != "ok" for v in checks.values()):
+    # Only the probes themselves decide readiness, not the detail fields.
+    if checks["database"] != "ok" or checks["redis"] != "ok":
         raise HTTPException(status_code=503, detail={"status": "degraded", "checks": checks})
 
     return {"status": "ready", "checks": checks}
 
 
+@app.get("/api/ws/stats")
+def websocket_stats(_=Depends(require_role("admin"))):
+    return {**manager.stats(), "event_writer": event_writer.stats()}
+
+
+async def _handle_ws_op(conn, msg: str) -> None:
+    """Apply a ``{"op": "subscribe"|"unsubscribe", "topics": [...]}`` request.
+
+    ``subscribe`` may carry ``"since": {topic: last_event_id}`` to replay
+    missed events first.
+    """
+    try:
+        req = json.loads(msg)
+        op = req.get("op")
+        topics = [t for t in req.get("topics", []) if isinstance(t, str) and TOPIC_RE.match(t)]
+        since = {
+            t: str(i) for t, i in (req.get("since") or {}).items() if t in topics and STREAM_ID_RE.match(str(i))
+        }
+    except (ValueError, AttributeError, TypeError):
+        conn.offer('{"event":"error","detail":"invalid message"}')
+        return
+    if op == "subscribe":
+        await manager.subscribe(conn, topics, since=since)
+    elif op == "unsubscribe":
+        await manager.unsubscribe(conn, topics)
+    else:
+        conn.offer('{"event":"error","detail":"unknown op"}')
+        return
+    conn.offer(json.dumps({"event": "subscriptions", "topics": sorted(conn.topics)}))
+
+
 @app.websocket("/ws")
 async def websocket_endpoint(websocket: WebSocket):
     token = websocket.query_params.get("token", "")
@@ -152,12 +211,18 @@ async def websocket_endpoint(websocket: WebSocket):
         await websocket.close(code=4401)
         return
 
-    await manager.connect(websocket)
+    last_id = websocket.query_params.get("last_id") or None
+    if last_id and not STREAM_ID_RE.match(last_id):
+        last_id = None
+    conn = await manager.connect(websocket, last_id=last_id)
     try:
         while True:
             msg = await websocket.receive_text()
             if msg.strip().lower() == "ping":
-                await websocket.send_text('{"event":"pong"}')
+                # All sends go through the connection's writer task.
+                conn.offer('{"event":"pong"}')
+                continue
+            await _handle_ws_op(conn, msg)
     except WebSocketDisconnect:
         await manager.disconnect(websocket)
     except Exception:
@@ -0,0 +1,112 @@
+import os
+import time
+from contextlib import contextmanager
+from typing import Iterator, Tuple
+from urllib.parse import urlparse
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Task runtimes span sub-second REST calls to CLI reruns near TASK_TIMEOUT_SECONDS.
+TASK_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+
+TASK_QUEUE_WAIT = Histogram(
+    "oozie_task_queue_wait_seconds", "Time from claiming a task to starting it on a worker thread", buckets=TASK_BUCKETS
+)
+PRE_TASK_HOOK = Histogram("oozie_pre_task_hook_seconds", "Pre-task hook runtime", buckets=TASK_BUCKETS)
+PRE_TASK_HOOK_RESULTS = Counter(
+    "oozie_pre_task_hook_total", "Pre-task hook lookups by outcome (run, cached, auth_retry)", ["result"]
+)
+REST_RERUN = Histogram("oozie_rest_rerun_seconds", "REST rerun submission time", ["type"], buckets=TASK_BUCKETS)
+CLI_RUNTIME = Histogram("oozie_cli_runtime_seconds", "Oozie CLI rerun runtime", ["type"], buckets=TASK_BUCKETS)
+TASKS_FINISHED = Counter("oozie_tasks_finished_total", "Tasks finished by the worker", ["status"])
+
+WORKER_TICK = Histogram("oozie_worker_tick_seconds", "Duration of one dispatch tick", buckets=FAST_BUCKETS)
+EXECUTOR_QUEUE_DEPTH = Gauge("oozie_worker_executor_queue_depth", "Tasks submitted but not yet started")
+WORKER_INFLIGHT = Gauge("oozie_worker_inflight_tasks", "Tasks running or queued in this worker")
+
+OOZIE_REQUEST = Histogram(
+    "oozie_http_request_seconds", "Oozie HTTP request latency", ["host", "operation"], buckets=FAST_BUCKETS + (10, 30)
+)
+OOZIE_ERRORS = Counter("oozie_http_errors_total", "Failed Oozie HTTP requests", ["host", "operation", "error"])
+OOZIE_LIMITER = Counter(
+    "oozie_limiter_decisions_total",
+    "Per-server limiter outcomes (granted, rate, concurrency, congested, bypassed)",
+    ["result"],
+)
+OOZIE_TRACKED = Counter(
+    "oozie_tracked_tasks_total", "Submitted tasks resolved by outcome tracking (success, failed, timeout)", ["result"]
+)
+OOZIE_LIMITER_WAIT = Histogram(
+    "oozie_limiter_wait_seconds", "Time a rerun waited for its Oozie server's limiter", buckets=TASK_BUCKETS
+)
+
+AUTH_PRINCIPAL_LOOKUPS = Counter("auth_principal_lookups_total", "Principal cache lookups", ["result"])
+PASSWORD_HASH = Histogram(
+    "password_hash_seconds", "bcrypt hash/verify time in the hash pool", ["operation"], buckets=FAST_BUCKETS
+)
+PASSWORD_HASH_QUEUE_WAIT = Histogram(
+    "password_hash_queue_wait_seconds", "Time waiting for a password hash slot", buckets=FAST_BUCKETS
+)
+PASSWORD_HASH_REJECTED = Counter(
+    "password_hash_rejected_total", "Hash requests rejected after the queue timeout", ["operation"]
+)
+
+DB_POOL_CHECKOUT = Histogram("db_pool_checkout_seconds", "Time waiting to check out a DB connection", buckets=FAST_BUCKETS)
+
+WS_CONNECTIONS = Gauge("ws_connections", "Connected WebSocket clients", multiprocess_mode="livesum")
+WS_FANOUT = Histogram("ws_fanout_seconds", "Time to hand one event to every subscriber queue", buckets=FAST_BUCKETS)
+WS_SEND = Histogram("ws_send_seconds", "WebSocket send latency per message", buckets=FAST_BUCKETS)
+WS_DROPPED = Counter("ws_dropped_messages_total", "Messages dropped or coalesced for slow clients", ["reason"])
+
+
+@contextmanager
+def observe_oozie(base_url: str, operation: str) -> Iterator[None]:
+    host = urlparse(base_url).netloc or base_url
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception as exc:
+        OOZIE_ERRORS.labels(host, operation, exc.__class__.__name__).inc()
+        raise
+    finally:
+        OOZIE_REQUEST.labels(host, operation).observe(time.perf_counter() - start)
+
+
+class _CheckoutTimer:
+    """Pool mixin that records how long callers wait for a connection."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT.observe(time.perf_counter() - start)
+
+
+class InstrumentedQueuePool(_CheckoutTimer, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_CheckoutTimer, AsyncAdaptedQueuePool):
+    pass
+
+
+def render() -> Tuple[bytes, str]:
+    """Exposition for /metrics, aggregated across processes when
+    PROMETHEUS_MULTIPROC_DIR is set (gunicorn with several workers)."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
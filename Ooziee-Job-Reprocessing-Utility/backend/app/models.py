@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import JSON, Boolean, Column, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import JSON, Boolean, Column, DateTime, ForeignKey, Integer, LargeBinary, String, Text
 from sqlalchemy.orm import relationship
 
 from .db import Base
@@ -24,6 +24,14 @@ class Plan(Base):
     oozie_url = Column(String(512), default="")
     use_rest = Column(Boolean, default=False)
     max_concurrency = Column(Integer, default=1)
+    # Coordinator tasks per rerun invocation; 1 disables batching.
+    coord_batch_size = Column(Integer, default=1)
+    # Keep successfully submitted reruns SUBMITTED until Oozie reports an end state.
+    track_outcome = Column(Boolean, default=False)
+    # Worker scheduling: higher priority runs first under WORKER_SCHEDULER=priority;
+    # weight sets the plan's share of worker slots among its peers.
+    priority = Column(Integer, default=0)
+    weight = Column(Integer, default=1)
     created_by = Column(String(128), default="")
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -53,14 +61,37 @@ class Task(Base):
 
     status = Column(String(32), nullable=False, default="PENDING")
     attempt = Column(Integer, default=0)
+    # Id of the task that led the batched rerun this task last ran in.
+    batch_id = Column(Integer, default=None)
+    # Last job status seen in Oozie while the task was SUBMITTED.
+    oozie_status = Column(String(32), default="")
 
     command = Column(Text, default="")
-    stdout = Column(Text, default="")
-    stderr = Column(Text, default="")
     exit_code = Column(Integer, default=None)
     pid = Column(Integer, default=None)
+    # Claim lease: the worker running the task renews heartbeat_at; an expired
+    # lease means the worker died and the task goes back to PENDING.
+    claimed_by = Column(String(128), default=None)
+    heartbeat_at = Column(DateTime, default=None)
 
     started_at = Column(DateTime, default=None)
+    submitted_at = Column(DateTime, default=None)
     ended_at = Column(DateTime, default=None)
 
     plan = relationship("Plan", back_populates="tasks")
+    output = relationship("TaskOutput", uselist=False, back_populates="task", cascade="all, delete-orphan")
+
+
+class TaskOutput(Base):
+    """Compressed stdout/stderr of a task's latest attempt, kept off the hot tasks row."""
+
+    __tablename__ = "task_outputs"
+    task_id = Column(Integer, ForeignKey("tasks.id", ondelete="CASCADE"), primary_key=True)
+    codec = Column(String(16), nullable=False, default="zlib")
+    stdout = Column(LargeBinary(16 * 1024 * 1024), default=b"")
+    stderr = Column(LargeBinary(16 * 1024 * 1024), default=b"")
+    stdout_size = Column(Integer, default=0)
+    stderr_size = Column(Integer, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    task = relationship("Task", back_populates="output")
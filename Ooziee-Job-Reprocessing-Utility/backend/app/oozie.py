@@ -1,43 +1,450 @@
+import asyncio
+import threading
+import time
+
+import httpx
 import requests
-from typing import Any, Dict, Optional
+from requests.adapters import HTTPAdapter
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
 from xml.sax.saxutils import escape
 
+from .metrics import observe_oozie
 from .settings import settings
 
 
+def _flag(value: bool) -> str:
+    return "true" if value else "false"
+
+
+def _split_scope(scope: str) -> List[str]:
+    return [part.strip() for part in (scope or "").split(",") if part.strip()]
+
+
+def merge_action_scopes(scopes: Iterable[str]) -> str:
+    """Merge coordinator ``-action`` scopes into one list with ranges.
+
+    ``["1", "2-4", "6"]`` becomes ``"1-4,6"``. Scopes that are not plain
+    numbers or ``a-b`` ranges are joined as given.
+    """
+    parts = [part for scope in scopes for part in _split_scope(scope)]
+    ranges: List[Tuple[int, int]] = []
+    for part in parts:
+        lo, sep, hi = part.partition("-")
+        if not lo.isdigit() or (sep and not hi.isdigit()):
+            return ",".join(dict.fromkeys(parts))
+        start, end = int(lo), int(hi) if sep else int(lo)
+        ranges.append((min(start, end), max(start, end)))
+    merged: List[List[int]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return ",".join(str(a) if a == b else f"{a}-{b}" for a, b in merged)
+
+
+def merge_date_scopes(scopes: Iterable[str]) -> str:
+    """Merge coordinator ``-date`` scopes (dates or ``start::end`` ranges)."""
+    return ",".join(sorted(dict.fromkeys(part for scope in scopes for part in _split_scope(scope))))
+
+
 class OozieClient:
-    def __init__(self, base_url: str):
+    def __init__(self, base_url: str, pool_maxsize: Optional[int] = None):
         self.base_url = base_url.rstrip("/")
         self.timeout = settings.oozie_http_timeout
         self.session = requests.Session()
+        if pool_maxsize:
+            # Block instead of opening extra connections, so pool_maxsize is a
+            # hard per-host limit rather than a keep-alive hint.
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize, pool_block=True)
+            self.session.mount("http://", adapter)
+            self.session.mount("https://", adapter)
+
+    def pool_stats(self) -> Dict[str, int]:
+        requests_made = 0
+        connections = 0
+        adapters = {id(a): a for a in self.session.adapters.values()}
+        for adapter in adapters.values():
+            pools = adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                requests_made += pool.num_requests
+                connections += pool.num_connections
+        return {
+            "requests": requests_made,
+            "connections_opened": connections,
+            "connections_reused": max(0, requests_made - connections),
+        }
+
+    def close(self) -> None:
+        self.session.close()
 
     def job_info(self, job_id: str) -> Dict[str, Any]:
         url = f"{self.base_url}/v2/job/{job_id}"
-        r = self.session.get(url, params={"show": "info"}, timeout=self.timeout)
-        r.raise_for_status()
+        with observe_oozie(self.base_url, "job_info"):
+            r = self.session.get(url, params={"show": "info"}, timeout=self.timeout)
+            r.raise_for_status()
         return r.json()
 
+    # v2/jobs ``jobtype`` per task type, and where each listing keeps its jobs.
+    JOBS_QUERY_TYPES = {"workflow": "wf", "coordinator": "coordinator", "bundle": "bundle"}
+    JOBS_RESPONSE_FIELDS = {
+        "wf": ("workflows", "id"),
+        "coordinator": ("coordinatorjobs", "coordJobId"),
+        "bundle": ("bundlejobs", "bundleJobId"),
+    }
+
+    @staticmethod
+    def parse_job_statuses(jobtype: str, payload: Dict[str, Any]) -> Dict[str, str]:
+        """Map job id to status from a ``v2/jobs`` response."""
+        list_key, id_key = OozieClient.JOBS_RESPONSE_FIELDS[jobtype]
+        return {
+            str(job[id_key]): str(job.get("status") or "")
+            for job in payload.get(list_key) or []
+            if job.get(id_key)
+        }
+
+    def job_statuses(self, task_type: str, job_ids: List[str]) -> Dict[str, str]:
+        """Statuses of many jobs of one type from a single ``v2/jobs`` filter query."""
+        jobtype = self.JOBS_QUERY_TYPES[task_type]
+        params = {
+            "jobtype": jobtype,
+            "filter": ";".join(f"id={job_id}" for job_id in job_ids),
+            "offset": "1",
+            "len": str(len(job_ids)),
+        }
+        with observe_oozie(self.base_url, "jobs"):
+            r = self.session.get(f"{self.base_url}/v2/jobs", params=params, timeout=self.timeout)
+            r.raise_for_status()
+        return self.parse_job_statuses(jobtype, r.json())
+
+    @staticmethod
+    def coordinator_rerun_params(
+        rerun_type: str,
+        scope: str,
+        refresh: bool = False,
+        failed: bool = False,
+        nocleanup: bool = True,
+    ) -> Dict[str, str]:
+        if rerun_type not in ("action", "date"):
+            raise ValueError("coordinator rerun type must be 'action' or 'date'")
+        if not scope:
+            raise ValueError("coordinator rerun requires a scope")
+        params = {
+            "type": rerun_type,
+            "scope": scope,
+            "refresh": _flag(refresh),
+            "nocleanup": _flag(nocleanup),
+        }
+        if failed:
+            params["failed"] = "true"
+        return params
+
+    @staticmethod
+    def bundle_rerun_params(
+        coord_scope: str = "",
+        date_scope: str = "",
+        refresh: bool = False,
+        nocleanup: bool = True,
+    ) -> Dict[str, str]:
+        if not (coord_scope or date_scope):
+            raise ValueError("bundle rerun requires coordinator or date scope")
+        params = {"refresh": _flag(refresh), "nocleanup": _flag(nocleanup)}
+        if coord_scope:
+            params["coord-scope"] = coord_scope
+        if date_scope:
+            params["date-scope"] = date_scope
+        return params
+
+    def _put_action(
+        self,
+        job_id: str,
+        action: str,
+        conf: Optional[Dict[str, str]] = None,
+        params: Optional[Dict[str, str]] = None,
+    ) -> Dict[str, Any]:
+        url, q, body = _action_request(self.base_url, job_id, action, conf, params)
+        with observe_oozie(self.base_url, action):
+            r = self.session.put(url, params=q, data=body, headers=ACTION_HEADERS, timeout=self.timeout)
+            r.raise_for_status()
+        return _action_response(r)
+
     def rerun(self, job_id: str, conf: Optional[Dict[str, str]] = None, params: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
-        if params and "action" in params:
-            raise ValueError("params cannot contain reserved key 'action'")
+        return self._put_action(job_id, "rerun", conf=conf, params=params)
+
+    def rerun_coordinator(
+        self,
+        job_id: str,
+        rerun_type: str,
+        scope: str,
+        refresh: bool = False,
+        failed: bool = False,
+        nocleanup: bool = True,
+        conf: Optional[Dict[str, str]] = None,
+    ) -> Dict[str, Any]:
+        params = self.coordinator_rerun_params(rerun_type, scope, refresh=refresh, failed=failed, nocleanup=nocleanup)
+        return self._put_action(job_id, "coord-rerun", conf=conf, params=params)
 
+    def rerun_bundle(
+        self,
+        job_id: str,
+        coord_scope: str = "",
+        date_scope: str = "",
+        refresh: bool = False,
+        nocleanup: bool = True,
+        conf: Optional[Dict[str, str]] = None,
+    ) -> Dict[str, Any]:
+        params = self.bundle_rerun_params(coord_scope, date_scope, refresh=refresh, nocleanup=nocleanup)
+        return self._put_action(job_id, "bundle-rerun", conf=conf, params=params)
+
+
+ACTION_HEADERS = {"Content-Type": "application/xml"}
+
+
+def _action_request(
+    base_url: str,
+    job_id: str,
+    action: str,
+    conf: Optional[Dict[str, str]] = None,
+    params: Optional[Dict[str, str]] = None,
+) -> Tuple[str, Dict[str, str], bytes]:
+    if params and "action" in params:
+        raise ValueError("params cannot contain reserved key 'action'")
+
+    url = f"{base_url}/v2/job/{job_id}"
+    q = {"action": action}
+    if params:
+        q.update(params)
+    body = ""
+    if conf:
+        props = "".join(
+            [
+                f"<property><name>{escape(str(k))}</name><value>{escape(str(v))}</value></property>"
+                for k, v in conf.items()
+            ]
+        )
+        body = f"<configuration>{props}</configuration>"
+    return url, q, body.encode("utf-8")
+
+
+def _action_response(r) -> Dict[str, Any]:
+    try:
+        return r.json()
+    except Exception:
+        return {"status": "submitted"}
+
+
+class AsyncOozieClient:
+    """Non-blocking counterpart of OozieClient for use on an event loop."""
+
+    def __init__(self, base_url: str, pool_maxsize: Optional[int] = None):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = settings.oozie_http_timeout
+        size = max(1, pool_maxsize or settings.oozie_pool_maxsize)
+        self.requests = 0
+        self.connections = 0
+        self.client = httpx.AsyncClient(
+            timeout=self.timeout,
+            limits=httpx.Limits(max_connections=size, max_keepalive_connections=size),
+            event_hooks={"request": [self._count_request]},
+        )
+
+    async def _count_request(self, request: httpx.Request) -> None:
+        self.requests += 1
+        request.extensions["trace"] = self._trace
+
+    async def _trace(self, event: str, info: Dict[str, Any]) -> None:
+        if event == "connection.connect_tcp.complete":
+            self.connections += 1
+
+    def pool_stats(self) -> Dict[str, int]:
+        return {
+            "requests": self.requests,
+            "connections_opened": self.connections,
+            "connections_reused": max(0, self.requests - self.connections),
+        }
+
+    async def job_info(self, job_id: str) -> Dict[str, Any]:
         url = f"{self.base_url}/v2/job/{job_id}"
-        q = {"action": "rerun"}
-        if params:
-            q.update(params)
-        headers = {"Content-Type": "application/xml"}
-        body = ""
-        if conf:
-            props = "".join(
-                [
-                    f"<property><name>{escape(str(k))}</name><value>{escape(str(v))}</value></property>"
-                    for k, v in conf.items()
-                ]
-            )
-            body = f"<configuration>{props}</configuration>"
-        r = self.session.put(url, params=q, data=body.encode("utf-8"), headers=headers, timeout=self.timeout)
-        r.raise_for_status()
-        try:
-            return r.json()
-        except Exception:
-            return {"status": "submitted"}
+        with observe_oozie(self.base_url, "job_info"):
+            r = await self.client.get(url, params={"show": "info"})
+            r.raise_for_status()
+        return r.json()
+
+    async def _put_action(
+        self,
+        job_id: str,
+        action: str,
+        conf: Optional[Dict[str, str]] = None,
+        params: Optional[Dict[str, str]] = None,
+    ) -> Dict[str, Any]:
+        url, q, body = _action_request(self.base_url, job_id, action, conf, params)
+        with observe_oozie(self.base_url, action):
+            r = await self.client.put(url, params=q, content=body, headers=ACTION_HEADERS)
+            r.raise_for_status()
+        return _action_response(r)
+
+    async def rerun(
+        self, job_id: str, conf: Optional[Dict[str, str]] = None, params: Optional[Dict[str, str]] = None
+    ) -> Dict[str, Any]:
+        return await self._put_action(job_id, "rerun", conf=conf, params=params)
+
+    async def rerun_coordinator(
+        self,
+        job_id: str,
+        rerun_type: str,
+        scope: str,
+        refresh: bool = False,
+        failed: bool = False,
+        nocleanup: bool = True,
+        conf: Optional[Dict[str, str]] = None,
+    ) -> Dict[str, Any]:
+        params = OozieClient.coordinator_rerun_params(rerun_type, scope, refresh=refresh, failed=failed, nocleanup=nocleanup)
+        return await self._put_action(job_id, "coord-rerun", conf=conf, params=params)
+
+    async def rerun_bundle(
+        self,
+        job_id: str,
+        coord_scope: str = "",
+        date_scope: str = "",
+        refresh: bool = False,
+        nocleanup: bool = True,
+        conf: Optional[Dict[str, str]] = None,
+    ) -> Dict[str, Any]:
+        params = OozieClient.bundle_rerun_params(coord_scope, date_scope, refresh=refresh, nocleanup=nocleanup)
+        return await self._put_action(job_id, "bundle-rerun", conf=conf, params=params)
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+
+class _ClientRegistry:
+    """Process-wide client cache keyed by Oozie URL.
+
+    Clients keep their keep-alive connection pools across reruns and job
+    lookups, so repeated calls to the same server skip the TCP/TLS (and
+    SPNEGO) handshake. Clients unused for ``idle_seconds`` are closed.
+    """
+
+    client_class: Any = None
+
+    def __init__(self, pool_maxsize: int, idle_seconds: int):
+        self.pool_maxsize = max(1, pool_maxsize)
+        # Never evict a client that may still be serving an in-flight request.
+        self.idle_seconds = max(idle_seconds, 2 * settings.oozie_http_timeout)
+        self._clients: Dict[str, Any] = {}
+        self._last_used: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def configure(self, pool_maxsize: Optional[int] = None, idle_seconds: Optional[int] = None) -> None:
+        with self._lock:
+            if pool_maxsize is not None:
+                self.pool_maxsize = max(1, pool_maxsize)
+            if idle_seconds is not None:
+                self.idle_seconds = max(idle_seconds, 2 * settings.oozie_http_timeout)
+
+    def get(self, base_url: str) -> Any:
+        key = base_url.strip().rstrip("/")
+        stale = []
+        with self._lock:
+            ts = time.monotonic()
+            for url, last_used in list(self._last_used.items()):
+                if url != key and ts - last_used > self.idle_seconds:
+                    stale.append(self._clients.pop(url))
+                    del self._last_used[url]
+                    self.evictions += 1
+
+            client = self._clients.get(key)
+            if client is None:
+                self.misses += 1
+                client = self.client_class(key, pool_maxsize=self.pool_maxsize)
+                self._clients[key] = client
+            else:
+                self.hits += 1
+            self._last_used[key] = ts
+
+        if stale:
+            self._retire(stale)
+        return client
+
+    def _retire(self, clients: List[Any]) -> None:
+        raise NotImplementedError
+
+    def _take_all(self) -> List[Any]:
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+            self._last_used.clear()
+        return clients
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            clients = dict(self._clients)
+            summary: Dict[str, Any] = {
+                "clients": len(clients),
+                "pool_maxsize": self.pool_maxsize,
+                "idle_seconds": self.idle_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+        summary["hosts"] = {url: client.pool_stats() for url, client in clients.items()}
+        return summary
+
+
+class OozieClientRegistry(_ClientRegistry):
+    client_class = OozieClient
+
+    def _retire(self, clients: List[OozieClient]) -> None:
+        for client in clients:
+            client.close()
+
+    def close(self) -> None:
+        self._retire(self._take_all())
+
+
+class AsyncOozieClientRegistry(_ClientRegistry):
+    """:class:`OozieClientRegistry` for :class:`AsyncOozieClient`; used from one event loop."""
+
+    client_class = AsyncOozieClient
+
+    def __init__(self, pool_maxsize: int, idle_seconds: int):
+        super().__init__(pool_maxsize, idle_seconds)
+        self._closing: Set[asyncio.Task] = set()
+
+    def _retire(self, clients: List[AsyncOozieClient]) -> None:
+        # get() is synchronous; evicted clients are closed in the background.
+        for client in clients:
+            task = asyncio.get_running_loop().create_task(client.aclose())
+            self._closing.add(task)
+            task.add_done_callback(self._closing.discard)
+
+    async def aclose(self) -> None:
+        for client in self._take_all():
+            try:
+                await client.aclose()
+            except Exception:
+                pass
+
+
+registry = OozieClientRegistry(settings.oozie_pool_maxsize, settings.oozie_pool_idle_seconds)
+
+
+def get_client(base_url: str) -> OozieClient:
+    return registry.get(base_url)
+
+
+async_registry = AsyncOozieClientRegistry(settings.oozie_pool_maxsize, settings.oozie_pool_idle_seconds)
+
+
+def get_async_client(base_url: str) -> AsyncOozieClient:
+    return async_registry.get(base_url)
+
+
+async def close_async_clients() -> None:
+    await async_registry.aclose()
@@ -0,0 +1,90 @@
+import json
+import logging
+from typing import Any, Dict
+
+from redis import asyncio as aioredis
+
+from .cache import SingleFlight, TTLCache
+from .oozie import get_async_client
+from .settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class JobInfoCache:
+    """Short-lived cache in front of Oozie job lookups.
+
+    Concurrent requests for the same job share one upstream call, results
+    are kept in process for ``OOZIE_JOB_CACHE_TTL`` seconds and, when
+    ``OOZIE_JOB_CACHE_REDIS`` is enabled, shared with other API processes.
+    """
+
+    def __init__(self):
+        self.local = TTLCache(settings.oozie_job_cache_maxsize, settings.oozie_job_cache_ttl)
+        self.flight = SingleFlight()
+        self.redis = None
+        self.redis_hits = 0
+        self.upstream_calls = 0
+        self.upstream_errors = 0
+
+    def _redis(self):
+        if self.redis is None:
+            self.redis = aioredis.from_url(settings.redis_url, decode_responses=True)
+        return self.redis
+
+    async def get(self, oozie_url: str, job_id: str) -> Dict[str, Any]:
+        key = f"{oozie_url.rstrip('/')}|{job_id}"
+        cached = self.local.get(key)
+        if cached is not None:
+            return cached
+        return await self.flight.do(key, lambda: self._load(oozie_url, job_id, key))
+
+    async def _load(self, oozie_url: str, job_id: str, key: str) -> Dict[str, Any]:
+        redis_key = f"{settings.redis_channel}:jobinfo:{key}"
+        if settings.oozie_job_cache_redis:
+            try:
+                raw = await self._redis().get(redis_key)
+                if raw:
+                    info = json.loads(raw)
+                    self.redis_hits += 1
+                    self.local.set(key, info)
+                    return info
+            except Exception as exc:
+                logger.warning("job info cache read failed: %s", exc.__class__.__name__)
+
+        self.upstream_calls += 1
+        try:
+            info = await get_async_client(oozie_url).job_info(job_id)
+        except Exception:
+            self.upstream_errors += 1
+            raise
+        self.local.set(key, info)
+
+        if settings.oozie_job_cache_redis:
+            try:
+                ttl_ms = max(1, int(settings.oozie_job_cache_ttl * 1000))
+                await self._redis().set(redis_key, json.dumps(info, default=str), px=ttl_ms)
+            except Exception as exc:
+                logger.warning("job info cache write failed: %s", exc.__class__.__name__)
+        return info
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "local": self.local.stats(),
+            "single_flight": self.flight.stats(),
+            "redis_enabled": settings.oozie_job_cache_redis,
+            "redis_hits": self.redis_hits,
+            "upstream_calls": self.upstream_calls,
+            "upstream_errors": self.upstream_errors,
+        }
+
+    async def close(self) -> None:
+        if self.redis is not None:
+            try:
+                await self.redis.close()
+            except Exception:
+                pass
+            self.redis = None
+
+
+job_info_cache = JobInfoCache()
@@ -0,0 +1,90 @@
+import zlib
+from datetime import datetime
+from typing import Dict, Iterable
+
+from sqlalchemy.orm import Session
+
+from . import models
+
+CODEC = "zlib"
+# Output copied verbatim from the old tasks.stdout/stderr columns by
+# scripts/migrations/001_task_outputs.sql.
+UNCOMPRESSED = "none"
+
+
+def compress_text(text: str) -> bytes:
+    return zlib.compress((text or "").encode("utf-8"), 6)
+
+
+def decompress_text(codec: str, data: bytes) -> str:
+    if not data:
+        return ""
+    if codec == UNCOMPRESSED:
+        return data.decode("utf-8", errors="replace")
+    if codec != CODEC:
+        raise ValueError(f"unsupported task output codec: {codec}")
+    return zlib.decompress(data).decode("utf-8", errors="replace")
+
+
+def save_task_output(db: Session, task_id: int, stdout: str, stderr: str, members: Iterable[int] = ()) -> None:
+    """Stage the output of a task attempt; the caller commits.
+
+    For a batched rerun, ``task_id`` is the batch leader and holds the one
+    output; ``members`` drop their own and read it through ``tasks.batch_id``.
+    """
+    member_ids = [m for m in members if m != task_id]
+    if member_ids:
+        db.query(models.TaskOutput).filter(models.TaskOutput.task_id.in_(member_ids)).delete(synchronize_session=False)
+    if not stdout and not stderr:
+        clear_task_output(db, task_id)
+        return
+    db.merge(
+        models.TaskOutput(
+            task_id=task_id,
+            codec=CODEC,
+            stdout=compress_text(stdout),
+            stderr=compress_text(stderr),
+            stdout_size=len(stdout or ""),
+            stderr_size=len(stderr or ""),
+            updated_at=datetime.utcnow(),
+        )
+    )
+
+
+def clear_task_output(db: Session, task_id: int) -> None:
+    db.query(models.TaskOutput).filter(models.TaskOutput.task_id == task_id).delete(synchronize_session=False)
+
+
+def release_task_output(db: Session, task: models.Task) -> None:
+    """Drop a task's output before it runs again; the caller commits.
+
+    A batch leader hands the shared output to the next member still in the
+    batch, which then becomes the ``batch_id`` of the others.
+    """
+    if task.batch_id == task.id:
+        members = [
+            row.id
+            for row in db.query(models.Task.id)
+            .filter(models.Task.batch_id == task.id, models.Task.id != task.id)
+            .order_by(models.Task.id.asc())
+        ]
+        if members:
+            db.query(models.TaskOutput).filter(models.TaskOutput.task_id == task.id).update(
+                {models.TaskOutput.task_id: members[0]}, synchronize_session=False
+            )
+            db.query(models.Task).filter(models.Task.id.in_(members)).update(
+                {models.Task.batch_id: members[0]}, synchronize_session=False
+            )
+            return
+    clear_task_output(db, task.id)
+
+
+def load_task_output(db: Session, task: models.Task) -> Dict[str, str]:
+    # Members of a batched rerun share the output stored under the leader.
+    row = db.get(models.TaskOutput, task.batch_id or task.id)
+    if row is None:
+        return {"stdout": "", "stderr": ""}
+    return {
+        "stdout": decompress_text(row.codec, row.stdout),
+        "stderr": decompress_text(row.codec, row.stderr),
+    }
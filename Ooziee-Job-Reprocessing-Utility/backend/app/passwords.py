@@ -0,0 +1,99 @@
+import asyncio
+import logging
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from typing import Any, Callable, Optional, Tuple
+
+from fastapi import HTTPException
+from passlib.context import CryptContext
+
+from .metrics import PASSWORD_HASH, PASSWORD_HASH_QUEUE_WAIT, PASSWORD_HASH_REJECTED
+from .settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=4)
+def _context(rounds: int) -> CryptContext:
+    # Hashes made with a different cost verify fine but are flagged for rehash.
+    return CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds)
+
+
+def hash_with(password: str, rounds: int) -> str:
+    return _context(rounds).hash(password)
+
+
+def verify_and_update_with(password: str, password_hash: str, rounds: int) -> Tuple[bool, Optional[str]]:
+    return _context(rounds).verify_and_update(password, password_hash)
+
+
+class PasswordHasher:
+    """Runs bcrypt off the event loop and the request threadpool.
+
+    Work goes to a process pool of ``PASSWORD_HASH_WORKERS`` processes (``0``
+    uses the default thread executor). At most ``PASSWORD_HASH_CONCURRENCY``
+    calls are handed to it at once; callers wait up to
+    ``PASSWORD_HASH_QUEUE_TIMEOUT`` seconds for a slot and then get a 503, so
+    a login storm queues here instead of starving other endpoints.
+    """
+
+    def __init__(self):
+        self.pool: Optional[ProcessPoolExecutor] = None
+        self.semaphore: Optional[asyncio.Semaphore] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _executor(self) -> Optional[Executor]:
+        if settings.password_hash_workers <= 0:
+            return None
+        if self.pool is None:
+            # spawn: forking a process that already runs threads is unsafe.
+            self.pool = ProcessPoolExecutor(
+                max_workers=settings.password_hash_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self.pool
+
+    def _slots(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self.semaphore is None or self.loop is not loop:
+            self.semaphore = asyncio.Semaphore(max(1, settings.password_hash_concurrency))
+            self.loop = loop
+        return self.semaphore
+
+    async def _run(self, operation: str, fn: Callable[..., Any], *args: Any) -> Any:
+        slots = self._slots()
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(slots.acquire(), settings.password_hash_queue_timeout)
+        except asyncio.TimeoutError:
+            PASSWORD_HASH_REJECTED.labels(operation).inc()
+            raise HTTPException(status_code=503, detail="Too many concurrent logins, retry shortly", headers={"Retry-After": "1"})
+        queued = time.perf_counter()
+        PASSWORD_HASH_QUEUE_WAIT.observe(queued - start)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor(), fn, *args)
+        except BrokenProcessPool:
+            logger.warning("password hash pool broke; restarting it")
+            self.pool = None
+            raise HTTPException(status_code=503, detail="Password hashing unavailable, retry shortly")
+        finally:
+            slots.release()
+            PASSWORD_HASH.labels(operation).observe(time.perf_counter() - queued)
+
+    async def hash(self, password: str) -> str:
+        return await self._run("hash", hash_with, password, settings.bcrypt_rounds)
+
+    async def verify_and_update(self, password: str, password_hash: str) -> Tuple[bool, Optional[str]]:
+        """Returns ``(valid, new_hash)``; ``new_hash`` is set when the stored
+        hash should be replaced (e.g. ``BCRYPT_ROUNDS`` changed)."""
+        return await self._run("verify", verify_and_update_with, password, password_hash, settings.bcrypt_rounds)
+
+    def close(self) -> None:
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
+
+
+hasher = PasswordHasher()
@@ -0,0 +1,119 @@
+import asyncio
+import json
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+from redis import asyncio as aioredis
+
+from . import models
+from .cache import TTLCache
+from .events import auth_channel, writer as event_writer
+from .metrics import AUTH_PRINCIPAL_LOOKUPS
+from .settings import settings
+
+logger = logging.getLogger(__name__)
+
+PrincipalKey = Tuple[str, Any]
+
+
+class PrincipalCache:
+    """Short-lived cache of resolved users keyed by token ``(sub, iat)``.
+
+    Entries are detached snapshots of the ``users`` row, so cached requests
+    skip the DB lookup. Changes to a user drop its entries here and, through
+    the Redis auth channel, in every other API process; ``AUTH_CACHE_TTL``
+    bounds staleness if an invalidation is ever missed.
+    """
+
+    def __init__(self):
+        self.local = TTLCache(settings.auth_cache_maxsize, settings.auth_cache_ttl)
+        self.generation = 0
+        self.task: Optional[asyncio.Task] = None
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return settings.auth_cache_ttl > 0
+
+    def get(self, key: PrincipalKey) -> Optional[models.User]:
+        if not self.enabled:
+            return None
+        user = self.local.get(key)
+        AUTH_PRINCIPAL_LOOKUPS.labels("hit" if user is not None else "miss").inc()
+        return user
+
+    def put(self, key: PrincipalKey, user: models.User, generation: int) -> None:
+        # A lookup that raced with an invalidation may hold the old row.
+        if self.enabled and generation == self.generation:
+            self.local.set(key, snapshot(user))
+
+    def invalidate(self, username: str) -> None:
+        self.generation += 1
+        self.invalidations += 1
+        self.local.invalidate_where(lambda key: key[0] == username)
+
+    def notify(self, username: str) -> None:
+        """Invalidate ``username`` here and in every other API process."""
+        self.invalidate(username)
+        event_writer.submit(json.dumps({"event": "user_changed", "username": username}), [auth_channel()], None)
+
+    def handle(self, data: str) -> None:
+        try:
+            username = json.loads(data)["username"]
+        except (ValueError, KeyError, TypeError):
+            return
+        self.invalidate(str(username))
+
+    async def start(self) -> None:
+        if not self.enabled or (self.task and not self.task.done()):
+            return
+        self.task = asyncio.create_task(self._listen())
+
+    async def _listen(self) -> None:
+        while True:
+            client = aioredis.from_url(settings.redis_url, decode_responses=True)
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(auth_channel())
+                # Anything published while we were not subscribed is lost.
+                self.local.clear()
+                async for msg in pubsub.listen():
+                    if msg and msg.get("type") == "message":
+                        self.handle(msg.get("data") or "")
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.warning("auth invalidation listener disconnected: %s", exc.__class__.__name__)
+            finally:
+                try:
+                    await pubsub.close()
+                    await client.close()
+                except Exception:
+                    pass
+            self.local.clear()
+            await asyncio.sleep(2)
+
+    async def stop(self) -> None:
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+        self.task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.local.stats(), "enabled": self.enabled, "invalidations": self.invalidations}
+
+
+def snapshot(user: models.User) -> models.User:
+    return models.User(
+        id=user.id,
+        username=user.username,
+        role=user.role,
+        is_active=user.is_active,
+        created_at=user.created_at,
+    )
+
+
+principal_cache = PrincipalCache()
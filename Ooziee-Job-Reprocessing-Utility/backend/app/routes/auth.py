@@ -1,35 +1,85 @@
+from typing import Optional
+
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from ..db import get_db
+from ..db import get_async_db, get_db
 from .. import models, schemas
-from ..auth import verify_password, create_access_token, hash_password, require_role, get_current_user
+from ..auth import create_access_token, require_role, get_current_user
+from ..passwords import hasher
+from ..principals import principal_cache
 
 router = APIRouter(prefix="/api/auth", tags=["auth"])
 
+def _find_user(db: Session, username: str):
+    return db.query(models.User).filter(models.User.username == username).first()
+
 @router.post("/login", response_model=schemas.TokenResponse)
-def login(body: schemas.LoginRequest, db: Session = Depends(get_db)):
-    user = db.query(models.User).filter(models.User.username == body.username.strip()).first()
-    if not user or not user.is_active:
+async def login(body: schemas.LoginRequest, db: AsyncSession = Depends(get_async_db)):
+    # bcrypt runs in the hash pool and the DB calls are async: no threadpool slot is held.
+    row = (
+        await db.execute(
+            select(models.User.id, models.User.username, models.User.role, models.User.is_active, models.User.password_hash)
+            .filter(models.User.username == body.username.strip())
+        )
+    ).first()
+    # Give the connection back before a possibly long wait for the hash pool.
+    await db.rollback()
+    if not row or not row.is_active:
         raise HTTPException(status_code=401, detail="Invalid credentials")
-    if not verify_password(body.password, user.password_hash):
+    valid, new_hash = await hasher.verify_and_update(body.password, row.password_hash)
+    if not valid:
         raise HTTPException(status_code=401, detail="Invalid credentials")
-    token = create_access_token(user.username, user.role)
-    return schemas.TokenResponse(access_token=token, role=user.role)
+    if new_hash:
+        await db.execute(update(models.User).where(models.User.id == row.id).values(password_hash=new_hash))
+        await db.commit()
+    token = create_access_token(row.username, row.role)
+    return schemas.TokenResponse(access_token=token, role=row.role)
 
 @router.get("/me", response_model=schemas.UserOut)
 def me(user=Depends(get_current_user)):
     return user
 
-@router.post("/users", response_model=schemas.UserOut)
-def create_user(body: schemas.UserCreate, db: Session = Depends(get_db), _=Depends(require_role("admin"))):
-    if db.query(models.User).filter(models.User.username == body.username).first():
+def _insert_user(db: Session, body: schemas.UserCreate, password_hash: str) -> models.User:
+    if _find_user(db, body.username):
         raise HTTPException(status_code=409, detail="username already exists")
-    u = models.User(username=body.username, password_hash=hash_password(body.password), role=body.role, is_active=True)
+    u = models.User(username=body.username, password_hash=password_hash, role=body.role, is_active=True)
     db.add(u)
     db.commit()
     db.refresh(u)
     return u
 
+@router.post("/users", response_model=schemas.UserOut)
+async def create_user(body: schemas.UserCreate, db: Session = Depends(get_db), _=Depends(require_role("admin"))):
+    password_hash = await hasher.hash(body.password)
+    u = await run_in_threadpool(_insert_user, db, body, password_hash)
+    principal_cache.notify(u.username)
+    return u
+
+def _update_user(db: Session, user_id: int, body: schemas.UserUpdate, password_hash: Optional[str]) -> models.User:
+    u = db.query(models.User).filter(models.User.id == user_id).first()
+    if not u:
+        raise HTTPException(status_code=404, detail="user not found")
+    if body.role is not None:
+        u.role = body.role
+    if body.is_active is not None:
+        u.is_active = body.is_active
+    if password_hash is not None:
+        u.password_hash = password_hash
+    db.commit()
+    db.refresh(u)
+    return u
+
+@router.patch("/users/{user_id}", response_model=schemas.UserOut)
+async def update_user(user_id: int, body: schemas.UserUpdate, db: Session = Depends(get_db), _=Depends(require_role("admin"))):
+    password_hash = await hasher.hash(body.password) if body.password is not None else None
+    u = await run_in_threadpool(_update_user, db, user_id, body, password_hash)
+    # Outstanding tokens must see the new role/state on their next request.
+    principal_cache.notify(u.username)
+    return u
+
 @router.get("/users", response_model=list[schemas.UserOut])
-def list_users(db: Session = Depends(get_db), _=Depends(require_role("admin"))):
-    return db.query(models.User).order_by(models.User.id.desc()).all()
+async def list_users(db: AsyncSession = Depends(get_async_db), _=Depends(require_role("admin"))):
+    return (await db.scalars(select(models.User).order_by(models.User.id.desc()))).all()
@@ -1,20 +1,48 @@
+import httpx
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from ..db import get_db
 from .. import models
-from ..auth import get_current_user
+from ..auth import get_current_user, require_role
 from ..settings import settings
-from ..oozie import OozieClient
+from ..limiter import limiter
+from ..oozie import async_registry, registry
+from ..oozie_cache import job_info_cache
 
 router = APIRouter(prefix="/api/oozie", tags=["oozie"])
 
-@router.get("/job/{job_id}")
-def job_info(job_id: str, plan_id: int, db: Session = Depends(get_db), _=Depends(get_current_user)):
+def _plan_oozie_url(db: Session, plan_id: int) -> str:
     p = db.query(models.Plan).filter(models.Plan.id == plan_id).first()
     if not p:
         raise HTTPException(status_code=404, detail="plan not found")
     oozie_url = (p.oozie_url or settings.oozie_default_url).strip()
     if not oozie_url:
         raise HTTPException(status_code=400, detail="oozie_url not configured for plan")
-    client = OozieClient(oozie_url)
-    return client.job_info(job_id)
+    return oozie_url
+
+@router.get("/job/{job_id}")
+async def job_info(job_id: str, plan_id: int, db: Session = Depends(get_db), _=Depends(get_current_user)):
+    oozie_url = await run_in_threadpool(_plan_oozie_url, db, plan_id)
+    try:
+        return await job_info_cache.get(oozie_url, job_id)
+    except httpx.HTTPStatusError as exc:
+        raise HTTPException(status_code=502, detail=f"oozie returned HTTP {exc.response.status_code}")
+    except httpx.HTTPError as exc:
+        raise HTTPException(status_code=502, detail=f"oozie request failed: {exc.__class__.__name__}")
+
+@router.get("/cache")
+def cache_stats(_=Depends(require_role("admin"))):
+    return job_info_cache.stats()
+
+@router.get("/pool")
+def pool_stats(_=Depends(require_role("admin"))):
+    # The API looks jobs up with async clients; sync clients serve anything else in-process.
+    return {"async": async_registry.stats(), "sync": registry.stats()}
+
+@router.get("/limits")
+def limit_stats(_=Depends(require_role("admin"))):
+    try:
+        return limiter.stats()
+    except Exception as exc:
+        raise HTTPException(status_code=503, detail=f"limiter state unavailable: {exc.__class__.__name__}")
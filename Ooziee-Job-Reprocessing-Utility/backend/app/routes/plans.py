@@ -1,10 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException
+import codecs
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from datetime import datetime
-from ..db import get_db
+from typing import AsyncIterator, List, Optional
+from ..db import get_async_db, get_db
 from .. import models, schemas
 from ..auth import get_current_user, require_role
-from ..events import publish_event
+from ..events import current_seq, publish_event
+from ..imports import FORMATS, TaskImporter, insert_tasks
+from ..settings import settings
 
 router = APIRouter(prefix="/api/plans", tags=["plans"])
 
@@ -27,51 +34,200 @@ def create_plan(body: schemas.PlanCreate, db: Session = Depends(get_db), user=De
         oozie_url=body.oozie_url or "",
         use_rest=body.use_rest,
         max_concurrency=body.max_concurrency,
+        coord_batch_size=body.coord_batch_size,
+        track_outcome=body.track_outcome,
+        priority=body.priority,
+        weight=body.weight,
         created_by=user.username,
         created_at=datetime.utcnow(),
         updated_at=datetime.utcnow(),
     )
     db.add(p)
     db.flush()
-    for t in body.tasks:
-        task = models.Task(
-            plan_id=p.id,
-            name=t.name,
-            type=t.type,
-            job_id=t.job_id,
-            action=t.action or "",
-            date=t.date or "",
-            coordinator=t.coordinator or "",
-            wf_failnodes=bool(t.wf_failnodes),
-            wf_skip_nodes=t.wf_skip_nodes or "",
-            refresh=bool(t.refresh),
-            failed=bool(t.failed),
-            extra_props=t.extra_props or {},
-            status="PENDING",
-            attempt=0,
-        )
-        db.add(task)
+    insert_tasks(db, p.id, body.tasks)
     db.commit()
     db.refresh(p)
-    publish_event({"event":"plan_created","plan_id":p.id})
+    publish_event({"event":"plan_created","plan_id":p.id,"plan":schemas.PlanOut.model_validate(p).model_dump()})
     return p
 
-@router.get("", response_model=list[schemas.PlanOut])
-def list_plans(db: Session = Depends(get_db), _=Depends(get_current_user)):
-    return db.query(models.Plan).order_by(models.Plan.id.desc()).all()
+TASK_FIELDS = set(schemas.TaskOut.model_fields)
 
-@router.get("/{plan_id}", response_model=schemas.PlanDetail)
-def get_plan(plan_id: int, db: Session = Depends(get_db), _=Depends(get_current_user)):
+
+def _get_plan_or_404(db: Session, plan_id: int) -> models.Plan:
     p = db.query(models.Plan).filter(models.Plan.id == plan_id).first()
     if not p:
         raise HTTPException(status_code=404, detail="plan not found")
-    tasks = db.query(models.Task).filter(models.Task.plan_id == plan_id).order_by(models.Task.id.asc()).all()
-    return schemas.PlanDetail(plan=p, tasks=tasks)
+    return p
 
-def _set_plan_status(db: Session, plan_id: int, status: str):
-    p = db.query(models.Plan).filter(models.Plan.id == plan_id).first()
+async def _load_plan_or_404(db: AsyncSession, plan_id: int) -> models.Plan:
+    p = await db.get(models.Plan, plan_id)
     if not p:
         raise HTTPException(status_code=404, detail="plan not found")
+    return p
+
+def _filter_tasks(query, plan_id: int, status: Optional[List[str]], task_type: Optional[str], job_id: Optional[str], after_id: Optional[int]):
+    query = query.filter(models.Task.plan_id == plan_id)
+    if status:
+        query = query.filter(models.Task.status.in_([s.upper() for s in status]))
+    if task_type:
+        query = query.filter(models.Task.type == task_type)
+    if job_id:
+        query = query.filter(models.Task.job_id == job_id)
+    if after_id is not None:
+        query = query.filter(models.Task.id > after_id)
+    return query.order_by(models.Task.id.asc())
+
+def _next_cursor(rows: list, limit: int, key):
+    # One extra row is fetched to tell whether another page exists.
+    if len(rows) > limit:
+        del rows[limit:]
+        return key(rows[-1])
+    return None
+
+@router.get("", response_model=schemas.PlanPage)
+async def list_plans(
+    limit: int = Query(default=100, ge=1, le=500),
+    before_id: Optional[int] = None,
+    status: Optional[List[str]] = Query(default=None),
+    db: AsyncSession = Depends(get_async_db),
+    _=Depends(get_current_user),
+):
+    query = select(models.Plan)
+    if status:
+        query = query.filter(models.Plan.status.in_([s.upper() for s in status]))
+    if before_id is not None:
+        query = query.filter(models.Plan.id < before_id)
+    plans = list((await db.scalars(query.order_by(models.Plan.id.desc()).limit(limit + 1))).all())
+    next_cursor = _next_cursor(plans, limit, lambda p: p.id)
+    return schemas.PlanPage(items=plans, next_cursor=next_cursor)
+
+@router.get("/{plan_id}", response_model=schemas.PlanDetail)
+async def get_plan(
+    plan_id: int,
+    status: Optional[List[str]] = Query(default=None),
+    task_type: Optional[schemas.TaskType] = Query(default=None, alias="type"),
+    job_id: Optional[str] = None,
+    after_id: Optional[int] = None,
+    limit: int = Query(default=500, ge=1, le=5000),
+    db: AsyncSession = Depends(get_async_db),
+    _=Depends(get_current_user),
+):
+    # Read seq before the rows: every event up to it is already reflected below.
+    seq = await current_seq(plan_id)
+    p = await _load_plan_or_404(db, plan_id)
+    query = _filter_tasks(select(models.Task), plan_id, status, task_type, job_id, after_id).limit(limit + 1)
+    tasks = list((await db.scalars(query)).all())
+    next_cursor = _next_cursor(tasks, limit, lambda t: t.id)
+    counts = dict(
+        (
+            await db.execute(
+                select(models.Task.status, func.count(models.Task.id))
+                .filter(models.Task.plan_id == plan_id)
+                .group_by(models.Task.status)
+            )
+        ).all()
+    )
+    return schemas.PlanDetail(plan=p, tasks=tasks, counts=counts, next_cursor=next_cursor, seq=seq)
+
+@router.get("/{plan_id}/tasks", response_model=schemas.TaskPage)
+async def list_plan_tasks(
+    plan_id: int,
+    status: Optional[List[str]] = Query(default=None),
+    task_type: Optional[schemas.TaskType] = Query(default=None, alias="type"),
+    job_id: Optional[str] = None,
+    after_id: Optional[int] = None,
+    limit: int = Query(default=500, ge=1, le=5000),
+    fields: Optional[str] = Query(default=None, description="Comma-separated TaskOut fields to return"),
+    db: AsyncSession = Depends(get_async_db),
+    _=Depends(get_current_user),
+):
+    await _load_plan_or_404(db, plan_id)
+    selected = [f.strip() for f in (fields or "").split(",") if f.strip()] or sorted(TASK_FIELDS)
+    unknown = set(selected) - TASK_FIELDS
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"unknown task fields: {', '.join(sorted(unknown))}")
+    if "id" not in selected:
+        selected.insert(0, "id")
+    columns = [getattr(models.Task, f) for f in selected]
+    query = _filter_tasks(select(*columns), plan_id, status, task_type, job_id, after_id).limit(limit + 1)
+    rows = list((await db.execute(query)).all())
+    next_cursor = _next_cursor(rows, limit, lambda r: r.id)
+    return schemas.TaskPage(items=[dict(r._mapping) for r in rows], next_cursor=next_cursor)
+
+async def _iter_lines(request: Request) -> AsyncIterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    pending = ""
+    async for chunk in request.stream():
+        try:
+            pending += decoder.decode(chunk)
+        except UnicodeDecodeError:
+            raise HTTPException(status_code=400, detail="import body must be UTF-8")
+        lines = pending.split("\n")
+        pending = lines.pop()
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+def _import_format(request: Request, fmt: Optional[str]) -> str:
+    if fmt:
+        fmt = fmt.lower()
+    else:
+        content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+        fmt = "csv" if content_type in ("text/csv", "application/csv") else "ndjson"
+    if fmt not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(FORMATS)}")
+    return fmt
+
+@router.post("/{plan_id}/tasks/import", response_model=schemas.TaskImportResult)
+async def import_plan_tasks(
+    plan_id: int,
+    request: Request,
+    fmt: Optional[str] = Query(default=None, alias="format", description="ndjson or csv; defaults from Content-Type"),
+    dry_run: bool = False,
+    db: Session = Depends(get_db),
+    _=Depends(require_role("admin")),
+):
+    """Stream NDJSON or CSV task rows into a plan.
+
+    The body is read and validated in batches of IMPORT_CHUNK_SIZE rows, so
+    memory stays flat regardless of upload size. Valid rows are inserted and
+    committed per batch; invalid rows are skipped and reported by line number.
+    """
+    fmt = _import_format(request, fmt)
+    plan = await run_in_threadpool(_get_plan_or_404, db, plan_id)
+    importer = TaskImporter(plan_id, fmt, dry_run=dry_run, track_outcome=bool(plan.track_outcome))
+
+    chunk_size = max(1, settings.import_chunk_size)
+    batch = []
+    line_no = 0
+    async for line in _iter_lines(request):
+        line_no += 1
+        if not line.strip():
+            continue
+        if importer.wants_header():
+            try:
+                importer.set_header(line)
+            except ValueError as exc:
+                raise HTTPException(status_code=400, detail=str(exc))
+            continue
+        batch.append((line_no, line))
+        if len(batch) >= chunk_size:
+            await run_in_threadpool(importer.process, db, batch)
+            batch = []
+    if batch:
+        await run_in_threadpool(importer.process, db, batch)
+
+    if importer.inserted:
+        await run_in_threadpool(
+            publish_event,
+            {"event": "plan_tasks_imported", "plan_id": plan_id, "inserted": importer.inserted, "resync": True},
+        )
+    return importer.result()
+
+def _set_plan_status(db: Session, plan_id: int, status: str):
+    p = _get_plan_or_404(db, plan_id)
     allowed = ALLOWED_TRANSITIONS.get(p.status, set())
     if status not in allowed and p.status != status:
         raise HTTPException(
@@ -79,18 +235,28 @@ def _set_plan_status(db: Session, plan_id: int, status: str):
             detail=f"cannot transition plan from {p.status} to {status}",
         )
 
+    requeued = 0
     if status == "RUNNING":
         # Allow restarting a completed/failed/stopped plan by requeueing terminal tasks.
         if p.status in ("STOPPED", "FAILED", "COMPLETED"):
-            db.query(models.Task).filter(
+            requeued = db.query(models.Task).filter(
                 models.Task.plan_id == plan_id,
                 models.Task.status.in_(["FAILED", "CANCELED", "SKIPPED"]),
-            ).update({"status": "PENDING"}, synchronize_session=False)
+            ).update({"status": "PENDING", "batch_id": None}, synchronize_session=False)
 
     p.status = status
     p.updated_at = datetime.utcnow()
     db.commit()
-    publish_event({"event":"plan_status","plan_id":plan_id,"status":status})
+    publish_event(
+        {
+            "event": "plan_status",
+            "plan_id": plan_id,
+            "status": status,
+            "plan": {"id": plan_id, "status": status, "updated_at": p.updated_at},
+            # Bulk task changes are not sent as deltas; clients refetch instead.
+            "resync": bool(requeued),
+        }
+    )
     return p
 
 @router.post("/{plan_id}/start", response_model=schemas.PlanActionResponse)
@@ -111,10 +277,22 @@ def resume_plan(plan_id: int, db: Session = Depends(get_db), _=Depends(require_r
 @router.post("/{plan_id}/stop", response_model=schemas.PlanActionResponse)
 def stop_plan(plan_id: int, db: Session = Depends(get_db), _=Depends(require_role("admin"))):
     p = _set_plan_status(db, plan_id, "STOPPED")
-    db.query(models.Task).filter(
+    canceled = db.query(models.Task).filter(
         models.Task.plan_id == plan_id,
         models.Task.status == "PENDING",
     ).update({"status": "CANCELED"}, synchronize_session=False)
     db.commit()
-    publish_event({"event": "plan_stopped", "plan_id": plan_id})
+    publish_event({"event": "plan_stopped", "plan_id": plan_id, "resync": bool(canceled)})
     return schemas.PlanActionResponse(plan_id=p.id, status=p.status)
+
+@router.patch("/{plan_id}", response_model=schemas.PlanOut)
+def update_plan(plan_id: int, body: schemas.PlanUpdate, db: Session = Depends(get_db), _=Depends(require_role("admin"))):
+    p = _get_plan_or_404(db, plan_id)
+    # Applies to running plans too; workers read these on every scheduling pass.
+    for field, value in body.model_dump(exclude_none=True).items():
+        setattr(p, field, value)
+    p.updated_at = datetime.utcnow()
+    db.commit()
+    db.refresh(p)
+    publish_event({"event": "plan_updated", "plan_id": p.id, "plan": schemas.PlanOut.model_validate(p).model_dump()})
+    return p
@@ -2,12 +2,34 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from datetime import datetime
 from ..db import get_db
-from .. import models
-from ..auth import require_role
+from .. import models, schemas
+from ..auth import get_current_user, require_role
+from ..claims import lease_expired
 from ..events import publish_event
+from ..outputs import load_task_output, release_task_output
+from ..settings import settings
 
 router = APIRouter(prefix="/api/tasks", tags=["tasks"])
 
+def _held_by_worker(t: models.Task) -> bool:
+    # A RUNNING task whose claim lease expired was left by a dead worker and may be reset.
+    return t.status == "RUNNING" and not lease_expired(t, settings.task_claim_lease_seconds, datetime.utcnow())
+
+@router.get("/{task_id}/output", response_model=schemas.TaskOutputOut)
+def get_task_output(task_id: int, db: Session = Depends(get_db), _=Depends(get_current_user)):
+    t = db.query(models.Task).filter(models.Task.id==task_id).first()
+    if not t:
+        raise HTTPException(status_code=404, detail="task not found")
+    output = load_task_output(db, t)
+    return schemas.TaskOutputOut(
+        task_id=t.id,
+        status=t.status,
+        command=t.command or "",
+        exit_code=t.exit_code,
+        stdout=output["stdout"],
+        stderr=output["stderr"],
+    )
+
 @router.post("/{task_id}/cancel")
 def cancel_task(task_id: int, db: Session = Depends(get_db), _=Depends(require_role("admin"))):
     t = db.query(models.Task).filter(models.Task.id==task_id).first()
@@ -15,12 +37,23 @@ def cancel_task(task_id: int, db: Session = Depends(get_db), _=Depends(require_r
         raise HTTPException(status_code=404, detail="task not found")
     if t.status in ("SUCCESS","FAILED","CANCELED","SKIPPED"):
         return {"status": t.status}
-    if t.status == "RUNNING":
+    if _held_by_worker(t):
         raise HTTPException(status_code=409, detail="running task cannot be canceled directly")
+    prev_status = t.status
     t.status = "CANCELED"
+    t.claimed_by = None
+    t.heartbeat_at = None
     t.ended_at = datetime.utcnow()
     db.commit()
-    publish_event({"event":"task_canceled","plan_id":t.plan_id,"task_id":t.id})
+    publish_event(
+        {
+            "event": "task_canceled",
+            "plan_id": t.plan_id,
+            "task_id": t.id,
+            "prev_status": prev_status,
+            "task": {"id": t.id, "status": t.status, "ended_at": t.ended_at},
+        }
+    )
     return {"status": t.status}
 
 @router.post("/{task_id}/retry")
@@ -28,15 +61,28 @@ def retry_task(task_id: int, db: Session = Depends(get_db), _=Depends(require_ro
     t = db.query(models.Task).filter(models.Task.id==task_id).first()
     if not t:
         raise HTTPException(status_code=404, detail="task not found")
-    if t.status == "RUNNING":
+    if _held_by_worker(t):
         raise HTTPException(status_code=409, detail="running task cannot be retried")
+    prev_status = t.status
     t.status = "PENDING"
-    t.stdout = ""
-    t.stderr = ""
+    release_task_output(db, t)
     t.exit_code = None
     t.started_at = None
     t.ended_at = None
     t.pid = None
+    t.claimed_by = None
+    t.heartbeat_at = None
+    t.batch_id = None
+    t.oozie_status = ""
+    t.submitted_at = None
     db.commit()
-    publish_event({"event":"task_retried","plan_id":t.plan_id,"task_id":t.id})
+    publish_event(
+        {
+            "event": "task_retried",
+            "plan_id": t.plan_id,
+            "task_id": t.id,
+            "prev_status": prev_status,
+            "task": {"id": t.id, "status": t.status, "exit_code": None, "started_at": None, "ended_at": None, "pid": None, "oozie_status": ""},
+        }
+    )
     return {"status": t.status}
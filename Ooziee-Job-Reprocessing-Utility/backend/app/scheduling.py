@@ -0,0 +1,55 @@
+"""Sharing a worker's free slots between running plans.
+
+``allocate`` is pure so the worker's scheduling pass stays testable: it is
+given how many slots are free and what each plan could start, and returns how
+many tasks to claim per plan.
+"""
+import heapq
+from itertools import groupby
+from typing import Dict, List, NamedTuple, Sequence
+
+SCHEDULER_POLICIES = ("fair", "priority")
+
+
+class PlanDemand(NamedTuple):
+    plan_id: int
+    priority: int
+    weight: int
+    running: int  # slots this worker already spends on the plan
+    want: int  # tasks the plan could start now (pending, capped by max_concurrency)
+
+
+def _fill(free: int, demands: Sequence[PlanDemand], alloc: Dict[int, int]) -> int:
+    # Water-filling: each slot goes to the plan with the lowest (running + granted) / weight,
+    # ties to the higher priority, then to the older plan.
+    heap = [(d.running / d.weight, -d.priority, d.plan_id, d) for d in demands if d.want > 0]
+    heapq.heapify(heap)
+    while free > 0 and heap:
+        _, _, _, d = heapq.heappop(heap)
+        alloc[d.plan_id] = alloc.get(d.plan_id, 0) + 1
+        free -= 1
+        if alloc[d.plan_id] < d.want:
+            heapq.heappush(heap, ((d.running + alloc[d.plan_id]) / d.weight, -d.priority, d.plan_id, d))
+    return free
+
+
+def allocate(free: int, demands: Sequence[PlanDemand], policy: str = "fair") -> Dict[int, int]:
+    """Split ``free`` slots between plans.
+
+    ``fair`` gives each plan slots in proportion to its weight, counting what it
+    already runs. ``priority`` serves plans strictly by descending priority and
+    shares by weight only among plans of equal priority.
+    """
+    if policy not in SCHEDULER_POLICIES:
+        raise ValueError(f"unknown scheduler policy: {policy}")
+    alloc: Dict[int, int] = {}
+    if policy == "fair":
+        tiers: List[List[PlanDemand]] = [list(demands)]
+    else:
+        ordered = sorted(demands, key=lambda d: -d.priority)
+        tiers = [list(tier) for _, tier in groupby(ordered, key=lambda d: d.priority)]
+    for tier in tiers:
+        free = _fill(free, tier, alloc)
+        if free <= 0:
+            break
+    return alloc
@@ -3,6 +3,8 @@ from typing import Any, Dict, List, Literal, Optional
 
 from pydantic import BaseModel, Field, ValidationInfo, field_validator, model_validator
 
+from .tracking import TRACKABLE_TYPES, untracked_type_error
+
 
 RoleType = Literal["admin", "viewer"]
 TaskType = Literal["workflow", "coordinator", "bundle"]
@@ -32,6 +34,12 @@ class UserCreate(BaseModel):
         return trimmed
 
 
+class UserUpdate(BaseModel):
+    role: Optional[RoleType] = None
+    is_active: Optional[bool] = None
+    password: Optional[str] = Field(default=None, min_length=8, max_length=256)
+
+
 class UserOut(BaseModel):
     id: int
     username: str
@@ -83,6 +91,10 @@ class PlanCreate(BaseModel):
     oozie_url: Optional[str] = Field(default="", max_length=512)
     use_rest: bool = False
     max_concurrency: int = Field(default=1, ge=1, le=64)
+    coord_batch_size: int = Field(default=1, ge=1, le=1000)
+    track_outcome: bool = False
+    priority: int = Field(default=0, ge=-100, le=100)
+    weight: int = Field(default=1, ge=1, le=1000)
     tasks: List[TaskCreate] = Field(default_factory=list)
 
     @field_validator("name", "description", "oozie_url")
@@ -95,6 +107,20 @@ class PlanCreate(BaseModel):
             raise ValueError("name cannot be empty")
         return trimmed
 
+    @model_validator(mode="after")
+    def validate_tracked_types(self):
+        if self.track_outcome:
+            for t in self.tasks:
+                if t.type not in TRACKABLE_TYPES:
+                    raise ValueError(untracked_type_error(t.type))
+        return self
+
+
+class PlanUpdate(BaseModel):
+    priority: Optional[int] = Field(default=None, ge=-100, le=100)
+    weight: Optional[int] = Field(default=None, ge=1, le=1000)
+    max_concurrency: Optional[int] = Field(default=None, ge=1, le=64)
+
 
 class PlanOut(BaseModel):
     id: int
@@ -104,6 +130,10 @@ class PlanOut(BaseModel):
     oozie_url: str
     use_rest: bool
     max_concurrency: int
+    coord_batch_size: int = 1
+    track_outcome: bool = False
+    priority: int = 0
+    weight: int = 1
     created_by: str
     created_at: datetime
     updated_at: datetime
@@ -128,21 +158,60 @@ class TaskOut(BaseModel):
     extra_props: Dict[str, Any]
     status: str
     attempt: int
+    batch_id: Optional[int] = None
+    oozie_status: Optional[str] = None
     command: str
-    stdout: str
-    stderr: str
     exit_code: Optional[int]
     pid: Optional[int]
+    claimed_by: Optional[str] = None
     started_at: Optional[datetime]
+    submitted_at: Optional[datetime] = None
     ended_at: Optional[datetime]
 
     class Config:
         from_attributes = True
 
 
+class TaskOutputOut(BaseModel):
+    task_id: int
+    status: str
+    command: str
+    exit_code: Optional[int]
+    stdout: str
+    stderr: str
+
+
+class PlanPage(BaseModel):
+    items: List[PlanOut]
+    next_cursor: Optional[int] = None
+
+
 class PlanDetail(BaseModel):
     plan: PlanOut
     tasks: List[TaskOut]
+    counts: Dict[str, int] = Field(default_factory=dict)
+    next_cursor: Optional[int] = None
+    seq: int = 0
+
+
+class TaskPage(BaseModel):
+    items: List[Dict[str, Any]]
+    next_cursor: Optional[int] = None
+
+
+class TaskImportError(BaseModel):
+    row: int
+    error: str
+
+
+class TaskImportResult(BaseModel):
+    plan_id: int
+    dry_run: bool
+    valid: int
+    inserted: int
+    failed: int
+    errors: List[TaskImportError]
+    errors_truncated: bool = False
 
 
 class PlanActionResponse(BaseModel):
@@ -12,6 +12,14 @@ class Settings(BaseSettings):
     jwt_secret: str = Field(default="change-me-in-production", alias="JWT_SECRET")
     jwt_expire_minutes: int = Field(default=720, alias="JWT_EXPIRE_MINUTES")
 
+    auth_cache_ttl: float = Field(default=30.0, alias="AUTH_CACHE_TTL")
+    auth_cache_maxsize: int = Field(default=4096, alias="AUTH_CACHE_MAXSIZE")
+
+    bcrypt_rounds: int = Field(default=12, alias="BCRYPT_ROUNDS")
+    password_hash_workers: int = Field(default=2, alias="PASSWORD_HASH_WORKERS")
+    password_hash_concurrency: int = Field(default=4, alias="PASSWORD_HASH_CONCURRENCY")
+    password_hash_queue_timeout: float = Field(default=5.0, alias="PASSWORD_HASH_QUEUE_TIMEOUT")
+
     redis_url: str = Field(default="redis://127.0.0.1:6379/0", alias="REDIS_URL")
     redis_channel: str = Field(default="oozie_reprocess_events", alias="REDIS_CHANNEL")
 
@@ -19,6 +27,37 @@ class Settings(BaseSettings):
 
     oozie_default_url: str = Field(default="", alias="OOZIE_DEFAULT_URL")
     oozie_http_timeout: int = Field(default=30, alias="OOZIE_HTTP_TIMEOUT")
+    oozie_pool_maxsize: int = Field(default=10, alias="OOZIE_POOL_MAXSIZE")
+    oozie_pool_idle_seconds: int = Field(default=300, alias="OOZIE_POOL_IDLE_SECONDS")
+    oozie_job_cache_ttl: float = Field(default=5.0, alias="OOZIE_JOB_CACHE_TTL")
+    oozie_job_cache_maxsize: int = Field(default=1024, alias="OOZIE_JOB_CACHE_MAXSIZE")
+    oozie_job_cache_redis: bool = Field(default=False, alias="OOZIE_JOB_CACHE_REDIS")
+
+    task_claim_lease_seconds: int = Field(default=120, alias="TASK_CLAIM_LEASE_SECONDS")
+
+    oozie_limit_enabled: bool = Field(default=False, alias="OOZIE_LIMIT_ENABLED")
+    oozie_limit_max_concurrency: int = Field(default=16, alias="OOZIE_LIMIT_MAX_CONCURRENCY")
+    oozie_limit_min_concurrency: int = Field(default=1, alias="OOZIE_LIMIT_MIN_CONCURRENCY")
+    oozie_limit_rate: float = Field(default=5.0, alias="OOZIE_LIMIT_RATE")
+    oozie_limit_burst: int = Field(default=10, alias="OOZIE_LIMIT_BURST")
+    oozie_limit_latency_target: float = Field(default=30.0, alias="OOZIE_LIMIT_LATENCY_TARGET")
+    oozie_limit_decrease: float = Field(default=0.5, alias="OOZIE_LIMIT_DECREASE")
+    oozie_limit_cooldown: float = Field(default=10.0, alias="OOZIE_LIMIT_COOLDOWN")
+
+    event_batch_max: int = Field(default=256, alias="EVENT_BATCH_MAX")
+    event_queue_max: int = Field(default=10000, alias="EVENT_QUEUE_MAX")
+    event_stream_maxlen: int = Field(default=10000, alias="EVENT_STREAM_MAXLEN")
+    event_stream_ttl_seconds: int = Field(default=7 * 24 * 3600, alias="EVENT_STREAM_TTL_SECONDS")
+    event_replay_max: int = Field(default=1000, alias="EVENT_REPLAY_MAX")
+
+    ws_queue_size: int = Field(default=256, alias="WS_QUEUE_SIZE")
+    ws_overflow_policy: str = Field(default="coalesce", alias="WS_OVERFLOW_POLICY")
+    ws_send_timeout: float = Field(default=10.0, alias="WS_SEND_TIMEOUT")
+
+    import_chunk_size: int = Field(default=1000, alias="IMPORT_CHUNK_SIZE")
+    import_max_errors: int = Field(default=100, alias="IMPORT_MAX_ERRORS")
+
+    metrics_enabled: bool = Field(default=True, alias="METRICS_ENABLED")
 
     auto_create_schema: bool = Field(default=False, alias="AUTO_CREATE_SCHEMA")
 
@@ -49,6 +88,22 @@ class Settings(BaseSettings):
             if "charset=utf8mb4" not in db_url_lower:
                 raise RuntimeError("DB_URL for MySQL must include charset=utf8mb4")
 
+        if not 4 <= self.bcrypt_rounds <= 31:
+            raise RuntimeError("BCRYPT_ROUNDS must be between 4 and 31")
+
+        if self.task_claim_lease_seconds < 30:
+            raise RuntimeError("TASK_CLAIM_LEASE_SECONDS must be >= 30")
+
+        if not 1 <= self.oozie_limit_min_concurrency <= self.oozie_limit_max_concurrency:
+            raise RuntimeError("OOZIE_LIMIT_MIN_CONCURRENCY must be between 1 and OOZIE_LIMIT_MAX_CONCURRENCY")
+        if self.oozie_limit_rate <= 0 or self.oozie_limit_burst < 1:
+            raise RuntimeError("OOZIE_LIMIT_RATE must be > 0 and OOZIE_LIMIT_BURST >= 1")
+        if not 0 < self.oozie_limit_decrease < 1:
+            raise RuntimeError("OOZIE_LIMIT_DECREASE must be between 0 and 1")
+
+        if self.ws_overflow_policy not in ("drop_oldest", "coalesce", "disconnect"):
+            raise RuntimeError("WS_OVERFLOW_POLICY must be one of: drop_oldest, coalesce, disconnect")
+
         if secure_mode:
             if len(self.jwt_secret.strip()) < 24 or self.jwt_secret == "change-me-in-production":
                 raise RuntimeError("JWT_SECRET is too weak for production mode")
@@ -0,0 +1,123 @@
+import time
+from datetime import datetime
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+from sqlalchemy import case, or_
+from sqlalchemy.orm import Session
+
+from . import models
+
+Task = models.Task
+
+# Only workflow reruns can be tracked: a coordinator or bundle rerun ends
+# when its rerun actions do, but the job itself may keep running for good.
+TRACKABLE_TYPES = ("workflow",)
+
+# Oozie job statuses that end tracking, mapped to the task status they give.
+# Anything else (PREP, RUNNING, SUSPENDED, RUNNINGWITHERROR, ...) is still
+# in progress.
+OOZIE_END_STATUSES = {
+    "SUCCEEDED": "SUCCESS",
+    "KILLED": "FAILED",
+    "FAILED": "FAILED",
+    "DONEWITHERROR": "FAILED",
+    "IGNORED": "FAILED",
+}
+
+
+def untracked_type_error(task_type: str) -> str:
+    return f"track_outcome supports only workflow tasks, not {task_type}"
+
+
+def outcome_for(oozie_status: str) -> Optional[str]:
+    """Task status for an Oozie job status, or None while the job is still going."""
+    return OOZIE_END_STATUSES.get((oozie_status or "").upper())
+
+
+def submitted_page(db: Session, plan_ids: Iterable[int], after_id: int, limit: int, settled_before: datetime) -> list:
+    """Up to ``limit`` SUBMITTED tasks of ``plan_ids`` with id above ``after_id``, in id order.
+
+    Right after a rerun Oozie may still report the previous end state, so
+    tasks submitted after ``settled_before`` wait for a later poll.
+    """
+    return (
+        db.query(Task.id, Task.plan_id, Task.type, Task.job_id, Task.oozie_status, Task.submitted_at)
+        .filter(
+            Task.plan_id.in_(list(plan_ids)),
+            Task.status == "SUBMITTED",
+            Task.id > after_id,
+            or_(Task.submitted_at.is_(None), Task.submitted_at <= settled_before),
+        )
+        .order_by(Task.id.asc())
+        .limit(limit)
+        .all()
+    )
+
+
+def record_tracked(db: Session, changes: Dict[int, Tuple[str, Optional[str]]], ended_at: datetime) -> List[int]:
+    """Store what the tracker saw with a single UPDATE; the caller commits.
+
+    ``changes`` maps task id to its Oozie status and the outcome it ends
+    with, or None while the job is still going. Only tasks still SUBMITTED
+    are written, so a concurrent cancel or retry wins. Returns their ids.
+    """
+    if not changes:
+        return []
+    query = db.query(Task.id).filter(Task.id.in_(list(changes)), Task.status == "SUBMITTED")
+    if db.bind.dialect.name == "mysql":
+        query = query.with_for_update()
+    ids = [row.id for row in query.all()]
+    if not ids:
+        return []
+    values: Dict = {Task.oozie_status: case({i: changes[i][0] for i in ids}, value=Task.id)}
+    ended = [i for i in ids if changes[i][1] is not None]
+    if ended:
+        values[Task.status] = case({i: changes[i][1] for i in ended}, value=Task.id, else_=Task.status)
+        values[Task.ended_at] = case((Task.id.in_(ended), ended_at), else_=Task.ended_at)
+    db.query(Task).filter(Task.id.in_(ids), Task.status == "SUBMITTED").update(values, synchronize_session=False)
+    return ids
+
+
+class PollCadence:
+    """Per-key adaptive poll interval.
+
+    A key is polled every ``min_interval`` seconds while its results keep
+    changing. Each poll that changes nothing doubles the interval, up to
+    ``max_interval``. :meth:`reset` brings a key back to the fast cadence.
+    """
+
+    def __init__(self, min_interval: float, max_interval: float):
+        self.min_interval = max(0.1, min_interval)
+        self.max_interval = max(self.min_interval, max_interval)
+        self._interval: Dict[Hashable, float] = {}
+        self._next: Dict[Hashable, float] = {}
+
+    def interval(self, key: Hashable) -> float:
+        return self._interval.get(key, self.min_interval)
+
+    def due(self, key: Hashable, now: Optional[float] = None) -> bool:
+        return self._next.get(key, 0.0) <= (time.monotonic() if now is None else now)
+
+    def polled(self, key: Hashable, changed: bool, now: Optional[float] = None) -> None:
+        interval = self.min_interval if changed else min(self.max_interval, self.interval(key) * 2)
+        self._interval[key] = interval
+        self._next[key] = (time.monotonic() if now is None else now) + interval
+
+    def skipped(self, key: Hashable, now: Optional[float] = None) -> None:
+        # Someone else polled this key; check back after the current interval.
+        self._next[key] = (time.monotonic() if now is None else now) + self.interval(key)
+
+    def reset(self, key: Hashable) -> None:
+        self._interval.pop(key, None)
+        self._next.pop(key, None)
+
+    def forget_except(self, keys) -> None:
+        for key in set(self._interval) | set(self._next):
+            if key not in keys:
+                self.reset(key)
+
+    def next_due_in(self, now: Optional[float] = None) -> float:
+        if not self._next:
+            return self.max_interval
+        now = time.monotonic() if now is None else now
+        return max(0.0, min(self._next.values()) - now)
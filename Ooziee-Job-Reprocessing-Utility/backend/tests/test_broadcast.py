@@ -0,0 +1,127 @@
+import asyncio
+import json
+import unittest
+from unittest import mock
+
+from app.broadcast import Connection, ConnectionManager, coalesce_key
+
+
+class FakeWebSocket:
+    def __init__(self, block: bool = False):
+        self.client = None
+        self.sent = []
+        self.closed_with = None
+        self.gate = asyncio.Event()
+        if not block:
+            self.gate.set()
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, data):
+        await self.gate.wait()
+        self.sent.append(json.loads(data))
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+
+async def _forget(conn):
+    pass
+
+
+class TestConnectionQueue(unittest.IsolatedAsyncioTestCase):
+    def _conn(self, policy, maxsize=2):
+        return Connection(FakeWebSocket(block=True), maxsize=maxsize, policy=policy, send_timeout=5, on_close=_forget)
+
+    def test_coalesce_key(self):
+        self.assertEqual(coalesce_key({"event": "task_finished", "plan_id": 1, "task_id": 2}), "task:1:2")
+        self.assertIsNone(coalesce_key({"event": "task_log", "plan_id": 1, "task_id": 2}))
+        self.assertIsNone(coalesce_key({"event": "plan_status", "plan_id": 1}))
+
+    async def test_drop_oldest(self):
+        conn = self._conn("drop_oldest")
+        for i in range(3):
+            conn.offer(str(i))
+        self.assertEqual([d for _, d, _ in conn.queue], ["1", "2"])
+        self.assertEqual(conn.dropped, 1)
+
+    async def test_coalesce_replaces_same_task(self):
+        conn = self._conn("coalesce")
+        conn.offer("a1", lambda: "task:1:1")
+        conn.offer("b1", lambda: "task:1:2")
+        conn.offer("a2", lambda: "task:1:1")
+        self.assertEqual([d for _, d, _ in conn.queue], ["a2", "b1"])
+        self.assertEqual((conn.coalesced, conn.dropped), (1, 0))
+
+    async def test_disconnect_policy_closes_slow_client(self):
+        conn = self._conn("disconnect", maxsize=1)
+        conn.start()
+        for i in range(3):
+            conn.offer(json.dumps({"i": i}))
+        await asyncio.wait_for(conn.writer, 1)
+        self.assertEqual(conn.websocket.closed_with, 1013)
+
+
+class TestFanOut(unittest.IsolatedAsyncioTestCase):
+    async def test_slow_client_does_not_delay_others(self):
+        manager = ConnectionManager()
+        slow, fast = FakeWebSocket(block=True), FakeWebSocket()
+        with mock.patch("app.broadcast.settings.ws_queue_size", 8):
+            await manager.connect(slow)
+            await manager.connect(fast)
+        for i in range(3):
+            manager.publish("plans", json.dumps({"event": "plan_status", "plan_id": 1, "seq": i}))
+        await asyncio.sleep(0.01)
+        self.assertEqual([m["seq"] for m in fast.sent], [0, 1, 2])
+        self.assertEqual(slow.sent, [])
+        self.assertEqual(manager.stats()["connections"], 2)
+        slow.gate.set()
+        await asyncio.sleep(0.01)
+        self.assertEqual(len(slow.sent), 3)
+        await manager.disconnect(slow)
+        await manager.disconnect(fast)
+        self.assertEqual(manager.stats()["connections"], 0)
+
+    async def test_topics_route_to_subscribers(self):
+        manager = ConnectionManager()
+        watcher, other = FakeWebSocket(), FakeWebSocket()
+        with mock.patch("app.broadcast.broadcaster") as broadcaster:
+            broadcaster.watch = mock.AsyncMock()
+            broadcaster.unwatch = mock.AsyncMock()
+            conn = await manager.connect(watcher)
+            await manager.connect(other)
+            await manager.unsubscribe(conn, ["plans"])
+            await manager.subscribe(conn, ["plan:7"])
+            manager.publish("plan:7", json.dumps({"event": "task_finished", "plan_id": 7}))
+            manager.publish("plans", json.dumps({"event": "plan_created", "plan_id": 8}))
+            await asyncio.sleep(0.01)
+            self.assertEqual([m["plan_id"] for m in watcher.sent], [7])
+            self.assertEqual([m["plan_id"] for m in other.sent], [8])
+            broadcaster.watch.assert_any_await("plan:7")
+            await manager.disconnect(watcher)
+            broadcaster.unwatch.assert_awaited_with("plan:7")
+
+
+    async def test_replays_missed_events_before_live_ones(self):
+        manager = ConnectionManager()
+        ws = FakeWebSocket()
+
+        async def read_since(topic, last_id, count):
+            # A live event arrives while the backlog is being read.
+            manager.publish(topic, json.dumps({"id": "5-0", "seq": 5}))
+            manager.publish(topic, json.dumps({"id": "6-0", "seq": 6}))
+            return [("4-0", '{"seq":4}'), ("5-0", '{"seq":5}')], False
+
+        with mock.patch("app.broadcast.broadcaster") as broadcaster:
+            broadcaster.watch = mock.AsyncMock()
+            broadcaster.read_since = read_since
+            conn = await manager.connect(ws)
+            await manager.subscribe(conn, ["plan:1"], since={"plan:1": "3-0"})
+            await asyncio.sleep(0.01)
+        self.assertEqual([m["seq"] for m in ws.sent], [4, 5, 6])
+        self.assertEqual(ws.sent[0]["id"], "4-0")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import asyncio
+import threading
+import time
+import unittest
+from unittest import mock
+
+from app.cache import BlockingSingleFlight, SingleFlight, TTLCache
+
+
+class TestTTLCache(unittest.TestCase):
+    def test_expires_entries(self):
+        cache = TTLCache(maxsize=4, ttl=5)
+        with mock.patch("app.cache.time.monotonic", return_value=0.0):
+            cache.set("k", 1)
+            self.assertEqual(cache.get("k"), 1)
+        with mock.patch("app.cache.time.monotonic", return_value=6.0):
+            self.assertIsNone(cache.get("k"))
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_evicts_least_recently_used(self):
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+
+
+class TestSingleFlight(unittest.TestCase):
+    def test_coalesces_concurrent_calls(self):
+        flight = SingleFlight()
+        calls = []
+
+        async def load():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {"id": "job-1"}
+
+        async def run():
+            return await asyncio.gather(*[flight.do("job-1", load) for _ in range(10)])
+
+        results = asyncio.run(run())
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{"id": "job-1"}] * 10)
+        self.assertEqual(flight.stats()["coalesced"], 9)
+
+
+class TestBlockingSingleFlight(unittest.TestCase):
+    def test_threads_share_one_call(self):
+        flight = BlockingSingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def load():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return (0, "ok", "")
+
+        results = []
+        leader = threading.Thread(target=lambda: results.append(flight.do("kinit", load)))
+        leader.start()
+        started.wait(5)
+        followers = [threading.Thread(target=lambda: results.append(flight.do("kinit", load))) for _ in range(4)]
+        for t in followers:
+            t.start()
+        while flight.stats()["coalesced"] < 4:
+            time.sleep(0.001)
+        release.set()
+        for t in [leader, *followers]:
+            t.join(5)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [(0, "ok", "")] * 5)
+        self.assertEqual(flight.stats()["inflight"], 0)
+
+    def test_errors_are_not_kept(self):
+        flight = BlockingSingleFlight()
+        with self.assertRaises(RuntimeError):
+            flight.do("kinit", mock.Mock(side_effect=RuntimeError("kdc down")))
+        self.assertEqual(flight.do("kinit", lambda: 1), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import textwrap
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import models
+from app.auth import get_current_user
+from app.claims import lease_expired, renew_claims, requeue_expired_claims, requeue_worker_claims
+from app.db import Base, get_db
+from app.main import app
+
+WORKER_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "worker")
+
+# Claims two tasks through the worker's real claim path, then dies before
+# running them, as a worker killed mid-claim would.
+KILLED_WORKER = textwrap.dedent(
+    """
+    import os, signal, runner
+    db = runner.SessionLocal()
+    specs = runner.claim_tasks(db, 1, 2)
+    print(",".join(str(s.id) for s in specs), flush=True)
+    os.kill(os.getpid(), signal.SIGKILL)
+    """
+)
+
+
+class TestClaimLeases(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.db_url = f"sqlite:///{tmp.name}/test.db"
+        engine = create_engine(self.db_url)
+        self.addCleanup(engine.dispose)
+        Base.metadata.create_all(engine)
+        self.Session = sessionmaker(bind=engine)
+        db = self.Session()
+        db.add(models.Plan(name="p", status="RUNNING", max_concurrency=2))
+        db.flush()
+        for i in range(3):
+            db.add(models.Task(plan_id=1, name=f"t{i}", type="workflow", job_id=f"job-{i}", status="PENDING"))
+        db.commit()
+        db.close()
+
+    def _tasks(self):
+        db = self.Session()
+        try:
+            return {t.id: (t.status, t.claimed_by) for t in db.query(models.Task).all()}
+        finally:
+            db.close()
+
+    def _kill_worker_mid_claim(self, worker_id: str) -> None:
+        env = dict(os.environ, DB_URL=self.db_url, WORKER_ID=worker_id, PYTHONPATH=WORKER_DIR)
+        proc = subprocess.run([sys.executable, "-c", KILLED_WORKER], env=env, capture_output=True, text=True, timeout=60)
+        self.assertEqual(proc.returncode, -signal.SIGKILL, proc.stderr)
+        self.assertEqual(proc.stdout.strip(), "1,2")
+
+    def test_killed_worker_tasks_are_requeued_after_lease(self):
+        self._kill_worker_mid_claim("dead-worker")
+        self.assertEqual(self._tasks(), {1: ("RUNNING", "dead-worker"), 2: ("RUNNING", "dead-worker"), 3: ("PENDING", None)})
+
+        db = self.Session()
+        self.assertEqual(requeue_expired_claims(db, 120, datetime.utcnow()), {})
+        requeued = requeue_expired_claims(db, 120, datetime.utcnow() + timedelta(seconds=121))
+        db.commit()
+        db.close()
+        self.assertEqual(requeued, {1: [1, 2]})
+        self.assertEqual(self._tasks(), {1: ("PENDING", None), 2: ("PENDING", None), 3: ("PENDING", None)})
+
+    def test_renewed_claims_survive_the_sweep(self):
+        start = datetime.utcnow()
+        db = self.Session()
+        db.query(models.Task).filter(models.Task.id.in_([1, 2])).update(
+            {"status": "RUNNING", "claimed_by": "w1", "started_at": start, "heartbeat_at": start, "batch_id": 1}
+        )
+        db.commit()
+        # Renewing the batch leader renews its members too.
+        self.assertEqual(renew_claims(db, "w1", [1], start + timedelta(seconds=100)), 2)
+        self.assertEqual(renew_claims(db, "w2", [1], start + timedelta(seconds=100)), 0)
+        db.commit()
+        self.assertEqual(requeue_expired_claims(db, 120, start + timedelta(seconds=130)), {})
+        db.close()
+
+    def test_restart_releases_claims_of_same_worker_id(self):
+        self._kill_worker_mid_claim("static-worker")
+        db = self.Session()
+        self.assertEqual(requeue_worker_claims(db, "other-worker"), {})
+        self.assertEqual(requeue_worker_claims(db, "static-worker"), {1: [1, 2]})
+        db.commit()
+        db.close()
+        self.assertEqual(self._tasks()[1], ("PENDING", None))
+
+    def test_admin_can_reset_task_of_dead_worker(self):
+        db = self.Session()
+        db.query(models.Task).filter(models.Task.id == 1).update(
+            {"status": "RUNNING", "claimed_by": "w1", "started_at": datetime.utcnow() - timedelta(hours=1)}
+        )
+        db.query(models.Task).filter(models.Task.id == 2).update(
+            {"status": "RUNNING", "claimed_by": "w2", "started_at": datetime.utcnow(), "heartbeat_at": datetime.utcnow()}
+        )
+        db.commit()
+        db.close()
+
+        def override_db():
+            session = self.Session()
+            try:
+                yield session
+            finally:
+                session.close()
+
+        app.dependency_overrides[get_db] = override_db
+        app.dependency_overrides[get_current_user] = lambda: models.User(username="admin", role="admin", is_active=True)
+        self.addCleanup(app.dependency_overrides.clear)
+        client = TestClient(app)
+        with mock.patch("app.routes.tasks.publish_event"):
+            self.assertEqual(client.post("/api/tasks/2/retry").status_code, 409)
+            self.assertEqual(client.post("/api/tasks/1/retry").json(), {"status": "PENDING"})
+        self.assertEqual(self._tasks()[1], ("PENDING", None))
+
+    def test_lease_falls_back_to_started_at(self):
+        now = datetime.utcnow()
+        task = models.Task(status="RUNNING", started_at=now - timedelta(seconds=200))
+        self.assertTrue(lease_expired(task, 120, now))
+        task.heartbeat_at = now - timedelta(seconds=10)
+        self.assertFalse(lease_expired(task, 120, now))
+
+
+if __name__ == "__main__":
+    unittest.main()
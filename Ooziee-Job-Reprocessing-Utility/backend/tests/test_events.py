@@ -0,0 +1,72 @@
+import asyncio
+import json
+import unittest
+from unittest import mock
+
+from app import events
+
+
+class TestPublishEvent(unittest.TestCase):
+    def setUp(self):
+        self.redis = mock.MagicMock()
+        self.pipe = self.redis.pipeline.return_value
+        self.script = self.redis.register_script.return_value
+        mock.patch.object(events, "_redis_client", None).start()
+        mock.patch("app.events.redis.from_url", return_value=self.redis).start()
+        self.writer = events.EventWriter()
+        mock.patch.object(events, "writer", self.writer).start()
+        self.addCleanup(mock.patch.stopall)
+        self.addCleanup(self.writer.close)
+
+    def _publish(self, *payloads, sequenced=True):
+        for payload in payloads:
+            events.publish_event(payload, sequenced=sequenced)
+        self.writer.flush()
+
+    def test_plan_events_are_sequenced_and_streamed(self):
+        self._publish({"event": "task_finished", "plan_id": 3, "task": {"id": 9}})
+        _, kwargs = self.script.call_args
+        channel = events.plan_channel(3)
+        self.assertEqual(kwargs["keys"], [events.seq_key(3), events.stream_key(channel)])
+        self.assertEqual(json.loads(kwargs["args"][0])["task"], {"id": 9})
+        self.assertEqual(kwargs["args"][3:], [channel])
+        self.assertIs(kwargs["client"], self.pipe)
+        self.pipe.execute.assert_called_once()
+
+    def test_summary_events_also_go_to_global_channel(self):
+        self._publish({"event": "plan_status", "plan_id": 3})
+        _, kwargs = self.script.call_args
+        self.assertEqual(kwargs["args"][3:], [events.plan_channel(3), events.settings.redis_channel])
+
+    def test_unsequenced_events_publish_directly(self):
+        self._publish({"event": "task_log", "plan_id": 3}, {"event": "worker_heartbeat"}, sequenced=False)
+        self.assertEqual(self.pipe.publish.call_count, 2)
+        self.script.assert_not_called()
+
+    def test_queued_events_share_a_pipeline(self):
+        gate = mock.patch.object(self.writer, "_write", wraps=self.writer._write).start()
+        with mock.patch.object(self.writer, "_ensure_started"):
+            for i in range(5):
+                events.publish_event({"event": "task_started", "plan_id": 1, "task_id": i})
+        self.writer._ensure_started()
+        self.writer.flush()
+        gate.assert_called_once()
+        self.assertEqual(self.writer.stats()["published"], 5)
+
+    def test_channel_topics(self):
+        self.assertEqual(events.channel_topic(events.log_channel(4)), "plan:4")
+        self.assertEqual(events.channel_topic(events.settings.redis_channel), "plans")
+        self.assertIsNone(events.channel_topic("other"))
+
+    def test_current_seq_defaults_to_zero(self):
+        client = mock.MagicMock()
+        client.get = mock.AsyncMock(return_value=None)
+        with mock.patch.object(events, "_async_redis_client", None), mock.patch(
+            "app.events.aioredis.from_url", return_value=client
+        ):
+            self.assertEqual(asyncio.run(events.current_seq(3)), 0)
+        client.get.assert_awaited_once_with(events.seq_key(3))
+
+
+if __name__ == "__main__":
+    unittest.main()
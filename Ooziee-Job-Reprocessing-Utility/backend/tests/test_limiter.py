@@ -0,0 +1,74 @@
+import unittest
+from unittest import mock
+
+from app import limiter as limiter_module
+from app.limiter import OozieLimiter, limit_key, urls_key
+from app.settings import Settings
+
+
+class TestOozieLimiter(unittest.TestCase):
+    def setUp(self):
+        self.redis = mock.MagicMock()
+        self.acquire, self.release = mock.MagicMock(), mock.MagicMock()
+        self.redis.register_script.side_effect = [self.acquire, self.release]
+        mock.patch("app.limiter.redis.from_url", return_value=self.redis).start()
+        mock.patch.object(limiter_module.settings, "oozie_limit_enabled", True).start()
+        self.addCleanup(mock.patch.stopall)
+        self.limiter = OozieLimiter()
+
+    def test_granted_lease_registers_server(self):
+        self.acquire.return_value = [1, "0"]
+        lease, wait = self.limiter.try_acquire("http://oozie:11000/oozie/", 60)
+        self.assertTrue(lease)
+        self.assertEqual(wait, 0.0)
+        key = limit_key("http://oozie:11000/oozie")
+        self.assertEqual(self.acquire.call_args.kwargs["keys"], [key, f"{key}:leases"])
+        self.redis.sadd.assert_called_once_with(urls_key(), "http://oozie:11000/oozie")
+
+    def test_denied_returns_wait_hint(self):
+        self.acquire.return_value = [0, "-1"]
+        self.assertEqual(self.limiter.try_acquire("http://oozie", 60), (None, -1.0))
+        self.acquire.return_value = [0, "0.25"]
+        self.assertEqual(self.limiter.try_acquire("http://oozie", 60), (None, 0.25))
+
+    def test_fails_open_without_redis(self):
+        self.acquire.side_effect = ConnectionError("down")
+        lease, wait = self.limiter.try_acquire("http://oozie", 60)
+        self.assertEqual((lease, wait), ("", 0.0))
+        self.limiter.release("http://oozie", lease, congested=True)
+        self.release.assert_not_called()
+        self.assertEqual(self.limiter.failures, 1)
+
+    def test_release_reports_congestion(self):
+        self.acquire.return_value = [1, "0"]
+        lease, _ = self.limiter.try_acquire("http://oozie", 60)
+        self.limiter.release("http://oozie", lease, congested=True)
+        args = self.release.call_args.kwargs["args"]
+        self.assertEqual(args[1:3], [lease, "1"])
+
+    def test_acquire_grants_part_of_a_batch(self):
+        self.acquire.return_value = [2, "0.5"]
+        leases, wait = self.limiter.acquire("http://oozie", 3, 60)
+        self.assertEqual(len(leases), 2)
+        self.assertEqual(len(set(leases)), 2)
+        self.assertEqual(wait, 0.5)
+        self.assertEqual(self.acquire.call_args.kwargs["args"][-1], 3)
+
+    def test_cancel_refunds_without_aimd(self):
+        self.acquire.return_value = [1, "0"]
+        lease, _ = self.limiter.try_acquire("http://oozie", 60)
+        self.limiter.cancel("http://oozie", lease)
+        args = self.release.call_args.kwargs["args"]
+        self.assertEqual(args[1:3], [lease, "unused"])
+
+    def test_disabled_by_default(self):
+        self.assertIs(Settings.model_fields["oozie_limit_enabled"].default, False)
+
+    def test_disabled_skips_redis(self):
+        with mock.patch.object(limiter_module.settings, "oozie_limit_enabled", False):
+            self.assertEqual(self.limiter.try_acquire("http://oozie", 60), ("", 0.0))
+        self.redis.register_script.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
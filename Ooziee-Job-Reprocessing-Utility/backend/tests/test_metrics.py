@@ -0,0 +1,31 @@
+import unittest
+
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+from app.main import app
+from app.metrics import observe_oozie
+
+
+class TestMetrics(unittest.TestCase):
+    def _sample(self, name, labels):
+        return REGISTRY.get_sample_value(name, labels) or 0.0
+
+    def test_observe_oozie_records_latency_and_errors(self):
+        labels = {"host": "oozie-m:11000", "operation": "rerun"}
+        before = self._sample("oozie_http_request_seconds_count", labels)
+        with self.assertRaises(ValueError):
+            with observe_oozie("http://oozie-m:11000/oozie", "rerun"):
+                raise ValueError("boom")
+        self.assertEqual(self._sample("oozie_http_request_seconds_count", labels), before + 1)
+        self.assertEqual(self._sample("oozie_http_errors_total", {**labels, "error": "ValueError"}), 1)
+
+    def test_metrics_endpoint(self):
+        r = TestClient(app).get("/metrics")
+        self.assertEqual(r.status_code, 200)
+        self.assertIn("oozie_task_queue_wait_seconds", r.text)
+        self.assertIn("ws_connections", r.text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,165 @@
+import asyncio
+import unittest
+from unittest import mock
+
+import httpx
+
+from app.oozie import (
+    AsyncOozieClient,
+    AsyncOozieClientRegistry,
+    OozieClient,
+    OozieClientRegistry,
+    merge_action_scopes,
+    merge_date_scopes,
+)
+
+
+class TestOozieRerun(unittest.TestCase):
+    def setUp(self):
+        self.client = OozieClient("http://oozie:11000/oozie/")
+        self.put = mock.patch.object(self.client.session, "put").start()
+        self.put.return_value.json.return_value = {}
+        self.addCleanup(mock.patch.stopall)
+
+    def test_coordinator_action_rerun_params(self):
+        self.client.rerun_coordinator("coord-1", "action", "1-5,9", refresh=True, failed=True)
+        args, kwargs = self.put.call_args
+        self.assertEqual(args[0], "http://oozie:11000/oozie/v2/job/coord-1")
+        self.assertEqual(
+            kwargs["params"],
+            {
+                "action": "coord-rerun",
+                "type": "action",
+                "scope": "1-5,9",
+                "refresh": "true",
+                "nocleanup": "true",
+                "failed": "true",
+            },
+        )
+
+    def test_coordinator_rerun_rejects_unknown_type(self):
+        with self.assertRaises(ValueError):
+            self.client.rerun_coordinator("coord-1", "nominal", "1")
+
+    def test_bundle_rerun_params(self):
+        self.client.rerun_bundle("bundle-1", coord_scope="coord-a")
+        _, kwargs = self.put.call_args
+        self.assertEqual(
+            kwargs["params"],
+            {"action": "bundle-rerun", "coord-scope": "coord-a", "refresh": "false", "nocleanup": "true"},
+        )
+
+    def test_bundle_rerun_requires_scope(self):
+        with self.assertRaises(ValueError):
+            self.client.rerun_bundle("bundle-1")
+
+    def test_job_statuses_uses_one_filter_query(self):
+        get = mock.patch.object(self.client.session, "get").start()
+        get.return_value.json.return_value = {
+            "coordinatorjobs": [{"coordJobId": "c-1", "status": "RUNNING"}, {"coordJobId": "c-2", "status": "SUCCEEDED"}]
+        }
+        statuses = self.client.job_statuses("coordinator", ["c-1", "c-2"])
+        self.assertEqual(statuses, {"c-1": "RUNNING", "c-2": "SUCCEEDED"})
+        get.assert_called_once()
+        args, kwargs = get.call_args
+        self.assertEqual(args[0], "http://oozie:11000/oozie/v2/jobs")
+        self.assertEqual(kwargs["params"]["jobtype"], "coordinator")
+        self.assertEqual(kwargs["params"]["filter"], "id=c-1;id=c-2")
+        self.assertEqual(kwargs["params"]["len"], "2")
+
+
+class TestAsyncOozieRerun(unittest.TestCase):
+    def test_workflow_rerun_sends_conf(self):
+        seen = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            seen.append(request)
+            return httpx.Response(200, json={"status": "ok"})
+
+        async def run():
+            client = AsyncOozieClient("http://oozie:11000/oozie/")
+            client.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+            try:
+                return await client.rerun("wf-1", conf={"oozie.wf.rerun.failnodes": "true"})
+            finally:
+                await client.aclose()
+
+        self.assertEqual(asyncio.run(run()), {"status": "ok"})
+        request = seen[0]
+        self.assertEqual(request.method, "PUT")
+        self.assertEqual(request.url.params["action"], "rerun")
+        self.assertIn(b"<name>oozie.wf.rerun.failnodes</name><value>true</value>", request.content)
+
+
+class TestRerunScopes(unittest.TestCase):
+    def test_merges_actions_into_ranges(self):
+        self.assertEqual(merge_action_scopes(["3", "1", "2", "7-9", "10", "5,6"]), "1-3,5-10")
+
+    def test_keeps_unparseable_actions(self):
+        self.assertEqual(merge_action_scopes(["1", "latest", "1"]), "1,latest")
+
+    def test_merges_dates(self):
+        self.assertEqual(
+            merge_date_scopes(["2024-01-02T00:00Z", "2024-01-01T00:00Z::2024-01-01T23:00Z", "2024-01-02T00:00Z"]),
+            "2024-01-01T00:00Z::2024-01-01T23:00Z,2024-01-02T00:00Z",
+        )
+
+
+class TestOozieClientRegistry(unittest.TestCase):
+    def test_reuses_client_per_url(self):
+        registry = OozieClientRegistry(pool_maxsize=4, idle_seconds=300)
+        first = registry.get("http://oozie:11000/oozie/")
+        second = registry.get("http://oozie:11000/oozie")
+        self.assertIs(first, second)
+        self.assertEqual((registry.hits, registry.misses), (1, 1))
+
+    def test_evicts_idle_clients(self):
+        registry = OozieClientRegistry(pool_maxsize=4, idle_seconds=0)
+        with mock.patch("app.oozie.time.monotonic", return_value=0.0):
+            old = registry.get("http://old:11000/oozie")
+        with mock.patch("app.oozie.time.monotonic", return_value=10_000.0):
+            registry.get("http://new:11000/oozie")
+        self.assertEqual(registry.evictions, 1)
+        self.assertIsNot(registry.get("http://old:11000/oozie"), old)
+
+
+class TestAsyncOozieClientRegistry(unittest.TestCase):
+    def test_counts_and_evicts_async_clients(self):
+        registry = AsyncOozieClientRegistry(pool_maxsize=4, idle_seconds=0)
+
+        async def run():
+            with mock.patch("app.oozie.time.monotonic", return_value=0.0):
+                old = registry.get("http://old:11000/oozie/")
+                self.assertIs(registry.get("http://old:11000/oozie"), old)
+            with mock.patch("app.oozie.time.monotonic", return_value=10_000.0):
+                registry.get("http://new:11000/oozie")
+            await asyncio.sleep(0)
+            self.assertTrue(old.client.is_closed)
+            stats = registry.stats()
+            await registry.aclose()
+            return stats
+
+        stats = asyncio.run(run())
+        self.assertEqual((stats["hits"], stats["misses"], stats["evictions"]), (1, 2, 1))
+        self.assertEqual(list(stats["hosts"]), ["http://new:11000/oozie"])
+        self.assertEqual(registry.stats()["clients"], 0)
+
+    def test_pool_stats_count_requests(self):
+        async def run():
+            client = AsyncOozieClient("http://oozie:11000/oozie")
+            client.client = httpx.AsyncClient(
+                transport=httpx.MockTransport(lambda request: httpx.Response(200, json={})),
+                event_hooks={"request": [client._count_request]},
+            )
+            try:
+                await client.job_info("wf-1")
+                await client.job_info("wf-2")
+            finally:
+                await client.aclose()
+            return client.pool_stats()
+
+        self.assertEqual(asyncio.run(run())["requests"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import models
+from app.db import Base
+from app.outputs import compress_text, load_task_output, release_task_output, save_task_output
+
+
+class TestTaskOutputs(unittest.TestCase):
+    def setUp(self):
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(engine)
+        self.db = sessionmaker(bind=engine)()
+        plan = models.Plan(name="p")
+        self.db.add(plan)
+        self.db.flush()
+        self.task = models.Task(plan_id=plan.id, name="t", type="workflow", job_id="job-1")
+        self.db.add(self.task)
+        self.db.commit()
+
+    def tearDown(self):
+        self.db.close()
+
+    def test_round_trip_is_compressed(self):
+        stdout = "line\n" * 10000
+        save_task_output(self.db, self.task.id, stdout, "boom")
+        self.db.commit()
+        row = self.db.get(models.TaskOutput, self.task.id)
+        self.assertLess(len(row.stdout), len(stdout) // 10)
+        self.assertEqual(load_task_output(self.db, self.task), {"stdout": stdout, "stderr": "boom"})
+
+    def test_empty_output_clears_row(self):
+        save_task_output(self.db, self.task.id, "out", "")
+        self.db.commit()
+        save_task_output(self.db, self.task.id, "", "")
+        self.db.commit()
+        self.assertIsNone(self.db.get(models.TaskOutput, self.task.id))
+        self.assertEqual(load_task_output(self.db, self.task), {"stdout": "", "stderr": ""})
+
+    def test_reads_output_migrated_uncompressed(self):
+        self.db.add(models.TaskOutput(task_id=self.task.id, codec="none", stdout="über".encode("utf-8"), stderr=b""))
+        self.db.commit()
+        self.assertEqual(load_task_output(self.db, self.task), {"stdout": "über", "stderr": ""})
+
+    def _batch(self):
+        members = [models.Task(plan_id=self.task.plan_id, name=f"m{i}", type="coordinator", job_id="job-1") for i in range(2)]
+        self.db.add_all(members)
+        self.db.flush()
+        batch = [self.task] + members
+        for t in batch:
+            t.batch_id = self.task.id
+        save_task_output(self.db, members[0].id, "stale", "")
+        save_task_output(self.db, self.task.id, "merged", "", members=[t.id for t in batch])
+        self.db.commit()
+        return members
+
+    def test_batch_output_is_stored_once(self):
+        members = self._batch()
+        self.assertEqual(self.db.query(models.TaskOutput).count(), 1)
+        self.assertEqual(load_task_output(self.db, members[1])["stdout"], "merged")
+
+    def test_retried_leader_hands_batch_output_over(self):
+        members = self._batch()
+        release_task_output(self.db, self.task)
+        self.db.commit()
+        self.db.expire_all()
+        self.assertEqual([m.batch_id for m in members], [members[0].id] * 2)
+        self.assertEqual(load_task_output(self.db, members[1])["stdout"], "merged")
+
+    def test_compress_handles_unicode(self):
+        self.assertTrue(compress_text("überprüfung"))
+
+
+if __name__ == "__main__":
+    unittest.main()
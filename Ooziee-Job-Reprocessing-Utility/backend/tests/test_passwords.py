@@ -0,0 +1,104 @@
+import asyncio
+import tempfile
+import unittest
+from unittest import mock
+
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app import models
+from app.db import Base, async_url, get_async_db, get_db
+from app.main import app
+from app.passwords import PasswordHasher, hash_with
+from app.settings import settings
+
+
+class TestLogin(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        url = f"sqlite:///{tmp.name}/test.db"
+        engine = create_engine(url)
+        async_engine = create_async_engine(async_url(url), poolclass=NullPool)
+        self.addCleanup(engine.dispose)
+        Base.metadata.create_all(engine)
+        self.Session = sessionmaker(bind=engine)
+        db = self.Session()
+        db.add(models.User(username="alice", password_hash=hash_with("correct-horse", 5), role="viewer", is_active=True))
+        db.commit()
+        db.close()
+
+        def override_db():
+            session = self.Session()
+            try:
+                yield session
+            finally:
+                session.close()
+
+        async def override_async_db():
+            async with AsyncSession(async_engine, expire_on_commit=False) as session:
+                yield session
+
+        app.dependency_overrides[get_db] = override_db
+        app.dependency_overrides[get_async_db] = override_async_db
+        self.addCleanup(app.dependency_overrides.clear)
+        for name, value in {"password_hash_workers": 0, "bcrypt_rounds": 5}.items():
+            patcher = mock.patch.object(settings, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.client = TestClient(app)
+
+    def _stored_hash(self) -> str:
+        db = self.Session()
+        try:
+            return db.query(models.User).filter(models.User.username == "alice").one().password_hash
+        finally:
+            db.close()
+
+    def test_login_checks_password(self):
+        ok = self.client.post("/api/auth/login", json={"username": "alice", "password": "correct-horse"})
+        self.assertEqual(ok.json()["role"], "viewer")
+        bad = self.client.post("/api/auth/login", json={"username": "alice", "password": "wrong"})
+        self.assertEqual(bad.status_code, 401)
+
+    def test_login_rehashes_when_cost_changes(self):
+        with mock.patch.object(settings, "bcrypt_rounds", 4):
+            r = self.client.post("/api/auth/login", json={"username": "alice", "password": "correct-horse"})
+        self.assertEqual(r.status_code, 200)
+        self.assertTrue(self._stored_hash().startswith("$2b$04$"))
+
+
+class TestPasswordHasher(unittest.TestCase):
+    def test_rejects_when_no_slot_frees_up(self):
+        hasher = PasswordHasher()
+
+        async def run():
+            await hasher._slots().acquire()
+            with self.assertRaises(HTTPException) as ctx:
+                await hasher.hash("password123")
+            return ctx.exception
+
+        with mock.patch.object(settings, "password_hash_concurrency", 1), mock.patch.object(
+            settings, "password_hash_queue_timeout", 0.01
+        ):
+            exc = asyncio.run(run())
+        self.assertEqual(exc.status_code, 503)
+
+    def test_process_pool_round_trip(self):
+        hasher = PasswordHasher()
+        self.addCleanup(hasher.close)
+
+        async def run():
+            stored = await hasher.hash("password123")
+            return await hasher.verify_and_update("password123", stored)
+
+        with mock.patch.object(settings, "password_hash_workers", 1), mock.patch.object(settings, "bcrypt_rounds", 4):
+            self.assertEqual(asyncio.run(run()), (True, None))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+import json
+import unittest
+from unittest import mock
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import models
+from app.auth import get_current_user
+from app.db import Base, get_db
+from app.main import app
+
+
+class TestPlanImport(unittest.TestCase):
+    def setUp(self):
+        engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+        Base.metadata.create_all(engine)
+        self.Session = sessionmaker(bind=engine)
+
+        db = self.Session()
+        db.add(models.Plan(name="backfill", status="DRAFT"))
+        db.commit()
+        db.close()
+
+        def override_db():
+            session = self.Session()
+            try:
+                yield session
+            finally:
+                session.close()
+
+        app.dependency_overrides[get_db] = override_db
+        app.dependency_overrides[get_current_user] = lambda: models.User(username="admin", role="admin", is_active=True)
+        self.addCleanup(app.dependency_overrides.clear)
+        mock.patch("app.routes.plans.publish_event").start()
+        mock.patch("app.imports.settings.import_chunk_size", 2).start()
+        self.addCleanup(mock.patch.stopall)
+        self.client = TestClient(app)
+
+    def _tasks(self):
+        db = self.Session()
+        try:
+            return db.query(models.Task).order_by(models.Task.id).all()
+        finally:
+            db.close()
+
+    def test_ndjson_import_reports_bad_rows(self):
+        rows = [
+            {"name": "a", "type": "workflow", "job_id": "wf-1"},
+            {"name": "b", "type": "coordinator", "job_id": "coord-1"},
+            "not json",
+            {"name": "c", "type": "coordinator", "job_id": "coord-1", "action": "1-3", "refresh": True},
+        ]
+        body = "\n".join(r if isinstance(r, str) else json.dumps(r) for r in rows) + "\n"
+        r = self.client.post("/api/plans/1/tasks/import", content=body, headers={"Content-Type": "application/x-ndjson"})
+        self.assertEqual(r.status_code, 200)
+        result = r.json()
+        self.assertEqual((result["inserted"], result["failed"]), (2, 2))
+        self.assertEqual([e["row"] for e in result["errors"]], [2, 3])
+        tasks = self._tasks()
+        self.assertEqual([t.job_id for t in tasks], ["wf-1", "coord-1"])
+        self.assertTrue(tasks[1].refresh)
+        self.assertEqual(tasks[1].status, "PENDING")
+
+    def test_csv_import_uses_header_and_defaults(self):
+        body = (
+            "name,type,job_id,date,extra_props\n"
+            'w1,workflow,wf-1,,"{""queue"": ""etl""}"\n'
+            "c1,coordinator,coord-1,2024-01-01T00:00Z::2024-01-02T00:00Z,\n"
+        )
+        r = self.client.post("/api/plans/1/tasks/import", content=body, headers={"Content-Type": "text/csv"})
+        self.assertEqual(r.json()["inserted"], 2)
+        tasks = self._tasks()
+        self.assertEqual(tasks[0].extra_props, {"queue": "etl"})
+        self.assertEqual(tasks[1].date, "2024-01-01T00:00Z::2024-01-02T00:00Z")
+
+    def test_csv_rejects_unknown_columns(self):
+        r = self.client.post("/api/plans/1/tasks/import", params={"format": "csv"}, content="name,stdout\n")
+        self.assertEqual(r.status_code, 400)
+
+    def test_tracked_plan_rejects_untrackable_rows(self):
+        db = self.Session()
+        db.query(models.Plan).update({models.Plan.track_outcome: True})
+        db.commit()
+        db.close()
+        rows = [
+            {"name": "a", "type": "workflow", "job_id": "wf-1"},
+            {"name": "b", "type": "bundle", "job_id": "bundle-1", "coordinator": "c"},
+        ]
+        body = "\n".join(json.dumps(r) for r in rows)
+        result = self.client.post("/api/plans/1/tasks/import", params={"format": "ndjson"}, content=body).json()
+        self.assertEqual((result["inserted"], result["failed"]), (1, 1))
+        self.assertIn("only workflow", result["errors"][0]["error"])
+        self.assertEqual([t.job_id for t in self._tasks()], ["wf-1"])
+
+    def test_dry_run_inserts_nothing(self):
+        body = json.dumps({"name": "a", "type": "workflow", "job_id": "wf-1"})
+        result = self.client.post("/api/plans/1/tasks/import", params={"dry_run": True}, content=body).json()
+        self.assertEqual((result["valid"], result["inserted"]), (1, 0))
+        self.assertEqual(self._tasks(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import tempfile
+import unittest
+from unittest import mock
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app import models
+from app.auth import get_current_user
+from app.db import Base, async_url, get_async_db, get_db
+from app.main import app
+
+
+class TestPlanListing(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        url = f"sqlite:///{tmp.name}/test.db"
+        engine = create_engine(url)
+        async_engine = create_async_engine(async_url(url), poolclass=NullPool)
+        self.addCleanup(engine.dispose)
+        Base.metadata.create_all(engine)
+        self.Session = sessionmaker(bind=engine)
+
+        db = self.Session()
+        for i in range(3):
+            db.add(models.Plan(name=f"plan-{i}", status="DRAFT"))
+        db.flush()
+        statuses = ["SUCCESS", "FAILED", "PENDING", "FAILED", "SUCCESS"]
+        for i, status in enumerate(statuses):
+            db.add(models.Task(plan_id=1, name=f"t{i}", type="workflow", job_id=f"job-{i}", status=status))
+        db.commit()
+        db.close()
+
+        def override_db():
+            session = self.Session()
+            try:
+                yield session
+            finally:
+                session.close()
+
+        async def override_async_db():
+            async with AsyncSession(async_engine, expire_on_commit=False) as session:
+                yield session
+
+        app.dependency_overrides[get_db] = override_db
+        app.dependency_overrides[get_async_db] = override_async_db
+        app.dependency_overrides[get_current_user] = lambda: models.User(username="viewer", role="viewer", is_active=True)
+        self.addCleanup(app.dependency_overrides.clear)
+        self.client = TestClient(app)
+
+    def test_plans_keyset_pagination(self):
+        first = self.client.get("/api/plans", params={"limit": 2}).json()
+        self.assertEqual([p["id"] for p in first["items"]], [3, 2])
+        self.assertEqual(first["next_cursor"], 2)
+        second = self.client.get("/api/plans", params={"limit": 2, "before_id": first["next_cursor"]}).json()
+        self.assertEqual([p["id"] for p in second["items"]], [1])
+        self.assertIsNone(second["next_cursor"])
+
+    def test_plan_detail_filters_by_status(self):
+        detail = self.client.get("/api/plans/1", params={"status": "FAILED"}).json()
+        self.assertEqual([t["job_id"] for t in detail["tasks"]], ["job-1", "job-3"])
+        self.assertEqual(detail["counts"], {"SUCCESS": 2, "FAILED": 2, "PENDING": 1})
+
+    def test_plan_detail_reports_event_seq(self):
+        with mock.patch("app.routes.plans.current_seq", new=mock.AsyncMock(return_value=7)) as seq:
+            detail = self.client.get("/api/plans/1").json()
+        seq.assert_called_once_with(1)
+        self.assertEqual(detail["seq"], 7)
+
+    def test_plan_detail_pages_after_cursor(self):
+        detail = self.client.get("/api/plans/1", params={"limit": 2, "after_id": 2}).json()
+        self.assertEqual([t["id"] for t in detail["tasks"]], [3, 4])
+        self.assertEqual(detail["next_cursor"], 4)
+
+    def test_task_projection(self):
+        page = self.client.get("/api/plans/1/tasks", params={"fields": "status", "job_id": "job-2"}).json()
+        self.assertEqual(page["items"], [{"id": 3, "status": "PENDING"}])
+
+    def test_task_projection_rejects_unknown_fields(self):
+        r = self.client.get("/api/plans/1/tasks", params={"fields": "stdout"})
+        self.assertEqual(r.status_code, 400)
+
+    def test_update_plan_scheduling(self):
+        app.dependency_overrides[get_current_user] = lambda: models.User(username="admin", role="admin", is_active=True)
+        with mock.patch("app.routes.plans.publish_event") as publish:
+            r = self.client.patch("/api/plans/2", json={"priority": 5, "weight": 3})
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual((r.json()["priority"], r.json()["weight"], r.json()["max_concurrency"]), (5, 3, 1))
+        self.assertEqual(publish.call_args.args[0]["event"], "plan_updated")
+        self.assertEqual(self.client.patch("/api/plans/2", json={"weight": 0}).status_code, 422)
+
+
+if __name__ == "__main__":
+    unittest.main()
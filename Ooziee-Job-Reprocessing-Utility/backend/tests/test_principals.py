@@ -0,0 +1,94 @@
+import tempfile
+import unittest
+from unittest import mock
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app import models
+from app.auth import create_access_token
+from app.db import Base, async_url, get_async_db, get_db
+from app.main import app
+from app.principals import principal_cache
+
+
+class TestPrincipalCache(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        url = f"sqlite:///{tmp.name}/test.db"
+        engine = create_engine(url)
+        async_engine = create_async_engine(async_url(url), poolclass=NullPool)
+        self.addCleanup(engine.dispose)
+        Base.metadata.create_all(engine)
+        self.Session = sessionmaker(bind=engine)
+        self.user_queries = 0
+
+        @event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+        def count(conn, cursor, statement, *args):
+            if statement.lstrip().upper().startswith("SELECT") and "FROM users" in statement:
+                self.user_queries += 1
+
+        db = self.Session()
+        db.add(models.User(username="admin", password_hash="x", role="admin", is_active=True))
+        db.add(models.User(username="alice", password_hash="x", role="admin", is_active=True))
+        db.commit()
+        db.close()
+
+        def override_db():
+            session = self.Session()
+            try:
+                yield session
+            finally:
+                session.close()
+
+        async def override_async_db():
+            async with AsyncSession(async_engine, expire_on_commit=False) as session:
+                yield session
+
+        app.dependency_overrides[get_db] = override_db
+        app.dependency_overrides[get_async_db] = override_async_db
+        self.addCleanup(app.dependency_overrides.clear)
+        principal_cache.local.clear()
+        self.addCleanup(principal_cache.local.clear)
+        patcher = mock.patch("app.principals.event_writer")
+        self.event_writer = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = TestClient(app)
+        self.alice = {"Authorization": f"Bearer {create_access_token('alice', 'admin')}"}
+        self.admin = {"Authorization": f"Bearer {create_access_token('admin', 'admin')}"}
+
+    def test_repeated_requests_skip_user_lookup(self):
+        for _ in range(5):
+            r = self.client.get("/api/auth/me", headers=self.alice)
+            self.assertEqual(r.json()["username"], "alice")
+        self.assertEqual(self.user_queries, 1)
+
+    def test_role_change_invalidates_cached_principal(self):
+        self.assertEqual(self.client.get("/api/auth/users", headers=self.alice).status_code, 200)
+        r = self.client.patch("/api/auth/users/2", json={"role": "viewer"}, headers=self.admin)
+        self.assertEqual(r.json()["role"], "viewer")
+        self.assertEqual(self.client.get("/api/auth/users", headers=self.alice).status_code, 403)
+        data, channels, plan_id = self.event_writer.submit.call_args.args
+        self.assertIn('"username": "alice"', data)
+        self.assertEqual(channels, ["oozie_reprocess_events:auth"])
+
+    def test_remote_invalidation_drops_entries(self):
+        self.client.get("/api/auth/me", headers=self.alice)
+        principal_cache.handle('{"event":"user_changed","username":"alice"}')
+        self.client.get("/api/auth/me", headers=self.alice)
+        self.assertEqual(self.user_queries, 2)
+
+    def test_lookup_racing_an_invalidation_is_not_cached(self):
+        user = models.User(id=2, username="alice", role="admin", is_active=True)
+        generation = principal_cache.generation
+        principal_cache.invalidate("alice")
+        principal_cache.put(("alice", 1), user, generation)
+        self.assertIsNone(principal_cache.get(("alice", 1)))
+
+
+if __name__ == "__main__":
+    unittest.main()
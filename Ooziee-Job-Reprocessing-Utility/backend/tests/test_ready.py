@@ -0,0 +1,39 @@
+import tempfile
+import unittest
+from unittest import mock
+
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from app.main import app
+
+
+class TestReady(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp.name}/test.db", poolclass=NullPool)
+        mock.patch("app.main.AsyncSessionLocal", async_sessionmaker(engine)).start()
+        self.redis = mock.AsyncMock()
+        mock.patch("app.main.aioredis.from_url", return_value=self.redis).start()
+        self.addCleanup(mock.patch.stopall)
+        self.client = TestClient(app)
+
+    def test_sqlite_backend_is_ready(self):
+        # The database_backend detail is informational; it used to fail the check.
+        with mock.patch("app.main.engine") as engine:
+            engine.url.get_backend_name.return_value = "sqlite"
+            r = self.client.get("/ready")
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r.json()["checks"], {"database": "ok", "database_backend": "sqlite", "redis": "ok"})
+
+    def test_redis_failure_is_degraded(self):
+        self.redis.ping.side_effect = ConnectionError("down")
+        r = self.client.get("/ready")
+        self.assertEqual(r.status_code, 503)
+        self.assertEqual(r.json()["detail"]["checks"]["redis"], "error: ConnectionError")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,35 @@
+import unittest
+
+from app.scheduling import PlanDemand, allocate
+
+
+class TestAllocate(unittest.TestCase):
+    def test_fair_share_follows_weights(self):
+        demands = [PlanDemand(1, 0, 1, 0, 100), PlanDemand(2, 0, 3, 0, 100)]
+        self.assertEqual(allocate(8, demands), {1: 2, 2: 6})
+
+    def test_fair_share_counts_running_tasks(self):
+        demands = [PlanDemand(1, 0, 1, 4, 100), PlanDemand(2, 0, 1, 0, 100)]
+        self.assertEqual(allocate(6, demands), {1: 1, 2: 5})
+
+    def test_unused_share_goes_to_other_plans(self):
+        demands = [PlanDemand(1, 0, 10, 0, 2), PlanDemand(2, 0, 1, 0, 100)]
+        self.assertEqual(allocate(5, demands), {1: 2, 2: 3})
+        self.assertEqual(allocate(10, [PlanDemand(1, 0, 1, 0, 3)]), {1: 3})
+
+    def test_priority_serves_higher_tiers_first(self):
+        demands = [PlanDemand(1, 0, 5, 0, 100), PlanDemand(2, 10, 1, 0, 3), PlanDemand(3, 10, 1, 0, 3)]
+        self.assertEqual(allocate(4, demands, "priority"), {2: 2, 3: 2})
+        self.assertEqual(allocate(8, demands, "priority"), {2: 3, 3: 3, 1: 2})
+
+    def test_fair_ties_prefer_priority(self):
+        demands = [PlanDemand(1, 0, 1, 0, 5), PlanDemand(2, 1, 1, 0, 5)]
+        self.assertEqual(allocate(1, demands), {2: 1})
+
+    def test_rejects_unknown_policy(self):
+        with self.assertRaises(ValueError):
+            allocate(1, [], "lottery")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -18,6 +18,27 @@ class TestSchemas(unittest.TestCase):
         with self.assertRaises(ValidationError):
             PlanCreate(name="p1", max_concurrency=0)
 
+    def test_plan_coord_batch_size_defaults_to_unbatched(self):
+        self.assertEqual(PlanCreate(name="p1").coord_batch_size, 1)
+        with self.assertRaises(ValidationError):
+            PlanCreate(name="p1", coord_batch_size=0)
+
+    def test_plan_outcome_tracking_is_opt_in(self):
+        self.assertFalse(PlanCreate(name="p1").track_outcome)
+
+    def test_tracked_plan_rejects_coordinator_tasks(self):
+        workflow = {"name": "w1", "type": "workflow", "job_id": "wf-1"}
+        coordinator = {"name": "c1", "type": "coordinator", "job_id": "coord-1", "action": "1"}
+        self.assertEqual(len(PlanCreate(name="p1", track_outcome=True, tasks=[workflow]).tasks), 1)
+        with self.assertRaises(ValidationError):
+            PlanCreate(name="p1", track_outcome=True, tasks=[workflow, coordinator])
+
+    def test_plan_weight_must_be_positive(self):
+        plan = PlanCreate(name="p1")
+        self.assertEqual((plan.priority, plan.weight), (0, 1))
+        with self.assertRaises(ValidationError):
+            PlanCreate(name="p1", weight=0)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import models
+from app.db import Base
+from app.tracking import PollCadence, outcome_for, record_tracked, submitted_page
+
+
+class TestOutcome(unittest.TestCase):
+    def test_end_states(self):
+        self.assertEqual(outcome_for("SUCCEEDED"), "SUCCESS")
+        self.assertEqual(outcome_for("KILLED"), "FAILED")
+        self.assertEqual(outcome_for("DONEWITHERROR"), "FAILED")
+
+    def test_in_progress_states(self):
+        for status in ("PREP", "RUNNING", "SUSPENDED", "RUNNINGWITHERROR", ""):
+            self.assertIsNone(outcome_for(status))
+
+
+class TestTrackedTasks(unittest.TestCase):
+    def setUp(self):
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(engine)
+        self.db = sessionmaker(bind=engine)()
+        self.addCleanup(self.db.close)
+        self.now = datetime(2024, 1, 1, 12, 0)
+        self.db.add(models.Plan(id=1, name="p", status="RUNNING", track_outcome=True))
+        for i in range(1, 6):
+            self.db.add(
+                models.Task(
+                    id=i, plan_id=1, name=f"t{i}", type="workflow", job_id=f"wf-{i}",
+                    status="SUBMITTED", submitted_at=self.now - timedelta(minutes=1),
+                )
+            )
+        self.db.commit()
+
+    def test_pages_in_id_order_and_skips_fresh_submits(self):
+        self.db.query(models.Task).filter(models.Task.id == 2).update({models.Task.submitted_at: self.now})
+        self.db.commit()
+        page = submitted_page(self.db, [1], 0, 2, self.now - timedelta(seconds=5))
+        self.assertEqual([t.id for t in page], [1, 3])
+        page = submitted_page(self.db, [1], 3, 2, self.now - timedelta(seconds=5))
+        self.assertEqual([t.id for t in page], [4, 5])
+
+    def test_records_many_tasks_in_one_update(self):
+        self.db.query(models.Task).filter(models.Task.id == 3).update({models.Task.status: "PENDING"})
+        self.db.commit()
+        changes = {1: ("SUCCEEDED", "SUCCESS"), 2: ("RUNNING", None), 3: ("KILLED", "FAILED")}
+        self.assertEqual(sorted(record_tracked(self.db, changes, self.now)), [1, 2])
+        self.db.commit()
+        rows = {t.id: t for t in self.db.query(models.Task).all()}
+        self.assertEqual((rows[1].status, rows[1].oozie_status, rows[1].ended_at), ("SUCCESS", "SUCCEEDED", self.now))
+        self.assertEqual((rows[2].status, rows[2].oozie_status, rows[2].ended_at), ("SUBMITTED", "RUNNING", None))
+        # Retried in the meantime: left alone.
+        self.assertEqual((rows[3].status, rows[3].oozie_status), ("PENDING", ""))
+
+
+class TestPollCadence(unittest.TestCase):
+    def test_backs_off_while_nothing_changes(self):
+        cadence = PollCadence(5, 60)
+        self.assertTrue(cadence.due("a", now=0))
+        intervals = []
+        for _ in range(6):
+            cadence.polled("a", changed=False, now=0)
+            intervals.append(cadence.interval("a"))
+        self.assertEqual(intervals, [10, 20, 40, 60, 60, 60])
+        self.assertFalse(cadence.due("a", now=59))
+        self.assertTrue(cadence.due("a", now=60))
+
+    def test_change_or_reset_returns_to_fast_cadence(self):
+        cadence = PollCadence(5, 60)
+        cadence.polled("a", changed=False, now=0)
+        cadence.polled("a", changed=True, now=0)
+        self.assertEqual(cadence.interval("a"), 5)
+        cadence.polled("a", changed=False, now=0)
+        cadence.reset("a")
+        self.assertTrue(cadence.due("a", now=0))
+
+    def test_next_due_in_tracks_earliest_key(self):
+        cadence = PollCadence(5, 60)
+        self.assertEqual(cadence.next_due_in(now=0), 60)
+        cadence.polled("a", changed=True, now=0)
+        cadence.polled("b", changed=False, now=0)
+        self.assertEqual(cadence.next_due_in(now=1), 4)
+        cadence.forget_except({"b"})
+        self.assertEqual(cadence.next_due_in(now=1), 9)
+
+
+if __name__ == "__main__":
+    unittest.main()
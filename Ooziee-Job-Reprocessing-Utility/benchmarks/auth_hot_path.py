@@ -0,0 +1,90 @@
+"""Micro-benchmark for principal resolution on authenticated requests.
+
+Times ``get_current_user`` against a file-backed SQLite database with the
+principal cache disabled (one ``users`` lookup per request) and enabled.
+
+    python benchmarks/auth_hot_path.py --iterations 20000
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "backend")))
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.ext.asyncio import async_sessionmaker  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app import models  # noqa: E402
+from app.auth import create_access_token, get_current_user  # noqa: E402
+from app.db import Base, build_async_engine  # noqa: E402
+from app.principals import principal_cache  # noqa: E402
+from app.settings import settings  # noqa: E402
+
+
+async def run(AsyncSession, token: str, iterations: int) -> dict:
+    principal_cache.local.clear()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        async with AsyncSession() as db:
+            await get_current_user(db=db, token=token)
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    total = sum(samples)
+    return {
+        "iterations": iterations,
+        "requests_per_second": round(iterations / total, 1),
+        "p50_us": round(samples[len(samples) // 2] * 1e6, 1),
+        "p99_us": round(samples[int(len(samples) * 0.99)] * 1e6, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=5000)
+    parser.add_argument("--db-url", default="", help="defaults to a temporary SQLite file")
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp()
+    db_url = args.db_url or f"sqlite:///{os.path.join(tmpdir, 'auth_bench.db')}"
+    engine = create_engine(db_url)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine)
+    db = Session()
+    if not db.query(models.User).filter(models.User.username == "bench").first():
+        db.add(models.User(username="bench", password_hash="x", role="viewer", is_active=True))
+        db.commit()
+    db.close()
+
+    token = create_access_token("bench", "viewer")
+    async_engine = build_async_engine(db_url)
+    AsyncSession = async_sessionmaker(async_engine, expire_on_commit=False)
+    ttl = settings.auth_cache_ttl
+    try:
+        settings.auth_cache_ttl = 0
+        uncached = asyncio.run(run(AsyncSession, token, args.iterations))
+        settings.auth_cache_ttl = ttl or 30.0
+        principal_cache.local.ttl = settings.auth_cache_ttl
+        cached = asyncio.run(run(AsyncSession, token, args.iterations))
+    finally:
+        settings.auth_cache_ttl = ttl
+    print(
+        json.dumps(
+            {
+                "db_url": db_url,
+                "uncached": uncached,
+                "cached": cached,
+                "speedup": round(cached["requests_per_second"] / uncached["requests_per_second"], 2),
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Local stand-in for the Oozie v2 REST API.
+
+Answers the calls the worker and API make (``PUT v2/job/{id}`` reruns,
+``GET v2/job/{id}`` and bulk ``GET v2/jobs``) with configurable latency,
+error rate and response size. Every job reports SUCCEEDED.
+
+    python benchmarks/fake_oozie_server.py --port 11000 --latency-ms 50 --error-rate 0.01
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+JOBS_FIELDS = {"wf": ("workflows", "id"), "coordinator": ("coordinatorjobs", "coordJobId"), "bundle": ("bundlejobs", "bundleJobId")}
+
+
+class FakeOozieServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port: int, latency_ms: float = 0, jitter_ms: float = 0, error_rate: float = 0, output_bytes: int = 0):
+        super().__init__(("127.0.0.1", port), FakeOozieHandler)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.padding = "x" * max(0, output_bytes)
+        self.requests = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/oozie"
+
+    def start(self) -> "FakeOozieServer":
+        threading.Thread(target=self.serve_forever, name="fake-oozie", daemon=True).start()
+        return self
+
+
+class FakeOozieHandler(BaseHTTPRequestHandler):
+    server: FakeOozieServer
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def _respond(self, status: int, payload: dict) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _delay_or_fail(self) -> bool:
+        srv = self.server
+        delay = srv.latency_ms + random.uniform(0, srv.jitter_ms)
+        if delay > 0:
+            time.sleep(delay / 1000.0)
+        failed = random.random() < srv.error_rate
+        with srv._lock:
+            srv.requests += 1
+            srv.errors += failed
+        if failed:
+            self._respond(503, {"error": "Service Unavailable"})
+        return failed
+
+    def do_PUT(self) -> None:
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if self._delay_or_fail():
+            return
+        job_id = urlparse(self.path).path.rsplit("/", 1)[-1]
+        self._respond(200, {"id": job_id, "status": "RUNNING", "output": self.server.padding})
+
+    def do_GET(self) -> None:
+        if self._delay_or_fail():
+            return
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        if url.path.endswith("/v2/jobs"):
+            list_key, id_key = JOBS_FIELDS[query.get("jobtype", ["wf"])[0]]
+            ids = [part.split("=", 1)[1] for part in query.get("filter", [""])[0].split(";") if part.startswith("id=")]
+            self._respond(200, {list_key: [{id_key: job_id, "status": "SUCCEEDED"} for job_id in ids], "total": len(ids)})
+            return
+        job_id = url.path.rsplit("/", 1)[-1]
+        self._respond(200, {"id": job_id, "status": "SUCCEEDED", "actions": [], "output": self.server.padding})
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=11000)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--output-bytes", type=int, default=0)
+    args = parser.parse_args()
+    server = FakeOozieServer(args.port, args.latency_ms, args.jitter_ms, args.error_rate, args.output_bytes)
+    print(json.dumps({"url": server.url}), flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
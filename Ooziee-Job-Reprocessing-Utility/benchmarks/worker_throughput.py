@@ -0,0 +1,331 @@
+"""Offline throughput benchmark for worker/runner.py.
+
+Seeds plans of N tasks, runs the real worker loop against a local fake
+Oozie server (``--mode rest``) or the fake ``oozie`` CLI (``--mode cli``)
+and reports tasks/sec, p50/p99 dispatch latency, DB queries per task and
+peak RSS as JSON. Options marked "list" take comma-separated values; every
+combination runs in its own process, so worker settings read at import
+time apply and RSS is measured per run.
+
+    python benchmarks/worker_throughput.py --tasks 2000 --threads 8,32 --max-concurrency 16 \\
+        --mode cli,rest --latency-ms 20 --output results.json
+    python benchmarks/worker_throughput.py --db-url 'mysql+pymysql://u:p@127.0.0.1/bench?charset=utf8mb4'
+
+Dispatch latency is the time from a concurrency slot freeing up (or the
+run starting, for the first ``max_concurrency`` tasks of a plan) to the
+next task of that plan starting on the worker.
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, List
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, os.path.join(ROOT, "backend"))
+sys.path.insert(0, HERE)
+
+
+def _list(cast):
+    return lambda value: [cast(part) for part in value.split(",") if part.strip()]
+
+
+def _peak_rss_mb(who: int) -> float:
+    peak = resource.getrusage(who).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _percentile(samples: List[float], q: float) -> float:
+    if not samples:
+        return 0.0
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+
+def dispatch_latencies(starts: List[float], finishes: List[float], cap: int, t0: float) -> List[float]:
+    """Per-task wait between a free slot and the task starting, for one plan."""
+    starts, finishes = sorted(starts), sorted(finishes)
+    latencies = []
+    for k, started in enumerate(starts):
+        freed = t0 if k < cap else finishes[k - cap] if k - cap < len(finishes) else started
+        latencies.append(max(0.0, started - freed))
+    return latencies
+
+
+def seed(engine, cfg: Dict[str, Any]) -> List[int]:
+    from sqlalchemy import insert
+    from sqlalchemy.orm import sessionmaker
+
+    from app.models import Plan, Task
+
+    db = sessionmaker(bind=engine)()
+    try:
+        plan_ids = []
+        per_plan = max(1, cfg["tasks"] // cfg["plans"])
+        for p in range(cfg["plans"]):
+            plan = Plan(
+                name=f"bench-{p}",
+                status="DRAFT",
+                use_rest=cfg["mode"] == "rest",
+                max_concurrency=cfg["max_concurrency"],
+                coord_batch_size=1,
+                created_by="benchmark",
+            )
+            db.add(plan)
+            db.flush()
+            plan_ids.append(plan.id)
+            rows = [
+                {
+                    "plan_id": plan.id,
+                    "name": f"t{i}",
+                    "type": "workflow",
+                    "job_id": f"{i:07d}-000000000000000-oozie-oozi-W",
+                    "wf_failnodes": True,
+                    "status": "PENDING",
+                    "attempt": 0,
+                    "extra_props": {},
+                }
+                for i in range(per_plan)
+            ]
+            for i in range(0, len(rows), 1000):
+                db.execute(insert(Task), rows[i:i + 1000])
+        db.commit()
+        return plan_ids
+    finally:
+        db.close()
+
+
+def cleanup(engine, plan_ids: List[int]) -> None:
+    from sqlalchemy import delete, select
+
+    from app.models import Plan, Task, TaskOutput
+
+    with engine.begin() as conn:
+        task_ids = select(Task.id).where(Task.plan_id.in_(plan_ids)).scalar_subquery()
+        conn.execute(delete(TaskOutput).where(TaskOutput.task_id.in_(task_ids)))
+        conn.execute(delete(Task).where(Task.plan_id.in_(plan_ids)))
+        conn.execute(delete(Plan).where(Plan.id.in_(plan_ids)))
+
+
+def public_config(cfg: Dict[str, Any]) -> Dict[str, Any]:
+    """The run's config as written to the results, without the database password."""
+    from sqlalchemy.engine import make_url
+
+    public = {k: v for k, v in cfg.items() if k not in ("oozie_url", "keep")}
+    public["db_url"] = make_url(cfg["db_url"]).render_as_string(hide_password=True)
+    return public
+
+
+def run_one(cfg: Dict[str, Any]) -> Dict[str, Any]:
+    """Run one configuration in this process and return its measurements."""
+    os.environ.update(
+        {
+            "DB_URL": cfg["db_url"],
+            "OOZIE_BIN": os.path.join(HERE, "fake_oozie"),
+            "OOZIE_DEFAULT_URL": cfg["oozie_url"],
+            "WORKER_ENGINE": cfg["engine"],
+            "WORKER_MAX_THREADS": str(cfg["threads"]),
+            "WORKER_POLL_SECONDS": str(cfg["poll_seconds"]),
+            "WORKER_EVENT_DRIVEN": "true" if cfg["event_driven"] else "false",
+            "WORKER_METRICS_PORT": "0",
+            "OOZIE_LIMIT_ENABLED": "true" if cfg["limiter"] else "false",
+            "FAKE_OOZIE_LATENCY_MS": str(cfg["latency_ms"]),
+            "FAKE_OOZIE_JITTER_MS": str(cfg["jitter_ms"]),
+            "FAKE_OOZIE_ERROR_RATE": str(cfg["error_rate"]),
+            "FAKE_OOZIE_OUTPUT_BYTES": str(cfg["output_bytes"]),
+            "REST_FALLBACK_TO_CLI": "false",
+            "LOG_LEVEL": "ERROR",
+        }
+    )
+    sys.path.insert(0, os.path.join(ROOT, "worker"))
+    from sqlalchemy import create_engine, event, func, update
+
+    import runner  # noqa: E402
+    from app.db import Base
+    from app.models import Plan, Task
+
+    Base.metadata.create_all(runner.ENGINE)
+    monitor = create_engine(cfg["db_url"])
+    plan_ids = seed(monitor, cfg)
+
+    queries = [0]
+
+    def count(*_args):
+        queries[0] += 1
+
+    event.listen(runner.ENGINE, "before_cursor_execute", count)
+
+    starts: Dict[int, List[float]] = defaultdict(list)
+    finishes: Dict[int, List[float]] = defaultdict(list)
+    publish = runner.publish
+
+    def timed_publish(evt: dict, sequenced: bool = True) -> None:
+        if evt.get("event") == "task_started":
+            starts[evt["plan_id"]].append(time.perf_counter())
+        elif evt.get("event") in ("task_finished", "task_submitted"):
+            finishes[evt["plan_id"]].append(time.perf_counter())
+        publish(evt, sequenced)
+
+    runner.publish = timed_publish
+    rss_before = _peak_rss_mb(resource.RUSAGE_SELF)
+
+    with monitor.begin() as conn:
+        conn.execute(update(Plan).where(Plan.id.in_(plan_ids)).values(status="RUNNING"))
+    t0 = time.perf_counter()
+    worker = threading.Thread(target=runner.main_loop, name="bench-worker")
+    worker.start()
+
+    deadline = t0 + cfg["timeout"]
+    while time.perf_counter() < deadline:
+        with monitor.connect() as conn:
+            running = conn.execute(
+                func.count(Plan.id).select().where(Plan.id.in_(plan_ids), Plan.status == "RUNNING")
+            ).scalar()
+        if not running:
+            break
+        time.sleep(0.05)
+    elapsed = time.perf_counter() - t0
+    timed_out = bool(running)
+
+    runner._handle_signal(15, None)
+    worker.join(60)
+
+    with monitor.connect() as conn:
+        statuses = dict(
+            conn.execute(
+                Task.__table__.select()
+                .with_only_columns(Task.status, func.count(Task.id))
+                .where(Task.plan_id.in_(plan_ids))
+                .group_by(Task.status)
+            ).all()
+        )
+    if not cfg["keep"]:
+        cleanup(monitor, plan_ids)
+
+    total = sum(statuses.values())
+    finished = sum(len(v) for v in finishes.values())
+    latencies = [
+        lat for plan_id in plan_ids for lat in dispatch_latencies(starts[plan_id], finishes[plan_id], cfg["max_concurrency"], t0)
+    ]
+    return {
+        "config": public_config(cfg),
+        "tasks": total,
+        "statuses": statuses,
+        "timed_out": timed_out,
+        "elapsed_seconds": round(elapsed, 3),
+        "tasks_per_second": round(finished / elapsed, 2) if elapsed else 0.0,
+        "dispatch_latency_ms": {
+            "p50": round(_percentile(latencies, 0.50) * 1000, 2),
+            "p99": round(_percentile(latencies, 0.99) * 1000, 2),
+            "max": round(max(latencies, default=0.0) * 1000, 2),
+        },
+        "db_queries": queries[0],
+        "db_queries_per_task": round(queries[0] / total, 2) if total else 0.0,
+        "peak_rss_mb": _peak_rss_mb(resource.RUSAGE_SELF),
+        "rss_before_run_mb": rss_before,
+        "peak_child_rss_mb": _peak_rss_mb(resource.RUSAGE_CHILDREN),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=1000, help="tasks per run, split across plans")
+    parser.add_argument("--plans", type=int, default=1)
+    parser.add_argument("--max-concurrency", type=_list(int), default=[16], help="list")
+    parser.add_argument("--threads", type=_list(int), default=[32], help="WORKER_MAX_THREADS, list")
+    parser.add_argument("--poll-seconds", type=_list(int), default=[3], help="WORKER_POLL_SECONDS, list")
+    parser.add_argument("--engine", type=_list(str), default=["threads"], help="threads|asyncio, list")
+    parser.add_argument("--mode", type=_list(str), default=["cli"], help="cli|rest, list")
+    parser.add_argument("--db-url", action="append", default=[], help="repeatable; defaults to a temporary SQLite file")
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--output-bytes", type=int, default=200)
+    parser.add_argument("--no-event-driven", action="store_true", help="poll instead of waking on Redis events")
+    parser.add_argument("--limiter", action="store_true", help="keep the per-Oozie-server limiter on (needs Redis)")
+    parser.add_argument("--timeout", type=float, default=600, help="seconds per run")
+    parser.add_argument("--keep", action="store_true", help="keep seeded plans and tasks")
+    parser.add_argument("--output", default="", help="write JSON here as well as to stdout")
+    parser.add_argument("--verbose", action="store_true", help="show worker logs")
+    parser.add_argument("--run-one", default="", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_one:
+        print(json.dumps(run_one(json.loads(args.run_one))))
+        return
+
+    from fake_oozie_server import FakeOozieServer
+
+    server = FakeOozieServer(0, args.latency_ms, args.jitter_ms, args.error_rate, args.output_bytes).start()
+    tmpdir = tempfile.mkdtemp(prefix="worker-bench-")
+    db_urls = args.db_url or [f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"]
+
+    runs = []
+    combos = itertools.product(db_urls, args.mode, args.engine, args.threads, args.max_concurrency, args.poll_seconds)
+    for db_url, mode, engine, threads, max_concurrency, poll_seconds in combos:
+        cfg = {
+            "db_url": db_url,
+            "db_backend": db_url.split(":", 1)[0],
+            "mode": mode,
+            "engine": engine,
+            "threads": threads,
+            "max_concurrency": max_concurrency,
+            "poll_seconds": poll_seconds,
+            "tasks": args.tasks,
+            "plans": args.plans,
+            "latency_ms": args.latency_ms,
+            "jitter_ms": args.jitter_ms,
+            "error_rate": args.error_rate,
+            "output_bytes": args.output_bytes,
+            "event_driven": not args.no_event_driven,
+            "limiter": args.limiter,
+            "timeout": args.timeout,
+            "keep": args.keep,
+            "oozie_url": server.url,
+        }
+        requests_before = server.requests
+        proc = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--run-one", json.dumps(cfg)],
+            stdout=subprocess.PIPE,
+            stderr=None if args.verbose else subprocess.DEVNULL,
+            text=True,
+        )
+        if proc.returncode != 0:
+            runs.append({"config": public_config(cfg), "error": f"run exited with {proc.returncode}"})
+            continue
+        result = json.loads(proc.stdout.strip().splitlines()[-1])
+        result["oozie_http_requests"] = server.requests - requests_before
+        runs.append(result)
+        print(
+            f"{mode:4} {engine:7} threads={threads:<4} cap={max_concurrency:<4} poll={poll_seconds}s "
+            f"{cfg['db_backend']}: "
+            f"{result['tasks_per_second']} tasks/s, p99 dispatch {result['dispatch_latency_ms']['p99']} ms",
+            file=sys.stderr,
+        )
+
+    report = {
+        "benchmark": "worker_throughput",
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "runs": runs,
+    }
+    text = json.dumps(report, indent=2, default=str)
+    if args.output:
+        with open(args.output, "w") as fh:
+            fh.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
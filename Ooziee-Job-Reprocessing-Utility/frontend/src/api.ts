@@ -23,10 +23,29 @@ async function http(path: string, opts: RequestInit = {}) {
   return r.json();
 }
 
-export const apiGetPlans = () => http('/api/plans');
-export const apiGetPlan  = (id:number) => http(`/api/plans/${id}`);
+function query(params: Record<string, string|number|undefined|null>): string {
+  const q = new URLSearchParams();
+  for (const [k, v] of Object.entries(params)) {
+    if (v !== undefined && v !== null && v !== '') q.append(k, String(v));
+  }
+  const s = q.toString();
+  return s ? `?${s}` : '';
+}
+
+export const apiGetPlans = (beforeId?:number|null) => http(`/api/plans${query({before_id: beforeId})}`);
+export const apiGetPlan  = (id:number, opts:{status?:string; afterId?:number|null} = {}) =>
+  http(`/api/plans/${id}${query({status: opts.status, after_id: opts.afterId})}`);
 export const apiCreatePlan = (payload:any) => http('/api/plans', {method:'POST', body: JSON.stringify(payload)});
 export const apiPlanAction = (id:number, a:'start'|'pause'|'resume'|'stop') => http(`/api/plans/${id}/${a}`, {method:'POST', body:'{}'});
+export const apiImportTasks = (id:number, file:File) => {
+  const isCsv = file.name.toLowerCase().endsWith('.csv') || file.type === 'text/csv';
+  return http(`/api/plans/${id}/tasks/import`, {
+    method:'POST',
+    body: file,
+    headers: {'Content-Type': isCsv ? 'text/csv' : 'application/x-ndjson'},
+  });
+};
+export const apiTaskOutput = (id:number) => http(`/api/tasks/${id}/output`);
 export const apiTaskAction = (id:number, a:'cancel'|'retry') => http(`/api/tasks/${id}/${a}`, {method:'POST', body:'{}'});
 export const oozieJobInfo = (planId:number, jobId:string) => http(`/api/oozie/job/${encodeURIComponent(jobId)}?plan_id=${planId}`);
 
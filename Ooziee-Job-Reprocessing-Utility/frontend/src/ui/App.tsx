@@ -1,8 +1,15 @@
-import React, { useEffect, useState } from 'react'
-import { apiCreatePlan, apiGetPlan, apiGetPlans, apiLogin, apiPlanAction, apiTaskAction, oozieJobInfo, wsUrl } from '../api'
+import React, { useEffect, useRef, useState } from 'react'
+import { apiCreatePlan, apiGetPlan, apiGetPlans, apiImportTasks, apiLogin, apiPlanAction, apiTaskAction, apiTaskOutput, oozieJobInfo, wsUrl } from '../api'
+
+const LIVE_LOG_MAX = 20000;
+const WS_RETRY_MS = 2000;
+
+type LiveLog = {stdout:string; stderr:string};
+
+type TaskOutput = {task_id:number; status:string; stdout:string; stderr:string; version?:string};
 
 type Plan = {
-  id:number; name:string; description:string; status:string; oozie_url:string; use_rest:boolean; max_concurrency:number;
+  id:number; name:string; description:string; status:string; oozie_url:string; use_rest:boolean; max_concurrency:number; coord_batch_size?:number; track_outcome?:boolean; priority?:number; weight?:number;
   created_by:string; created_at:string; updated_at:string;
 }
 
@@ -54,7 +61,11 @@ function PlanCreate({onCreated}:{onCreated:(p:any)=>void}) {
   const [name,setName] = useState('Sample Plan');
   const [oozieUrl,setOozieUrl] = useState('http://10.X.X.X:11000/oozie');
   const [maxConc,setMaxConc] = useState(2);
+  const [batchSize,setBatchSize] = useState(1);
   const [useRest,setUseRest] = useState(false);
+  const [trackOutcome,setTrackOutcome] = useState(false);
+  const [priority,setPriority] = useState(0);
+  const [weight,setWeight] = useState(1);
   const [tasks,setTasks] = useState<any[]>([
     {name:'wf-failed-only', type:'workflow', job_id:'0000000-000000000000000-oozie-oozi-W', wf_failnodes:true, wf_skip_nodes:'', refresh:false, failed:false, action:'', date:'', coordinator:'', extra_props:{}}
   ]);
@@ -72,7 +83,7 @@ function PlanCreate({onCreated}:{onCreated:(p:any)=>void}) {
   async function create(){
     setErr(null);
     try{
-      const payload = {name, oozie_url: oozieUrl, max_concurrency:maxConc, use_rest:useRest, tasks};
+      const payload = {name, oozie_url: oozieUrl, max_concurrency:maxConc, coord_batch_size:batchSize, use_rest:useRest, track_outcome:trackOutcome, priority, weight, tasks};
       const p = await apiCreatePlan(payload);
       onCreated(p);
     }catch(ex:any){
@@ -98,12 +109,30 @@ function PlanCreate({onCreated}:{onCreated:(p:any)=>void}) {
           <label className="muted">Max Concurrency</label>
           <input className="input" type="number" value={maxConc} onChange={e=>setMaxConc(parseInt(e.target.value||'1'))}/>
         </div>
+        <div className="col">
+          <label className="muted">Coordinator batch size</label>
+          <input className="input" type="number" min={1} value={batchSize} onChange={e=>setBatchSize(parseInt(e.target.value||'1'))}/>
+        </div>
+        <div className="col">
+          <label className="muted">Priority</label>
+          <input className="input" type="number" min={-100} max={100} value={priority} onChange={e=>setPriority(parseInt(e.target.value||'0'))}/>
+        </div>
+        <div className="col">
+          <label className="muted">Weight</label>
+          <input className="input" type="number" min={1} value={weight} onChange={e=>setWeight(parseInt(e.target.value||'1'))}/>
+        </div>
         <div className="col">
           <label className="muted">Use REST rerun</label>
           <div style={{marginTop:10}}>
             <input type="checkbox" checked={useRest} onChange={e=>setUseRest(e.target.checked)} /> <span className="muted">Use Oozie REST rerun (fallback to CLI)</span>
           </div>
         </div>
+        <div className="col">
+          <label className="muted">Track Oozie outcome</label>
+          <div style={{marginTop:10}}>
+            <input type="checkbox" checked={trackOutcome} onChange={e=>setTrackOutcome(e.target.checked)} /> <span className="muted">Wait for reruns to finish in Oozie (workflow tasks only)</span>
+          </div>
+        </div>
       </div>
 
       <div style={{marginTop:12}}>
@@ -173,37 +202,170 @@ function PlanCreate({onCreated}:{onCreated:(p:any)=>void}) {
   )
 }
 
+// Apply one sequenced event to a plan detail snapshot. Returns null when the
+// change cannot be applied locally and a fresh snapshot is needed instead.
+function applyPlanEvent(d:any, e:any, statusFilter:string): any|null {
+  if(e.resync) return null;
+  const next = {...d, seq: e.seq};
+  if(e.plan) next.plan = {...d.plan, ...e.plan};
+  if(e.task){
+    const tasks:any[] = d.tasks || [];
+    const idx = tasks.findIndex(t=>t.id === e.task.id);
+    const prev = idx >= 0 ? tasks[idx].status : e.prev_status;
+    const status = e.task.status;
+    if(status && prev !== status){
+      const counts = {...(d.counts || {})};
+      if(prev) counts[prev] = Math.max(0, (counts[prev] || 0) - 1);
+      counts[status] = (counts[status] || 0) + 1;
+      next.counts = counts;
+    }
+    const matches = !statusFilter || status === statusFilter;
+    if(idx >= 0){
+      next.tasks = matches
+        ? tasks.map((t,i)=> i === idx ? {...t, ...e.task} : t)
+        : tasks.filter((_,i)=> i !== idx);
+    }else if(matches && statusFilter){
+      // The task just entered the filtered view and we only have its changed fields.
+      return null;
+    }
+  }
+  return next;
+}
+
 function PlanDetails({planId, onBack}:{planId:number; onBack:()=>void}) {
   const [data,setData] = useState<any>(null);
   const [err,setErr] = useState<string|null>(null);
+  const [statusFilter,setStatusFilter] = useState('');
+  const [live,setLive] = useState<Record<number, LiveLog>>({});
+  const [outputs,setOutputs] = useState<Record<number, TaskOutput>>({});
   const role = localStorage.getItem('role') || 'viewer';
 
+  function appendLive(taskId:number, stream:'stdout'|'stderr', chunk:string){
+    setLive(prev=>{
+      const cur = prev[taskId] || {stdout:'', stderr:''};
+      const next = (cur[stream] + chunk).slice(-LIVE_LOG_MAX);
+      return {...prev, [taskId]: {...cur, [stream]: next}};
+    });
+  }
+
+  // Events carry per-plan seq numbers. dataRef mirrors the latest state so
+  // WebSocket handlers can check for gaps without waiting for a render.
+  const dataRef = useRef<any>(null);
+  const resyncing = useRef(false);
+  const buffered = useRef<any[]>([]);
+  const lastIdRef = useRef<string|null>(null);
+
+  function commit(d:any){
+    dataRef.current = d;
+    setData(d);
+  }
+
+  function handleEvent(e:any){
+    if(resyncing.current){
+      buffered.current.push(e);
+      return;
+    }
+    const d = dataRef.current;
+    if(!d || typeof e.seq !== 'number' || e.seq <= d.seq) return;
+    const next = e.seq === d.seq + 1 ? applyPlanEvent(d, e, statusFilter) : null;
+    if(next) commit(next);
+    else refresh();
+  }
+
   async function refresh(){
+    if(resyncing.current) return;
+    resyncing.current = true;
     try{
-      const d = await apiGetPlan(planId);
-      setData(d);
+      commit(await apiGetPlan(planId, {status: statusFilter}));
       setErr(null);
     }catch(ex:any){
       setErr(String(ex?.message||ex));
+    }finally{
+      resyncing.current = false;
     }
+    const pending = buffered.current;
+    buffered.current = [];
+    for(const e of pending) handleEvent(e);
   }
 
-  useEffect(()=>{ refresh(); }, [planId]);
+  async function loadMore(){
+    const cur = dataRef.current;
+    if(!cur?.next_cursor) return;
+    try{
+      const d = await apiGetPlan(planId, {status: statusFilter, afterId: cur.next_cursor});
+      // Keep the delta-maintained seq and counts; only extend the task list.
+      const latest = dataRef.current;
+      commit({...latest, tasks: [...latest.tasks, ...d.tasks], next_cursor: d.next_cursor});
+    }catch(ex:any){
+      setErr(String(ex?.message||ex));
+    }
+  }
 
   useEffect(()=>{
-    const url = wsUrl();
-    const ws = new WebSocket(url);
-    ws.onopen = ()=>{ ws.send('ping'); };
-    ws.onmessage = (m)=>{
-      try{
-        const e = JSON.parse(m.data);
-        if(e.plan_id === planId){
-          refresh();
-        }
-      }catch{}
+    dataRef.current = null;
+    buffered.current = [];
+    refresh();
+  }, [planId, statusFilter]);
+
+  useEffect(()=>{
+    // Reconnect after drops and ask the server to replay what we missed
+    // since the last event id we saw.
+    const topic = `plan:${planId}`;
+    let ws:WebSocket|null = null;
+    let disposed = false;
+    let retry:any = null;
+    lastIdRef.current = null;
+
+    const open = ()=>{
+      const sock = new WebSocket(wsUrl());
+      ws = sock;
+      sock.onopen = ()=>{
+        // Follow only this plan; the summary feed is for the plan list.
+        const sub:any = {op:'subscribe', topics:[topic]};
+        if(lastIdRef.current) sub.since = {[topic]: lastIdRef.current};
+        sock.send(JSON.stringify(sub));
+        sock.send(JSON.stringify({op:'unsubscribe', topics:['plans']}));
+      };
+      sock.onmessage = (m)=>{
+        try{
+          const e = JSON.parse(m.data);
+          if(e.event === 'replay_truncated'){
+            if(e.topic === topic) refresh();
+            return;
+          }
+          if(e.plan_id !== planId) return;
+          if(e.id) lastIdRef.current = e.id;
+          if(e.event === 'task_log'){
+            appendLive(e.task_id, e.stream === 'stderr' ? 'stderr' : 'stdout', e.data || '');
+            return;
+          }
+          handleEvent(e);
+        }catch{}
+      };
+      sock.onclose = ()=>{
+        if(!disposed) retry = setTimeout(open, WS_RETRY_MS);
+      };
     };
-    return ()=>ws.close();
-  }, [planId]);
+    open();
+    return ()=>{
+      disposed = true;
+      clearTimeout(retry);
+      ws?.close();
+    };
+  }, [planId, statusFilter]);
+
+  const logTasks:any[] = (data?.tasks || []).slice(-3).reverse();
+
+  useEffect(()=>{
+    // Output is not part of plan detail; fetch it lazily for the tasks shown below.
+    for(const t of logTasks){
+      if(t.status === 'RUNNING' || t.status === 'PENDING') continue;
+      if(outputs[t.id]?.version === t.ended_at) continue;
+      apiTaskOutput(t.id)
+        .then((o:TaskOutput)=>setOutputs(prev=>({...prev, [t.id]: {...o, version: t.ended_at}})))
+        .catch(()=>{});
+    }
+  }, [data]);
 
   async function doPlanAction(a:'start'|'pause'|'resume'|'stop'){
     await apiPlanAction(planId,a);
@@ -214,6 +376,19 @@ function PlanDetails({planId, onBack}:{planId:number; onBack:()=>void}) {
     await refresh();
   }
 
+  async function importTasks(file:File|undefined){
+    if(!file) return;
+    try{
+      const r = await apiImportTasks(planId, file);
+      const lines = (r.errors || []).map((e:any)=>`line ${e.row}: ${e.error}`);
+      if(r.errors_truncated) lines.push('...');
+      alert([`Imported ${r.inserted} task(s), ${r.failed} rejected.`, ...lines].join('\n'));
+      await refresh();
+    }catch(ex:any){
+      alert(String(ex?.message||ex));
+    }
+  }
+
   async function showOozie(jobId:string){
     try{
       const info = await oozieJobInfo(planId, jobId);
@@ -228,8 +403,9 @@ function PlanDetails({planId, onBack}:{planId:number; onBack:()=>void}) {
 
   const plan:Plan = data.plan;
   const tasks:any[] = data.tasks || [];
-  const total = tasks.length;
-  const done = tasks.filter(t=>['SUCCESS','FAILED','CANCELED','SKIPPED'].includes(t.status)).length;
+  const counts:Record<string, number> = data.counts || {};
+  const total = Object.values(counts).reduce((a,b)=>a+b, 0);
+  const done = ['SUCCESS','FAILED','CANCELED','SKIPPED'].reduce((a,s)=>a+(counts[s]||0), 0);
   const pct = total ? Math.round((done/total)*100) : 0;
 
   return (
@@ -239,7 +415,7 @@ function PlanDetails({planId, onBack}:{planId:number; onBack:()=>void}) {
           <div>
             <button className="btn secondary" onClick={onBack}>← Back</button>
             <h2 style={{margin:'10px 0 0 0'}}>{plan.name}</h2>
-            <div className="muted">Status: <span className="badge">{plan.status}</span> • Progress: {done}/{total} ({pct}%) • Concurrency: {plan.max_concurrency}</div>
+            <div className="muted">Status: <span className="badge">{plan.status}</span> • Progress: {done}/{total} ({pct}%) • Concurrency: {plan.max_concurrency} • Priority: {plan.priority ?? 0} • Weight: {plan.weight ?? 1}{(plan.coord_batch_size||1) > 1 ? ` • Coordinator batches of ${plan.coord_batch_size}` : ''}{plan.track_outcome ? ` • Tracking Oozie outcome (${counts['SUBMITTED']||0} submitted)` : ''}</div>
           </div>
           <div style={{display:'flex', gap:8}}>
             <button className="btn" disabled={role!=='admin'} onClick={()=>doPlanAction('start')}>Start</button>
@@ -251,7 +427,22 @@ function PlanDetails({planId, onBack}:{planId:number; onBack:()=>void}) {
       </div>
 
       <div className="card">
-        <h3>Tasks</h3>
+        <div className="topbar">
+          <h3 style={{margin:0}}>Tasks</h3>
+          {role==='admin' && (
+            <label className="btn secondary">
+              Import NDJSON/CSV
+              <input type="file" accept=".ndjson,.jsonl,.csv" style={{display:'none'}}
+                onChange={e=>{ importTasks(e.target.files?.[0]); e.target.value=''; }} />
+            </label>
+          )}
+          <select className="input" style={{maxWidth:200}} value={statusFilter} onChange={e=>setStatusFilter(e.target.value)}>
+            <option value="">All statuses</option>
+            {['PENDING','RUNNING','SUBMITTED','SUCCESS','FAILED','CANCELED','SKIPPED'].map(s=>(
+              <option key={s} value={s}>{s} ({counts[s]||0})</option>
+            ))}
+          </select>
+        </div>
         <table className="table">
           <thead>
             <tr>
@@ -265,7 +456,7 @@ function PlanDetails({planId, onBack}:{planId:number; onBack:()=>void}) {
                 <td>{t.name}</td>
                 <td><span className="badge">{t.type}</span></td>
                 <td style={{maxWidth:340}}>{t.job_id}</td>
-                <td><span className="badge">{t.status}</span></td>
+                <td><span className="badge">{t.status}</span>{t.oozie_status ? <span className="muted"> {t.oozie_status}</span> : null}</td>
                 <td>{t.exit_code ?? ''}</td>
                 <td>
                   <div style={{display:'flex', gap:6, flexWrap:'wrap'}}>
@@ -278,21 +469,26 @@ function PlanDetails({planId, onBack}:{planId:number; onBack:()=>void}) {
             ))}
           </tbody>
         </table>
+        {data.next_cursor && (
+          <div style={{marginTop:10}}>
+            <button className="btn secondary" onClick={loadMore}>Load more tasks</button>
+          </div>
+        )}
 
         <h4 style={{marginTop:16}}>Task Logs (latest)</h4>
-        {tasks.slice(-3).reverse().map(t=>(
+        {logTasks.map(t=>(
           <div key={t.id} className="card">
             <div className="muted">Task #{t.id} • {t.name} • {t.status}</div>
             <div className="muted">Command:</div>
             <pre>{t.command || ''}</pre>
             <div className="row">
               <div className="col">
-                <div className="muted">stdout</div>
-                <pre>{t.stdout || ''}</pre>
+                <div className="muted">stdout{t.status === 'RUNNING' ? ' (live)' : ''}</div>
+                <pre>{t.status === 'RUNNING' ? (live[t.id]?.stdout || '') : (outputs[t.id]?.stdout || '')}</pre>
               </div>
               <div className="col">
-                <div className="muted">stderr</div>
-                <pre>{t.stderr || ''}</pre>
+                <div className="muted">stderr{t.status === 'RUNNING' ? ' (live)' : ''}</div>
+                <pre>{t.status === 'RUNNING' ? (live[t.id]?.stderr || '') : (outputs[t.id]?.stderr || '')}</pre>
               </div>
             </div>
           </div>
@@ -305,26 +501,48 @@ function PlanDetails({planId, onBack}:{planId:number; onBack:()=>void}) {
 export default function App(){
   const [authed,setAuthed] = useState<boolean>(!!localStorage.getItem('token'));
   const [plans,setPlans] = useState<Plan[]>([]);
+  const [plansCursor,setPlansCursor] = useState<number|null>(null);
   const [selected,setSelected] = useState<number|null>(null);
   const [err,setErr] = useState<string|null>(null);
 
   async function loadPlans(){
     try{
-      const p = await apiGetPlans();
-      setPlans(p);
+      const page = await apiGetPlans();
+      setPlans(page.items);
+      setPlansCursor(page.next_cursor);
       setErr(null);
     }catch(ex:any){
       setErr(String(ex?.message||ex));
     }
   }
 
+  async function loadMorePlans(){
+    if(plansCursor === null) return;
+    try{
+      const page = await apiGetPlans(plansCursor);
+      setPlans([...plans, ...page.items]);
+      setPlansCursor(page.next_cursor);
+    }catch(ex:any){
+      setErr(String(ex?.message||ex));
+    }
+  }
+
   useEffect(()=>{ if(authed) loadPlans(); }, [authed]);
 
   useEffect(()=>{
     if(!authed) return;
     const ws = new WebSocket(wsUrl());
     ws.onopen = ()=>ws.send('ping');
-    ws.onmessage = ()=>{ loadPlans(); };
+    ws.onmessage = (m)=>{
+      let e:any;
+      try{ e = JSON.parse(m.data); }catch{ return; }
+      // Only plan-level fields are shown here, so task events are ignored.
+      if(e.event === 'plan_created' && e.plan){
+        setPlans(prev=>prev.some(p=>p.id === e.plan.id) ? prev : [e.plan, ...prev]);
+      }else if(e.plan){
+        setPlans(prev=>prev.map(p=>p.id === e.plan.id ? {...p, ...e.plan} : p));
+      }
+    };
     return ()=>ws.close();
   }, [authed]);
 
@@ -363,6 +581,11 @@ export default function App(){
             ))}
           </tbody>
         </table>
+        {plansCursor !== null && (
+          <div style={{marginTop:10}}>
+            <button className="btn secondary" onClick={loadMorePlans}>Load more plans</button>
+          </div>
+        )}
         <p className="muted">Live updates via WebSocket. Worker publishes execution events to Redis; API broadcasts to connected clients.</p>
       </div>
     </div>
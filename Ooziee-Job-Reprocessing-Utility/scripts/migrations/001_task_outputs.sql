@@ -0,0 +1,33 @@
+-- Move task stdout/stderr out of the tasks table into compressed task_outputs.
+-- Apply once to databases created from an earlier scripts/mysql_schema.sql.
+-- Existing output is copied over uncompressed (codec 'none') before the old
+-- columns are dropped; it is stored compressed again when the task next runs.
+
+CREATE TABLE IF NOT EXISTS task_outputs (
+  task_id INT PRIMARY KEY,
+  codec VARCHAR(16) NOT NULL DEFAULT 'zlib',
+  stdout MEDIUMBLOB,
+  stderr MEDIUMBLOB,
+  stdout_size INT NOT NULL DEFAULT 0,
+  stderr_size INT NOT NULL DEFAULT 0,
+  updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+
+  CONSTRAINT fk_task_outputs_task FOREIGN KEY (task_id) REFERENCES tasks(id) ON DELETE CASCADE
+) ENGINE=InnoDB;
+
+INSERT IGNORE INTO task_outputs (task_id, codec, stdout, stderr, stdout_size, stderr_size)
+SELECT
+  id,
+  'none',
+  CAST(COALESCE(stdout, '') AS BINARY),
+  CAST(COALESCE(stderr, '') AS BINARY),
+  CHAR_LENGTH(COALESCE(stdout, '')),
+  CHAR_LENGTH(COALESCE(stderr, ''))
+FROM tasks
+WHERE COALESCE(stdout, '') <> '' OR COALESCE(stderr, '') <> '';
+
+-- The mysql client stops at the first error, so the columns are only
+-- dropped once the copy above has succeeded.
+ALTER TABLE tasks
+  DROP COLUMN stdout,
+  DROP COLUMN stderr;
@@ -0,0 +1,8 @@
+-- Batched coordinator reruns: per-plan batch size and the batch a task ran in.
+-- Apply once to databases created from an earlier scripts/mysql_schema.sql.
+
+ALTER TABLE plans
+  ADD COLUMN coord_batch_size INT NOT NULL DEFAULT 1 AFTER max_concurrency;
+
+ALTER TABLE tasks
+  ADD COLUMN batch_id INT AFTER attempt;
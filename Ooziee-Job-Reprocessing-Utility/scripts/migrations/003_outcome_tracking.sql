@@ -0,0 +1,10 @@
+-- Post-submit tracking: plans can keep reruns SUBMITTED until Oozie reports
+-- an end state. Apply once to databases created from an earlier
+-- scripts/mysql_schema.sql.
+
+ALTER TABLE plans
+  ADD COLUMN track_outcome BOOLEAN NOT NULL DEFAULT FALSE AFTER coord_batch_size;
+
+ALTER TABLE tasks
+  ADD COLUMN oozie_status VARCHAR(32) AFTER batch_id,
+  ADD COLUMN submitted_at DATETIME AFTER started_at;
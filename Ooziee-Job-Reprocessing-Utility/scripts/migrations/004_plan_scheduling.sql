@@ -0,0 +1,6 @@
+-- Plan priority and weight for the worker's fair-share scheduler. Apply once
+-- to databases created from an earlier scripts/mysql_schema.sql.
+
+ALTER TABLE plans
+  ADD COLUMN priority INT NOT NULL DEFAULT 0 AFTER track_outcome,
+  ADD COLUMN weight INT NOT NULL DEFAULT 1 AFTER priority;
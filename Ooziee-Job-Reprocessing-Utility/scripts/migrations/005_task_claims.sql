@@ -0,0 +1,9 @@
+-- Claim leases: which worker holds a RUNNING task and when it last renewed
+-- the claim. Apply once to databases created from an earlier
+-- scripts/mysql_schema.sql, with all workers stopped. RUNNING tasks claimed
+-- before this migration have no heartbeat; workers treat their started_at as
+-- the last renewal and requeue them once TASK_CLAIM_LEASE_SECONDS have passed.
+
+ALTER TABLE tasks
+  ADD COLUMN claimed_by VARCHAR(128) AFTER pid,
+  ADD COLUMN heartbeat_at DATETIME AFTER claimed_by;
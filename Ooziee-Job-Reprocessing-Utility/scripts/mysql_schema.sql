@@ -19,6 +19,10 @@ CREATE TABLE IF NOT EXISTS plans (
   oozie_url VARCHAR(512),
   use_rest BOOLEAN NOT NULL DEFAULT FALSE,
   max_concurrency INT NOT NULL DEFAULT 1,
+  coord_batch_size INT NOT NULL DEFAULT 1,
+  track_outcome BOOLEAN NOT NULL DEFAULT FALSE,
+  priority INT NOT NULL DEFAULT 0,
+  weight INT NOT NULL DEFAULT 1,
   created_by VARCHAR(128),
   created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
   updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
@@ -45,19 +49,35 @@ CREATE TABLE IF NOT EXISTS tasks (
 
   status VARCHAR(32) NOT NULL DEFAULT 'PENDING',
   attempt INT NOT NULL DEFAULT 0,
+  batch_id INT,
+  oozie_status VARCHAR(32),
 
   command TEXT,
-  stdout MEDIUMTEXT,
-  stderr MEDIUMTEXT,
   exit_code INT,
   pid INT,
+  claimed_by VARCHAR(128),
+  heartbeat_at DATETIME,
 
   started_at DATETIME,
+  submitted_at DATETIME,
   ended_at DATETIME,
 
   CONSTRAINT fk_tasks_plan FOREIGN KEY (plan_id) REFERENCES plans(id) ON DELETE CASCADE
 ) ENGINE=InnoDB;
 
+-- zlib-compressed output of the latest attempt, kept off the hot tasks row
+CREATE TABLE IF NOT EXISTS task_outputs (
+  task_id INT PRIMARY KEY,
+  codec VARCHAR(16) NOT NULL DEFAULT 'zlib',
+  stdout MEDIUMBLOB,
+  stderr MEDIUMBLOB,
+  stdout_size INT NOT NULL DEFAULT 0,
+  stderr_size INT NOT NULL DEFAULT 0,
+  updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+
+  CONSTRAINT fk_task_outputs_task FOREIGN KEY (task_id) REFERENCES tasks(id) ON DELETE CASCADE
+) ENGINE=InnoDB;
+
 CREATE INDEX idx_tasks_plan_status ON tasks(plan_id, status);
 CREATE INDEX idx_plans_status ON plans(status);
 CREATE INDEX idx_tasks_status ON tasks(status);
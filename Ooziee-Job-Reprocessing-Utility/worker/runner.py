@@ -1,25 +1,62 @@
+import asyncio
+import codecs
 import json
 import logging
 import os
+import random
+import re
 import shlex
 import signal
 import socket
 import subprocess
 import sys
 import time
+from collections import deque
 from concurrent.futures import ThreadPoolExecutor
-from datetime import datetime
-from threading import Event
-from typing import Dict, List, Set, Tuple
+from datetime import datetime, timedelta
+from threading import Event, Lock, Thread
+from typing import IO, Any, Callable, Dict, List, NamedTuple, Optional, Set, Tuple, Union
+from urllib.parse import urlencode
 
 import redis
+from prometheus_client import start_http_server
+from sqlalchemy import func, update
 from sqlalchemy.orm import sessionmaker
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "backend")))
+from app.cache import BlockingSingleFlight, TTLCache  # type: ignore
+from app.claims import renew_claims, requeue_expired_claims, requeue_worker_claims  # type: ignore
 from app.db import build_engine  # type: ignore
+from app.events import publish_event, writer as event_writer  # type: ignore
+from app.limiter import limiter as oozie_limiter  # type: ignore
+from app.metrics import (  # type: ignore
+    CLI_RUNTIME,
+    EXECUTOR_QUEUE_DEPTH,
+    OOZIE_LIMITER_WAIT,
+    OOZIE_TRACKED,
+    PRE_TASK_HOOK,
+    PRE_TASK_HOOK_RESULTS,
+    REST_RERUN,
+    TASK_QUEUE_WAIT,
+    TASKS_FINISHED,
+    WORKER_INFLIGHT,
+    WORKER_TICK,
+)
 from app.models import Plan, Task  # type: ignore
-from app.oozie import OozieClient  # type: ignore
+from app.oozie import (  # type: ignore
+    OozieClient,
+    async_registry as oozie_async_registry,
+    close_async_clients,
+    get_async_client,
+    get_client,
+    merge_action_scopes,
+    merge_date_scopes,
+    registry as oozie_registry,
+)
+from app.outputs import save_task_output  # type: ignore
+from app.scheduling import SCHEDULER_POLICIES, PlanDemand, allocate  # type: ignore
 from app.settings import Settings  # type: ignore
+from app.tracking import TRACKABLE_TYPES, PollCadence, outcome_for, record_tracked, submitted_page  # type: ignore
 
 settings = Settings()
 
@@ -37,23 +74,108 @@ REDIS = redis.from_url(settings.redis_url, decode_responses=True)
 OOZIE_BIN = os.environ.get("OOZIE_BIN", "oozie")
 PRE_TASK_CMD = os.environ.get("PRE_TASK_CMD", "").strip()
 PRE_TASK_SHELL_CMD = os.environ.get("PRE_TASK_SHELL_CMD", "").strip()
+PRE_TASK_CACHE_TTL = float(os.environ.get("PRE_TASK_CACHE_TTL", "0"))
+PRE_TASK_SCOPE = os.environ.get("PRE_TASK_SCOPE", "global").strip().lower()
+PRE_TASK_AUTH_RETRY = os.environ.get("PRE_TASK_AUTH_RETRY", "true").strip().lower() in {"1", "true", "yes"}
+AUTH_ERROR_RE = re.compile(
+    os.environ.get(
+        "PRE_TASK_AUTH_ERROR_PATTERN",
+        r"\b(401|403)\b|unauthorized|GSSException|no valid credentials|authentication (failed|required)|kerberos",
+    ),
+    re.IGNORECASE,
+)
+# Rerun errors that mean the Oozie server is overloaded or unreachable; they
+# make the per-server limiter back off (see app.limiter).
+CONGESTION_RE = re.compile(
+    os.environ.get(
+        "OOZIE_LIMIT_ERROR_PATTERN",
+        r"\b50[0234]\b|service unavailable|connection (refused|reset)|timed? ?out",
+    ),
+    re.IGNORECASE,
+)
 
 POLL_SECONDS = int(os.environ.get("WORKER_POLL_SECONDS", "3"))
+EVENT_DRIVEN = os.environ.get("WORKER_EVENT_DRIVEN", "true").strip().lower() in {"1", "true", "yes"}
+FALLBACK_POLL_SECONDS = int(os.environ.get("WORKER_FALLBACK_POLL_SECONDS", "30"))
+WAKE_DEBOUNCE_MS = int(os.environ.get("WORKER_WAKE_DEBOUNCE_MS", "50"))
 WORKER_MAX_THREADS = int(os.environ.get("WORKER_MAX_THREADS", "32"))
+# "threads" runs each task on a WORKER_MAX_THREADS pool thread; "asyncio" runs
+# up to WORKER_MAX_ASYNC_TASKS tasks as coroutines on one event loop.
+WORKER_ENGINE = os.environ.get("WORKER_ENGINE", "threads").strip().lower()
+WORKER_MAX_ASYNC_TASKS = int(os.environ.get("WORKER_MAX_ASYNC_TASKS", "1000"))
+# How free task slots are shared between running plans: "fair" by plan weight,
+# "priority" strictly by plan priority (weight breaks ties within a priority).
+WORKER_SCHEDULER = os.environ.get("WORKER_SCHEDULER", "fair").strip().lower()
 TASK_TIMEOUT_SECONDS = int(os.environ.get("TASK_TIMEOUT_SECONDS", "1800"))
+# Oozie limiter slots are taken at dispatch and held through the pre-task
+# hook and the rerun, each bounded by TASK_TIMEOUT_SECONDS.
+SLOT_LEASE_SECONDS = 2 * TASK_TIMEOUT_SECONDS + 60
 MAX_STDOUT = int(os.environ.get("MAX_STDOUT", "50000"))
 MAX_STDERR = int(os.environ.get("MAX_STDERR", "50000"))
+HEARTBEAT_SECONDS = float(os.environ.get("WORKER_HEARTBEAT_SECONDS", "15"))
+LOG_FLUSH_SECONDS = float(os.environ.get("WORKER_LOG_FLUSH_SECONDS", "2"))
+LOG_EVENT_MAX_CHARS = int(os.environ.get("WORKER_LOG_EVENT_MAX_CHARS", "8192"))
 REST_FALLBACK_TO_CLI = os.environ.get("REST_FALLBACK_TO_CLI", "true").strip().lower() in {"1", "true", "yes"}
+CLAIM_SKIP_LOCKED = os.environ.get("CLAIM_SKIP_LOCKED", "true").strip().lower() in {"1", "true", "yes"}
 
-WORKER_ID = os.environ.get("WORKER_ID", f"{socket.gethostname()}-{os.getpid()}")
-SHUTDOWN = Event()
+# Post-submit tracking for plans with track_outcome: adaptive poll interval
+# per Oozie server, jobs per v2/jobs query, and how long to wait for an end state.
+TRACK_POLL_MIN_SECONDS = float(os.environ.get("TRACK_POLL_MIN_SECONDS", "5"))
+TRACK_POLL_MAX_SECONDS = float(os.environ.get("TRACK_POLL_MAX_SECONDS", "60"))
+TRACK_BATCH_SIZE = int(os.environ.get("TRACK_BATCH_SIZE", "200"))
+TRACK_TIMEOUT_SECONDS = int(os.environ.get("TRACK_TIMEOUT_SECONDS", "86400"))
 
+METRICS_PORT = int(os.environ.get("WORKER_METRICS_PORT", "9101"))
+METRICS_ADDR = os.environ.get("WORKER_METRICS_ADDR", "127.0.0.1")
 
-def publish(event: dict) -> None:
-    try:
-        REDIS.publish(settings.redis_channel, json.dumps(event, default=str))
-    except Exception as exc:
-        logger.warning("event publish failed: %s", exc.__class__.__name__)
+WORKER_ID = os.environ.get("WORKER_ID", f"{socket.gethostname()}-{os.getpid()}")
+SHUTDOWN = Event()
+WAKE = Event()
+LISTENER_CONNECTED = Event()
+
+# Events that can make new work dispatchable: a plan (re)started, a task put
+# back to PENDING, a concurrency slot freed by a finished task, or a plan's
+# priority/weight/concurrency changed, or tasks of a dead worker requeued.
+WAKE_EVENTS = {"plan_status", "plan_updated", "task_retried", "task_finished", "task_submitted", "tasks_requeued"}
+TERMINAL_STATUSES = ("SUCCESS", "FAILED", "CANCELED", "SKIPPED")
+
+
+class TaskSpec(NamedTuple):
+    """Immutable snapshot of a claimed task and the plan fields it needs."""
+
+    plan_id: int
+    oozie_url: str
+    use_rest: bool
+    id: int
+    name: str
+    type: str
+    job_id: str
+    action: str
+    date: str
+    coordinator: str
+    wf_failnodes: bool
+    wf_skip_nodes: str
+    refresh: bool
+    failed: bool
+    extra_props: Dict[str, Any]
+    attempt: int
+    started_at: datetime
+    # Ids of every task covered by this rerun when coordinator tasks were
+    # batched (``action``/``date`` then hold the merged scope); else empty.
+    batch: Tuple[int, ...] = ()
+    # Plan tracks the Oozie outcome: a successful submit leaves the task SUBMITTED.
+    track: bool = False
+    # Oozie limiter slot taken at dispatch ("" when not limiting); None means
+    # the rerun takes one itself.
+    lease: Optional[str] = None
+
+    @property
+    def task_ids(self) -> Tuple[int, ...]:
+        return self.batch or (self.id,)
+
+
+def publish(event: dict, sequenced: bool = True) -> None:
+    publish_event(event, sequenced=sequenced)
 
 
 def now() -> datetime:
@@ -68,8 +190,220 @@ def _fmt_command(parts: List[str]) -> str:
     return shlex.join(parts)
 
 
-def build_cli_command(plan: Plan, task: Task) -> List[str]:
-    oozie_url = (plan.oozie_url or settings.oozie_default_url).strip()
+class OutputRing:
+    """Bounded tail of a process stream plus the text not yet published live.
+
+    Memory stays at roughly ``limit`` + ``LOG_EVENT_MAX_CHARS`` characters no
+    matter how much the process writes; older output is dropped first.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = max(0, limit)
+        self.dropped = 0
+        self._chunks: deque = deque()
+        self._size = 0
+        self._unsent: deque = deque()
+        self._unsent_size = 0
+        self._lock = Lock()
+
+    @staticmethod
+    def _push(chunks: deque, size: int, text: str, limit: int) -> Tuple[int, int]:
+        chunks.append(text)
+        size += len(text)
+        dropped = 0
+        while size > limit and chunks:
+            head = chunks[0]
+            excess = size - limit
+            if len(head) <= excess:
+                chunks.popleft()
+                size -= len(head)
+                dropped += len(head)
+            else:
+                chunks[0] = head[excess:]
+                size -= excess
+                dropped += excess
+        return size, dropped
+
+    def append(self, text: str) -> None:
+        if not text:
+            return
+        with self._lock:
+            self._size, dropped = self._push(self._chunks, self._size, text, self.limit)
+            self.dropped += dropped
+            self._unsent_size, _ = self._push(self._unsent, self._unsent_size, text, LOG_EVENT_MAX_CHARS)
+
+    def drain(self) -> str:
+        with self._lock:
+            text = "".join(self._unsent)
+            self._unsent.clear()
+            self._unsent_size = 0
+            return text
+
+    def value(self) -> str:
+        with self._lock:
+            text = "".join(self._chunks)
+            if not self.dropped:
+                return text
+            marker = "[... earlier output truncated ...]\n"
+            keep = max(0, self.limit - len(marker))
+            return marker + text[len(text) - keep:]
+
+
+def _pump(stream: IO[bytes], ring: OutputRing) -> None:
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    try:
+        for chunk in iter(lambda: stream.read1(65536), b""):
+            ring.append(decoder.decode(chunk))
+        ring.append(decoder.decode(b"", final=True))
+    except (OSError, ValueError):
+        pass
+    finally:
+        try:
+            stream.close()
+        except Exception:
+            pass
+
+
+def _kill_process_group(pid: int) -> None:
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def _stream_process(
+    cmd: Union[str, List[str]],
+    timeout: int,
+    on_output: Optional[Callable[[OutputRing, OutputRing], None]] = None,
+    shell: bool = False,
+    env: Optional[Dict[str, str]] = None,
+) -> Tuple[int, str, str]:
+    """Run ``cmd`` reading both pipes incrementally into bounded ring buffers.
+
+    ``on_output`` is called every ``WORKER_LOG_FLUSH_SECONDS`` while the
+    process runs and once more after it exits. Raises
+    ``subprocess.TimeoutExpired`` after killing the process on timeout.
+    """
+    # Own process group, so a timeout also kills the JVMs the oozie wrapper forks.
+    proc = subprocess.Popen(
+        cmd, shell=shell, stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=env, start_new_session=True
+    )
+    out_ring = OutputRing(MAX_STDOUT)
+    err_ring = OutputRing(MAX_STDERR)
+    readers = [
+        Thread(target=_pump, args=(proc.stdout, out_ring), daemon=True),
+        Thread(target=_pump, args=(proc.stderr, err_ring), daemon=True),
+    ]
+    for reader in readers:
+        reader.start()
+
+    deadline = time.monotonic() + timeout
+    flush_every = LOG_FLUSH_SECONDS if on_output and LOG_FLUSH_SECONDS > 0 else float(timeout)
+    try:
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                _kill_process_group(proc.pid)
+                proc.wait()
+                raise subprocess.TimeoutExpired(cmd, timeout, output=out_ring.value(), stderr=err_ring.value())
+            try:
+                proc.wait(timeout=min(flush_every, remaining))
+                break
+            except subprocess.TimeoutExpired:
+                if on_output:
+                    on_output(out_ring, err_ring)
+    finally:
+        # Grandchildren may keep the pipes open after the child exits.
+        for reader in readers:
+            reader.join(timeout=5)
+
+    if on_output:
+        on_output(out_ring, err_ring)
+    return proc.returncode, out_ring.value(), err_ring.value()
+
+
+async def _pump_async(stream: asyncio.StreamReader, ring: OutputRing) -> None:
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    try:
+        while True:
+            chunk = await stream.read(65536)
+            if not chunk:
+                break
+            ring.append(decoder.decode(chunk))
+        ring.append(decoder.decode(b"", final=True))
+    except (OSError, ValueError):
+        pass
+
+
+async def _stream_process_async(
+    cmd: List[str],
+    timeout: int,
+    on_output: Optional[Callable[[OutputRing, OutputRing], None]] = None,
+) -> Tuple[int, str, str]:
+    """Event-loop counterpart of :func:`_stream_process` for the asyncio engine."""
+    proc = await asyncio.create_subprocess_exec(
+        *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE, start_new_session=True
+    )
+    out_ring = OutputRing(MAX_STDOUT)
+    err_ring = OutputRing(MAX_STDERR)
+    readers = [
+        asyncio.ensure_future(_pump_async(proc.stdout, out_ring)),
+        asyncio.ensure_future(_pump_async(proc.stderr, err_ring)),
+    ]
+    exited = asyncio.ensure_future(proc.wait())
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    flush_every = LOG_FLUSH_SECONDS if on_output and LOG_FLUSH_SECONDS > 0 else float(timeout)
+    try:
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                _kill_process_group(proc.pid)
+                await exited
+                raise subprocess.TimeoutExpired(cmd, timeout, output=out_ring.value(), stderr=err_ring.value())
+            done, _ = await asyncio.wait({exited}, timeout=min(flush_every, remaining))
+            if done:
+                break
+            if on_output:
+                on_output(out_ring, err_ring)
+    finally:
+        if not exited.done():
+            # Cancelled (worker shutdown): do not leave the process group behind.
+            _kill_process_group(proc.pid)
+            exited.cancel()
+        # Grandchildren may keep the pipes open after the child exits.
+        _, pending = await asyncio.wait(readers, timeout=5)
+        for reader in pending:
+            reader.cancel()
+
+    if on_output:
+        on_output(out_ring, err_ring)
+    return proc.returncode, out_ring.value(), err_ring.value()
+
+
+def _log_publisher(task: TaskSpec) -> Callable[[OutputRing, OutputRing], None]:
+    def flush(out_ring: OutputRing, err_ring: OutputRing) -> None:
+        for stream, ring in (("stdout", out_ring), ("stderr", err_ring)):
+            data = ring.drain()
+            if data:
+                publish(
+                    {
+                        "event": "task_log",
+                        "plan_id": task.plan_id,
+                        "task_id": task.id,
+                        "stream": stream,
+                        "data": data,
+                        "worker_id": WORKER_ID,
+                    },
+                    sequenced=False,
+                )
+
+    return flush
+
+
+def build_cli_command(task: TaskSpec) -> List[str]:
+    oozie_url = (task.oozie_url or settings.oozie_default_url).strip()
     if not oozie_url:
         raise RuntimeError("oozie_url not configured")
 
@@ -121,207 +455,1162 @@ def build_cli_command(plan: Plan, task: Task) -> List[str]:
     return cmd
 
 
-def _run_pre_task_hook() -> Tuple[int, str, str]:
+def _exec_pre_task_hook(env: Optional[Dict[str, str]] = None) -> Tuple[int, str, str]:
     if PRE_TASK_CMD:
-        cmd = shlex.split(PRE_TASK_CMD)
-        pre = subprocess.run(cmd, text=True, capture_output=True, timeout=TASK_TIMEOUT_SECONDS)
-        return pre.returncode, _trim(pre.stdout or "", MAX_STDOUT), _trim(pre.stderr or "", MAX_STDERR)
+        with PRE_TASK_HOOK.time():
+            return _stream_process(shlex.split(PRE_TASK_CMD), TASK_TIMEOUT_SECONDS, env=env)
 
     if PRE_TASK_SHELL_CMD:
         logger.warning("PRE_TASK_SHELL_CMD is deprecated and less secure. Prefer PRE_TASK_CMD.")
-        pre = subprocess.run(PRE_TASK_SHELL_CMD, shell=True, text=True, capture_output=True, timeout=TASK_TIMEOUT_SECONDS)
-        return pre.returncode, _trim(pre.stdout or "", MAX_STDOUT), _trim(pre.stderr or "", MAX_STDERR)
+        with PRE_TASK_HOOK.time():
+            return _stream_process(PRE_TASK_SHELL_CMD, TASK_TIMEOUT_SECONDS, shell=True, env=env)
 
     return 0, "", ""
 
 
-def _workflow_rest_rerun(plan: Plan, task: Task) -> Tuple[str, str, str, int]:
-    if task.type != "workflow":
-        raise RuntimeError("REST rerun is supported for workflow tasks only")
+class PreTaskHook:
+    """Runs the pre-task hook, optionally sharing successful results.
+
+    With ``PRE_TASK_CACHE_TTL`` > 0 a successful run is reused for that many
+    seconds by every task in the same ``PRE_TASK_SCOPE`` (``global``, ``plan``
+    or ``oozie_url``), and concurrent tasks wait on a single run instead of
+    each starting one. Failures are never cached.
+    """
+
+    def __init__(self, ttl: float, scope: str):
+        if scope not in ("global", "plan", "oozie_url"):
+            raise RuntimeError("PRE_TASK_SCOPE must be one of: global, plan, oozie_url")
+        self.ttl = ttl
+        self.scope = scope
+        self.cache = TTLCache(maxsize=1024, ttl=ttl) if ttl > 0 else None
+        self.flight = BlockingSingleFlight()
+
+    @property
+    def configured(self) -> bool:
+        return bool(PRE_TASK_CMD or PRE_TASK_SHELL_CMD)
+
+    def _key(self, task: TaskSpec) -> str:
+        if self.scope == "plan":
+            return f"plan:{task.plan_id}"
+        if self.scope == "oozie_url":
+            return (task.oozie_url or settings.oozie_default_url).strip().rstrip("/")
+        return "global"
+
+    def _exec(self, task: TaskSpec) -> Tuple[int, str, str]:
+        # Scoped hooks can tell which credentials to refresh.
+        env = {
+            **os.environ,
+            "PRE_TASK_PLAN_ID": str(task.plan_id),
+            "PRE_TASK_OOZIE_URL": (task.oozie_url or settings.oozie_default_url).strip(),
+        }
+        return _exec_pre_task_hook(env)
+
+    def _load(self, key: str, task: TaskSpec, since: Optional[float]) -> Tuple[float, Tuple[int, str, str]]:
+        if since is not None:
+            # Another task may have refreshed while this one waited to get here.
+            cached = self.cache.get(key)
+            if cached is not None and cached[0] > since:
+                PRE_TASK_HOOK_RESULTS.labels("cached").inc()
+                return cached
+        PRE_TASK_HOOK_RESULTS.labels("run").inc()
+        entry = (time.monotonic(), self._exec(task))
+        if entry[1][0] == 0:
+            self.cache.set(key, entry)
+        else:
+            self.cache.invalidate(key)
+        return entry
+
+    def run(self, task: TaskSpec, since: Optional[float] = None) -> Tuple[float, Tuple[int, str, str]]:
+        """Returns ``(obtained_at, (exit_code, stdout, stderr))``.
+
+        ``since`` forces a fresh run unless a run newer than ``since`` (the
+        ``obtained_at`` of the result the caller already used) exists.
+        """
+        if not self.configured:
+            return time.monotonic(), (0, "", "")
+        if self.cache is None:
+            PRE_TASK_HOOK_RESULTS.labels("run").inc()
+            return time.monotonic(), self._exec(task)
+        key = self._key(task)
+        if since is None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                PRE_TASK_HOOK_RESULTS.labels("cached").inc()
+                return cached
+        return self.flight.do(key, lambda: self._load(key, task, since))
+
+
+PRE_TASK = PreTaskHook(PRE_TASK_CACHE_TTL, PRE_TASK_SCOPE)
+
+
+def should_retry_auth(auth_failed: bool) -> bool:
+    """A failed rerun whose credentials were rejected gets one retry after
+    re-running the pre-task hook."""
+    return PRE_TASK_AUTH_RETRY and PRE_TASK.configured and auth_failed
+
+
+def _rest_auth_failed(exc: Exception) -> bool:
+    # requests.HTTPError and httpx.HTTPStatusError both carry the response.
+    return getattr(getattr(exc, "response", None), "status_code", None) in (401, 403)
+
+
+class RestCall(NamedTuple):
+    """One REST rerun, usable with both the sync and the async Oozie client."""
 
-    oozie_url = (plan.oozie_url or settings.oozie_default_url).strip()
+    oozie_url: str
+    method: str
+    args: Tuple[Any, ...]
+    kwargs: Dict[str, Any]
+    command: str
+
+
+def _rest_call(task: TaskSpec) -> RestCall:
+    oozie_url = (task.oozie_url or settings.oozie_default_url).strip()
     if not oozie_url:
         raise RuntimeError("oozie_url not configured")
 
-    conf = {}
-    if task.wf_skip_nodes:
-        conf["oozie.wf.rerun.skip.nodes"] = task.wf_skip_nodes
+    if task.type == "workflow":
+        conf = {}
+        if task.wf_skip_nodes:
+            conf["oozie.wf.rerun.skip.nodes"] = task.wf_skip_nodes
+        else:
+            conf["oozie.wf.rerun.failnodes"] = "true" if task.wf_failnodes else "false"
+
+        for k, v in (task.extra_props or {}).items():
+            conf[str(k)] = str(v)
+
+        action = "rerun"
+        params: Dict[str, str] = {}
+        method, args, kwargs = "rerun", (task.job_id,), {"conf": conf if conf else None, "params": None}
+
+    elif task.type == "coordinator":
+        if task.action:
+            rerun_type, scope = "action", task.action
+        elif task.date:
+            rerun_type, scope = "date", task.date
+        else:
+            raise RuntimeError("coordinator rerun requires action or date")
+
+        action = "coord-rerun"
+        params = OozieClient.coordinator_rerun_params(rerun_type, scope, refresh=task.refresh, failed=task.failed)
+        method, args = "rerun_coordinator", (task.job_id, rerun_type, scope)
+        kwargs = {"refresh": task.refresh, "failed": task.failed}
+
+    elif task.type == "bundle":
+        if task.coordinator:
+            coord_scope, date_scope = task.coordinator, ""
+        elif task.date:
+            coord_scope, date_scope = "", task.date
+        else:
+            raise RuntimeError("bundle rerun requires coordinator or date")
+
+        action = "bundle-rerun"
+        params = OozieClient.bundle_rerun_params(coord_scope, date_scope, refresh=task.refresh)
+        method, args = "rerun_bundle", (task.job_id,)
+        kwargs = {"coord_scope": coord_scope, "date_scope": date_scope, "refresh": task.refresh}
+
     else:
-        conf["oozie.wf.rerun.failnodes"] = "true" if task.wf_failnodes else "false"
+        raise RuntimeError("unknown task type")
+
+    query = urlencode({"action": action, **params})
+    command = f"REST PUT {oozie_url.rstrip('/')}/v2/job/{task.job_id}?{query}"
+    return RestCall(oozie_url, method, args, kwargs, command)
 
-    for k, v in (task.extra_props or {}).items():
-        conf[str(k)] = str(v)
 
-    client = OozieClient(oozie_url)
-    response = client.rerun(task.job_id, conf=conf if conf else None, params=None)
-    command = f"REST PUT {client.base_url}/v2/job/{task.job_id}?action=rerun"
-    return command, json.dumps(response, default=str), "", 0
+def _rest_rerun(task: TaskSpec) -> Tuple[str, str, str, int]:
+    call = _rest_call(task)
+    response = getattr(get_client(call.oozie_url), call.method)(*call.args, **call.kwargs)
+    return call.command, json.dumps(response, default=str), "", 0
 
 
-def _mark_task_result(task: Task, command: str, stdout: str, stderr: str, exit_code: int) -> None:
-    task.command = command
-    task.stdout = _trim(stdout, MAX_STDOUT)
-    task.stderr = _trim(stderr, MAX_STDERR)
-    task.exit_code = exit_code
-    task.ended_at = now()
-    task.status = "SUCCESS" if exit_code == 0 else "FAILED"
+async def _rest_rerun_async(task: TaskSpec) -> Tuple[str, str, str, int]:
+    call = _rest_call(task)
+    client = get_async_client(call.oozie_url)
+    response = await getattr(client, call.method)(*call.args, **call.kwargs)
+    return call.command, json.dumps(response, default=str), "", 0
+
+
+def _finish_task(task: TaskSpec, command: str, stdout: str, stderr: str, exit_code: int) -> None:
+    submitted = exit_code == 0 and task.track
+    status = "SUBMITTED" if submitted else "SUCCESS" if exit_code == 0 else "FAILED"
+    ended_at = now()
+    # A batched rerun has one result; every task it covered gets it.
+    task_ids = task.task_ids
+    db = SessionLocal()
+    try:
+        # Fenced on the claim: once the lease expired and the task was
+        # requeued, this worker's late result must not overwrite it.
+        updated = (
+            db.query(Task)
+            .filter(Task.id.in_(task_ids), Task.status == "RUNNING", Task.claimed_by == WORKER_ID)
+            .update(
+                {
+                    Task.command: command,
+                    Task.exit_code: exit_code,
+                    Task.submitted_at: ended_at if submitted else None,
+                    Task.ended_at: None if submitted else ended_at,
+                    Task.status: status,
+                },
+                synchronize_session=False,
+            )
+        )
+        if not updated:
+            db.rollback()
+            logger.warning("claim on plan=%s task=%s was lost; dropping its result", task.plan_id, task.id)
+            return
+        save_task_output(db, task.id, _trim(stdout, MAX_STDOUT), _trim(stderr, MAX_STDERR), members=task.batch)
+        db.commit()
+    finally:
+        db.close()
+    TASKS_FINISHED.labels(status).inc(len(task_ids))
+    if submitted:
+        TRACKER.nudge(_oozie_url(task))
+    for task_id in task_ids:
+        publish(
+            {
+                "event": "task_submitted" if submitted else "task_finished",
+                "plan_id": task.plan_id,
+                "task_id": task_id,
+                "status": status,
+                "prev_status": "RUNNING",
+                "task": {
+                    "id": task_id,
+                    "status": status,
+                    "exit_code": exit_code,
+                    "command": command,
+                    "submitted_at": ended_at if submitted else None,
+                    "ended_at": None if submitted else ended_at,
+                },
+                "worker_id": WORKER_ID,
+            }
+        )
 
 
-def _claim_task(db, task: Task) -> bool:
-    claimed = (
-        db.query(Task)
-        .filter(Task.id == task.id, Task.status == "PENDING")
-        .update(
+def _lock_plan(db, plan_id: int):
+    query = db.query(
+        Plan.status, Plan.max_concurrency, Plan.oozie_url, Plan.use_rest, Plan.coord_batch_size, Plan.track_outcome
+    ).filter(Plan.id == plan_id)
+    if db.bind.dialect.name == "sqlite":
+        # SQLite has no row locks; a no-op write takes the database write
+        # lock up front so concurrent claimers serialize on this transaction.
+        db.execute(update(Plan).where(Plan.id == plan_id).values(updated_at=Plan.updated_at))
+        return query.first()
+    return query.with_for_update().first()
+
+
+def _coordinator_batches(db, plan_id: int, tasks: List[Task], batch_size: int) -> List[List[Task]]:
+    """Group claimed tasks into reruns.
+
+    Each coordinator task picks up to ``batch_size - 1`` more PENDING tasks
+    of the same coordinator job with the same scope kind (action or date)
+    and flags, so they can be rerun with one merged ``-action``/``-date``.
+    Other tasks run alone.
+    """
+    groups: List[List[Task]] = []
+    taken: Set[int] = set()
+    for t in tasks:
+        if t.id in taken:
+            continue
+        taken.add(t.id)
+        group = [t]
+        if t.type == "coordinator" and (t.action or t.date):
+            query = db.query(Task).filter(
+                Task.plan_id == plan_id,
+                Task.status == "PENDING",
+                Task.type == "coordinator",
+                Task.job_id == t.job_id,
+                Task.refresh == t.refresh,
+                Task.failed == t.failed,
+                Task.id.notin_(taken),
+            )
+            if t.action:
+                query = query.filter(Task.action.isnot(None), Task.action != "")
+            else:
+                query = query.filter(func.coalesce(Task.action, "") == "", Task.date.isnot(None), Task.date != "")
+            query = query.order_by(Task.id.asc()).limit(batch_size - 1)
+            if CLAIM_SKIP_LOCKED and db.bind.dialect.name == "mysql":
+                query = query.with_for_update(skip_locked=True)
+            for member in query.all():
+                taken.add(member.id)
+                group.append(member)
+        groups.append(group)
+    return groups
+
+
+def claim_tasks(db, plan_id: int, limit: int) -> List[TaskSpec]:
+    """Atomically move up to ``limit`` PENDING tasks of a RUNNING plan to RUNNING.
+
+    Claimers serialize on the plan row, so ``max_concurrency`` is enforced
+    against the RUNNING count across all workers rather than per process.
+    Claimed tasks carry this worker's id and a lease it keeps renewing (see
+    :mod:`app.claims`); tasks of a worker that died are requeued.
+    With ``coord_batch_size`` > 1, coordinator tasks are claimed in batches
+    and only the batch leader gets a spec.
+    """
+    try:
+        plan = _lock_plan(db, plan_id)
+        if plan is None or plan.status != "RUNNING":
+            db.rollback()
+            return []
+
+        cap = max(1, int(plan.max_concurrency or 1))
+        # A batched rerun holds one concurrency slot however many tasks it covers.
+        running = (
+            db.query(func.count(func.distinct(func.coalesce(Task.batch_id, Task.id))))
+            .filter(Task.plan_id == plan_id, Task.status == "RUNNING")
+            .scalar()
+        )
+        slots = min(limit, cap - int(running or 0))
+        if slots <= 0:
+            db.rollback()
+            return []
+
+        query = (
+            db.query(Task)
+            .filter(Task.plan_id == plan_id, Task.status == "PENDING")
+            .order_by(Task.id.asc())
+            .limit(slots)
+        )
+        if CLAIM_SKIP_LOCKED and db.bind.dialect.name == "mysql":
+            query = query.with_for_update(skip_locked=True)
+        tasks = query.all()
+        if not tasks:
+            db.rollback()
+            return []
+
+        batch_size = max(1, int(plan.coord_batch_size or 1))
+        groups = _coordinator_batches(db, plan_id, tasks, batch_size) if batch_size > 1 else [[t] for t in tasks]
+
+        started_at = now()
+        db.query(Task).filter(Task.id.in_([t.id for group in groups for t in group])).update(
             {
                 Task.status: "RUNNING",
-                Task.started_at: now(),
+                Task.started_at: started_at,
                 Task.attempt: Task.attempt + 1,
+                Task.batch_id: None,
+                Task.oozie_status: "",
+                Task.submitted_at: None,
+                Task.claimed_by: WORKER_ID,
+                Task.heartbeat_at: started_at,
             },
             synchronize_session=False,
         )
-    )
-    if claimed != 1:
+        specs = []
+        for group in groups:
+            t = group[0]
+            action, date = t.action or "", t.date or ""
+            if len(group) > 1:
+                db.query(Task).filter(Task.id.in_([m.id for m in group])).update(
+                    {Task.batch_id: t.id}, synchronize_session=False
+                )
+                if action:
+                    action = merge_action_scopes(m.action for m in group)
+                else:
+                    date = merge_date_scopes(m.date for m in group)
+            specs.append(
+                TaskSpec(
+                    plan_id=plan_id,
+                    oozie_url=plan.oozie_url or "",
+                    use_rest=bool(plan.use_rest),
+                    id=t.id,
+                    name=t.name,
+                    type=t.type,
+                    job_id=t.job_id,
+                    action=action,
+                    date=date,
+                    coordinator=t.coordinator or "",
+                    wf_failnodes=bool(t.wf_failnodes),
+                    wf_skip_nodes=t.wf_skip_nodes or "",
+                    refresh=bool(t.refresh),
+                    failed=bool(t.failed),
+                    extra_props=dict(t.extra_props or {}),
+                    attempt=int(t.attempt or 0) + 1,
+                    started_at=started_at,
+                    batch=tuple(m.id for m in group) if len(group) > 1 else (),
+                    track=bool(plan.track_outcome) and t.type in TRACKABLE_TYPES,
+                )
+            )
+        db.commit()
+        return specs
+    except Exception:
         db.rollback()
-        return False
-    db.commit()
-    db.refresh(task)
-    return True
+        raise
+
+
+def _rerun(task: TaskSpec) -> Tuple[str, str, str, int, bool]:
+    """Submit the rerun over REST (falling back to the CLI) or the CLI.
+
+    Returns the command, stdout, stderr, exit code and whether the
+    credentials were rejected (REST 401/403, or an auth error from a
+    CLI-only rerun).
+    """
+    cmd_text = ""
+    out = ""
+    err = ""
+    exit_code = 1
+    auth_failed = False
+
+    if task.use_rest:
+        try:
+            with REST_RERUN.labels(task.type).time():
+                cmd_text, out, err, exit_code = _rest_rerun(task)
+        except Exception as exc:
+            if not REST_FALLBACK_TO_CLI:
+                raise
+            auth_failed = _rest_auth_failed(exc)
+            err = f"REST rerun failed ({exc.__class__.__name__}): {exc}\nFalling back to CLI rerun."
+
+    if cmd_text == "":
+        cli_cmd = build_cli_command(task)
+        cmd_text = _fmt_command(cli_cmd)
+        with CLI_RUNTIME.labels(task.type).time():
+            exit_code, out, cli_err = _stream_process(cli_cmd, TASK_TIMEOUT_SECONDS, on_output=_log_publisher(task))
+        err = f"{err}\n{cli_err}".strip()
+        if not task.use_rest:
+            # CLI-only reruns are judged by the CLI's own errors. After a REST
+            # failure only its HTTP status counts; the fallback may have
+            # failed for unrelated reasons.
+            auth_failed = bool(AUTH_ERROR_RE.search(cli_err))
+
+    return cmd_text, out, err, exit_code, auth_failed
+
+
+def _server_url(oozie_url: str) -> str:
+    return (oozie_url or settings.oozie_default_url).strip().rstrip("/")
+
+
+def _oozie_url(task: TaskSpec) -> str:
+    return _server_url(task.oozie_url)
+
+
+def _is_congested(error_text: str, elapsed: float) -> bool:
+    return elapsed > settings.oozie_limit_latency_target or bool(CONGESTION_RE.search(error_text or ""))
+
+
+def _slot_wait(wait: float) -> float:
+    # Sleep until the next token; at the concurrency limit there is no refill
+    # time to wait for, so poll. Jitter keeps waiters out of lockstep.
+    return (1.0 if wait < 0 else max(wait, 0.05)) + random.uniform(0, 0.1)
+
+
+def _limited_rerun(task: TaskSpec, lease: Optional[str]) -> Tuple[str, str, str, int, bool]:
+    """:func:`_rerun` holding a slot of the task's Oozie server limiter.
+
+    ``lease`` is the slot taken at dispatch; without one (the auth retry)
+    the rerun waits for a slot itself. The slot is released either way.
+    """
+    oozie_url = _oozie_url(task)
+    if lease is None:
+        waited = time.monotonic()
+        while True:
+            lease, wait = oozie_limiter.try_acquire(oozie_url, SLOT_LEASE_SECONDS)
+            if lease is not None:
+                break
+            time.sleep(_slot_wait(wait))
+        OOZIE_LIMITER_WAIT.observe(time.monotonic() - waited)
+
+    started = time.monotonic()
+    congested = True
+    try:
+        result = _rerun(task)
+        congested = _is_congested(result[2], time.monotonic() - started)
+        return result
+    except Exception as exc:
+        congested = isinstance(exc, subprocess.TimeoutExpired) or _is_congested(str(exc), 0)
+        raise
+    finally:
+        oozie_limiter.release(oozie_url, lease, congested)
+
+
+async def _limited_rerun_async(task: TaskSpec, lease: Optional[str]) -> Tuple[str, str, str, int, bool]:
+    loop = asyncio.get_running_loop()
+    oozie_url = _oozie_url(task)
+    if lease is None:
+        waited = time.monotonic()
+        while True:
+            lease, wait = await loop.run_in_executor(None, oozie_limiter.try_acquire, oozie_url, SLOT_LEASE_SECONDS)
+            if lease is not None:
+                break
+            await asyncio.sleep(_slot_wait(wait))
+        OOZIE_LIMITER_WAIT.observe(time.monotonic() - waited)
+
+    started = time.monotonic()
+    congested = True
+    try:
+        result = await _rerun_async(task)
+        congested = _is_congested(result[2], time.monotonic() - started)
+        return result
+    except Exception as exc:
+        congested = isinstance(exc, subprocess.TimeoutExpired) or _is_congested(str(exc), 0)
+        raise
+    finally:
+        await loop.run_in_executor(None, oozie_limiter.release, oozie_url, lease, congested)
+
+
+async def _rerun_async(task: TaskSpec) -> Tuple[str, str, str, int, bool]:
+    """:func:`_rerun` on the event loop: async HTTP client and subprocess."""
+    cmd_text = ""
+    out = ""
+    err = ""
+    exit_code = 1
+    auth_failed = False
+
+    if task.use_rest:
+        try:
+            with REST_RERUN.labels(task.type).time():
+                cmd_text, out, err, exit_code = await _rest_rerun_async(task)
+        except Exception as exc:
+            if not REST_FALLBACK_TO_CLI:
+                raise
+            auth_failed = _rest_auth_failed(exc)
+            err = f"REST rerun failed ({exc.__class__.__name__}): {exc}\nFalling back to CLI rerun."
+
+    if cmd_text == "":
+        cli_cmd = build_cli_command(task)
+        cmd_text = _fmt_command(cli_cmd)
+        with CLI_RUNTIME.labels(task.type).time():
+            exit_code, out, cli_err = await _stream_process_async(
+                cli_cmd, TASK_TIMEOUT_SECONDS, on_output=_log_publisher(task)
+            )
+        err = f"{err}\n{cli_err}".strip()
+        if not task.use_rest:
+            # CLI-only reruns are judged by the CLI's own errors. After a REST
+            # failure only its HTTP status counts; the fallback may have
+            # failed for unrelated reasons.
+            auth_failed = bool(AUTH_ERROR_RE.search(cli_err))
+
+    return cmd_text, out, err, exit_code, auth_failed
+
+
+def _publish_started(task: TaskSpec) -> None:
+    TASK_QUEUE_WAIT.observe(max(0.0, (now() - task.started_at).total_seconds()))
+    batch_id = task.id if task.batch else None
+    for task_id in task.task_ids:
+        publish(
+            {
+                "event": "task_started",
+                "plan_id": task.plan_id,
+                "task_id": task_id,
+                "prev_status": "PENDING",
+                "task": {
+                    "id": task_id,
+                    "status": "RUNNING",
+                    "attempt": task.attempt,
+                    "started_at": task.started_at,
+                    "batch_id": batch_id,
+                },
+                "worker_id": WORKER_ID,
+            }
+        )
 
 
-def run_task(plan_id: int, task_id: int) -> None:
-    db = SessionLocal()
-    try:
-        plan = db.get(Plan, plan_id)
-        task = db.get(Task, task_id)
-        if not plan or not task:
-            return
-        if plan.status != "RUNNING":
-            return
-        if not _claim_task(db, task):
-            return
+def _rest_error(exc: Exception) -> Tuple[str, str, str, int, bool]:
+    # REST errors without CLI fallback: only auth failures get a retry.
+    if not (_rest_auth_failed(exc) and should_retry_auth(True)):
+        raise exc
+    return "", "", f"REST rerun failed ({exc.__class__.__name__}): {exc}", 1, True
+
 
-        publish({"event": "task_started", "plan_id": plan_id, "task_id": task_id, "worker_id": WORKER_ID})
+def _finish_timed_out(task: TaskSpec, exc: subprocess.TimeoutExpired, cmd_text: str) -> None:
+    cmd_text = _fmt_command(exc.cmd) if isinstance(exc.cmd, list) else cmd_text
+    partial_err = exc.stderr if isinstance(exc.stderr, str) else ""
+    timeout_msg = f"task execution timed out after {TASK_TIMEOUT_SECONDS}s: {exc}"
+    partial_out = exc.output if isinstance(exc.output, str) else ""
+    _finish_task(task, cmd_text, partial_out, f"{partial_err}\n{timeout_msg}".strip(), 124)
 
-        hook_code, hook_out, hook_err = _run_pre_task_hook()
+
+def run_task(task: TaskSpec) -> None:
+    _publish_started(task)
+    cmd_text = ""
+    # The dispatch-time slot is handed back unused if the rerun never starts.
+    lease = task.lease
+    try:
+        hook_at, (hook_code, hook_out, hook_err) = PRE_TASK.run(task)
         if hook_code != 0:
-            _mark_task_result(task, "PRE_TASK_CMD", hook_out, hook_err, hook_code)
-            db.commit()
-            publish({"event": "task_finished", "plan_id": plan_id, "task_id": task_id, "status": task.status, "worker_id": WORKER_ID})
+            _finish_task(task, "PRE_TASK_CMD", hook_out, hook_err, hook_code)
             return
 
-        cmd_text = ""
-        out = ""
-        err = ""
-        exit_code = 1
-
-        if plan.use_rest:
-            try:
-                cmd_text, out, err, exit_code = _workflow_rest_rerun(plan, task)
-            except Exception as exc:
-                if not REST_FALLBACK_TO_CLI:
-                    raise
-                err = f"REST rerun failed ({exc.__class__.__name__}): {exc}\nFalling back to CLI rerun."
-
-        if cmd_text == "":
-            cli_cmd = build_cli_command(plan, task)
-            cmd_text = _fmt_command(cli_cmd)
-            proc = subprocess.run(cli_cmd, text=True, capture_output=True, timeout=TASK_TIMEOUT_SECONDS)
-            exit_code = proc.returncode
-            out = _trim(proc.stdout or "", MAX_STDOUT)
-            err = f"{err}\n{_trim(proc.stderr or '', MAX_STDERR)}".strip()
-
-        _mark_task_result(task, cmd_text, out, err, exit_code)
-        db.commit()
-        publish({"event": "task_finished", "plan_id": plan_id, "task_id": task_id, "status": task.status, "worker_id": WORKER_ID})
+        slot, lease = lease, None
+        try:
+            cmd_text, out, err, exit_code, auth_failed = _limited_rerun(task, slot)
+        except Exception as exc:
+            cmd_text, out, err, exit_code, auth_failed = _rest_error(exc)
+        if exit_code != 0 and should_retry_auth(auth_failed):
+            # Credentials probably expired since the hook last ran: refresh once and retry.
+            logger.info("auth error for plan=%s task=%s; re-running pre-task hook", task.plan_id, task.id)
+            PRE_TASK_HOOK_RESULTS.labels("auth_retry").inc()
+            _, (hook_code, hook_out, hook_err) = PRE_TASK.run(task, since=hook_at)
+            if hook_code != 0:
+                _finish_task(task, "PRE_TASK_CMD", hook_out, f"{err}\n{hook_err}".strip(), hook_code)
+                return
+            first_err = err
+            cmd_text, out, err, exit_code, auth_failed = _limited_rerun(task, None)
+            err = f"{first_err}\nRetried after refreshing credentials.\n{err}".strip()
+
+        _finish_task(task, cmd_text, out, err, exit_code)
 
     except subprocess.TimeoutExpired as exc:
-        task = db.get(Task, task_id)
-        if task:
-            _mark_task_result(task, task.command or "", "", f"task execution timed out after {TASK_TIMEOUT_SECONDS}s: {exc}", 124)
-            db.commit()
-            publish({"event": "task_finished", "plan_id": plan_id, "task_id": task_id, "status": task.status, "worker_id": WORKER_ID})
+        _finish_timed_out(task, exc, cmd_text)
     except Exception as exc:
-        logger.exception("task execution failed for plan=%s task=%s: %s", plan_id, task_id, exc)
-        task = db.get(Task, task_id)
-        if task and task.status == "RUNNING":
-            _mark_task_result(task, task.command or "", "", f"unexpected worker error: {exc}", 1)
-            db.commit()
-            publish({"event": "task_finished", "plan_id": plan_id, "task_id": task_id, "status": task.status, "worker_id": WORKER_ID})
+        logger.exception("task execution failed for plan=%s task=%s: %s", task.plan_id, task.id, exc)
+        _finish_task(task, cmd_text, "", f"unexpected worker error: {exc}", 1)
     finally:
-        db.close()
+        if lease is not None:
+            oozie_limiter.cancel(_oozie_url(task), lease)
+
+
+async def run_task_async(task: TaskSpec) -> None:
+    """:func:`run_task` for the asyncio engine.
 
+    The rerun itself awaits; the pre-task hook and database writes still
+    block, so they run on the loop's default (bounded) thread pool.
+    """
+    loop = asyncio.get_running_loop()
 
-def plan_progress(db, plan_id: int) -> Tuple[int, int]:
-    total = db.query(Task).filter(Task.plan_id == plan_id).count()
-    done = (
-        db.query(Task)
-        .filter(Task.plan_id == plan_id, Task.status.in_(["SUCCESS", "FAILED", "CANCELED", "SKIPPED"]))
-        .count()
+    def blocking(fn, *args):
+        return loop.run_in_executor(None, fn, *args)
+
+    _publish_started(task)
+    cmd_text = ""
+    lease = task.lease
+    try:
+        hook_at, (hook_code, hook_out, hook_err) = await blocking(PRE_TASK.run, task)
+        if hook_code != 0:
+            await blocking(_finish_task, task, "PRE_TASK_CMD", hook_out, hook_err, hook_code)
+            return
+
+        slot, lease = lease, None
+        try:
+            cmd_text, out, err, exit_code, auth_failed = await _limited_rerun_async(task, slot)
+        except Exception as exc:
+            cmd_text, out, err, exit_code, auth_failed = _rest_error(exc)
+        if exit_code != 0 and should_retry_auth(auth_failed):
+            logger.info("auth error for plan=%s task=%s; re-running pre-task hook", task.plan_id, task.id)
+            PRE_TASK_HOOK_RESULTS.labels("auth_retry").inc()
+            _, (hook_code, hook_out, hook_err) = await blocking(lambda: PRE_TASK.run(task, since=hook_at))
+            if hook_code != 0:
+                await blocking(_finish_task, task, "PRE_TASK_CMD", hook_out, f"{err}\n{hook_err}".strip(), hook_code)
+                return
+            first_err = err
+            cmd_text, out, err, exit_code, auth_failed = await _limited_rerun_async(task, None)
+            err = f"{first_err}\nRetried after refreshing credentials.\n{err}".strip()
+
+        await blocking(_finish_task, task, cmd_text, out, err, exit_code)
+
+    except subprocess.TimeoutExpired as exc:
+        await blocking(_finish_timed_out, task, exc, cmd_text)
+    except Exception as exc:
+        logger.exception("task execution failed for plan=%s task=%s: %s", task.plan_id, task.id, exc)
+        await blocking(_finish_task, task, cmd_text, "", f"unexpected worker error: {exc}", 1)
+    finally:
+        if lease is not None:
+            await blocking(oozie_limiter.cancel, _oozie_url(task), lease)
+
+
+def plan_status_counts(db, plan_ids: List[int]) -> Dict[int, Dict[str, int]]:
+    """Task counts per status for every given plan, from one grouped query."""
+    counts: Dict[int, Dict[str, int]] = {plan_id: {} for plan_id in plan_ids}
+    if not plan_ids:
+        return counts
+    rows = (
+        db.query(Task.plan_id, Task.status, func.count(Task.id))
+        .filter(Task.plan_id.in_(plan_ids))
+        .group_by(Task.plan_id, Task.status)
+        .all()
     )
-    return total, done
+    for plan_id, status, n in rows:
+        counts[plan_id][status] = int(n)
+    return counts
 
 
-def _run_and_clear(plan_id: int, task_id: int, inflight: Dict[int, Set[int]]) -> None:
+def _run_and_clear(task: TaskSpec, inflight: Dict[int, Set[int]]) -> None:
+    EXECUTOR_QUEUE_DEPTH.dec()
     try:
-        run_task(plan_id, task_id)
+        run_task(task)
+    except Exception as exc:
+        logger.exception("failed to record result for plan=%s task=%s: %s", task.plan_id, task.id, exc)
     finally:
-        inflight.get(plan_id, set()).discard(task_id)
+        inflight.get(task.plan_id, set()).discard(task.id)
+        WAKE.set()
+
+
+class OutcomeTracker:
+    """Follows SUBMITTED tasks until their Oozie job reaches an end state.
+
+    Each Oozie server is polled with bulk ``v2/jobs`` queries on its own
+    adaptive cadence (see :class:`app.tracking.PollCadence`), a page of
+    TRACK_BATCH_SIZE tasks at a time. A short Redis lock per server lets
+    only one worker poll it per interval. The thread is only started once
+    there is something to track.
+    """
+
+    def __init__(self):
+        self.cadence = PollCadence(TRACK_POLL_MIN_SECONDS, TRACK_POLL_MAX_SECONDS)
+        self._nudged: Set[str] = set()
+        self._lock = Lock()
+        self._wake = Event()
+        self._thread: Optional[Thread] = None
+
+    @property
+    def started(self) -> bool:
+        return self._thread is not None
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = Thread(target=self.run, name="outcome-tracker", daemon=True)
+                self._thread.start()
+
+    def nudge(self, oozie_url: str) -> None:
+        """A rerun was just submitted to ``oozie_url``: poll it at the fast cadence."""
+        self.start()
+        with self._lock:
+            self._nudged.add(oozie_url)
+        self._wake.set()
+
+    def run(self) -> None:
+        while not SHUTDOWN.is_set():
+            self._wake.clear()
+            with self._lock:
+                nudged, self._nudged = self._nudged, set()
+            for oozie_url in nudged:
+                self.cadence.reset(oozie_url)
+            try:
+                self.poll_due()
+            except Exception as exc:
+                logger.warning("outcome tracking cycle failed: %s", exc)
+            self._wake.wait(max(0.5, self.cadence.next_due_in()))
+
+    def _claim_server(self, oozie_url: str) -> bool:
+        key = f"{settings.redis_channel}:track:{oozie_url}"
+        try:
+            ttl_ms = max(100, int(self.cadence.interval(oozie_url) * 1000))
+            return bool(REDIS.set(key, WORKER_ID, nx=True, px=ttl_ms))
+        except Exception:
+            # Without Redis every worker polls; the updates are idempotent.
+            return True
+
+    def poll_due(self) -> None:
+        db = SessionLocal()
+        try:
+            plans = (
+                db.query(Plan.id, Plan.oozie_url)
+                .join(Task, Task.plan_id == Plan.id)
+                .filter(Task.status == "SUBMITTED")
+                .distinct()
+                .all()
+            )
+        finally:
+            db.close()
+
+        servers: Dict[str, List[int]] = {}
+        for plan in plans:
+            servers.setdefault(_server_url(plan.oozie_url), []).append(plan.id)
+        self.cadence.forget_except(servers)
+
+        for oozie_url, plan_ids in servers.items():
+            if not self.cadence.due(oozie_url):
+                continue
+            if not self._claim_server(oozie_url):
+                self.cadence.skipped(oozie_url)
+                continue
+            try:
+                changed = self.poll_server(oozie_url, plan_ids)
+            except Exception as exc:
+                logger.warning("outcome tracking failed for %s: %s", oozie_url, exc)
+                changed = False
+            self.cadence.polled(oozie_url, changed)
+
+    def poll_server(self, oozie_url: str, plan_ids: List[int]) -> bool:
+        """Look up every tracked job of ``plan_ids`` on one server, a page at a time."""
+        client = get_client(oozie_url)
+        batch_size = max(1, TRACK_BATCH_SIZE)
+        settled_before = now() - timedelta(seconds=TRACK_POLL_MIN_SECONDS)
+        changed = False
+        after_id = 0
+        while not SHUTDOWN.is_set():
+            db = SessionLocal()
+            try:
+                page = submitted_page(db, plan_ids, after_id, batch_size, settled_before)
+            finally:
+                db.close()
+            if not page:
+                break
+            after_id = page[-1].id
+            changed = self._poll_page(client, page) or changed
+            if len(page) < batch_size:
+                break
+        if changed:
+            WAKE.set()
+        return changed
+
+    def _poll_page(self, client, tasks: list) -> bool:
+        by_type: Dict[str, Dict[str, None]] = {}
+        for t in tasks:
+            by_type.setdefault(t.type, {})[t.job_id] = None
+        statuses: Dict[str, str] = {}
+        for task_type, job_ids in by_type.items():
+            statuses.update(client.job_statuses(task_type, list(job_ids)))
+
+        deadline = now().timestamp() - TRACK_TIMEOUT_SECONDS
+        changes: Dict[int, Tuple[str, Optional[str]]] = {}
+        timed_out: Set[int] = set()
+        for t in tasks:
+            oozie_status = statuses.get(t.job_id, t.oozie_status or "")
+            outcome = outcome_for(oozie_status)
+            if outcome is None and t.submitted_at is not None and t.submitted_at.timestamp() <= deadline:
+                outcome = "FAILED"
+                timed_out.add(t.id)
+            if outcome is not None or oozie_status != (t.oozie_status or ""):
+                changes[t.id] = (oozie_status, outcome)
+        if not changes:
+            return False
+        self._record(tasks, changes, timed_out)
+        return True
+
+    def _record(self, tasks: list, changes: Dict[int, Tuple[str, Optional[str]]], timed_out: Set[int]) -> None:
+        ended_at = now()
+        db = SessionLocal()
+        try:
+            updated = set(record_tracked(db, changes, ended_at))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        for t in tasks:
+            if t.id not in updated:
+                continue
+            oozie_status, outcome = changes[t.id]
+            task: Dict[str, Any] = {"id": t.id, "oozie_status": oozie_status}
+            event = {"event": "task_tracked", "plan_id": t.plan_id, "task_id": t.id, "task": task, "worker_id": WORKER_ID}
+            if outcome is not None:
+                OOZIE_TRACKED.labels("timeout" if t.id in timed_out else outcome.lower()).inc()
+                task.update({"status": outcome, "ended_at": ended_at})
+                event.update({"event": "task_finished", "status": outcome, "prev_status": "SUBMITTED"})
+            publish(event)
+
+
+TRACKER = OutcomeTracker()
+
+
+class AsyncExecutor:
+    """Runs claimed tasks as coroutines on a dedicated event loop thread.
+
+    A task waiting on the oozie CLI or an Oozie HTTP call holds no thread, so
+    ``max_tasks`` can be far above what a thread pool could afford.
+    ``blocking_threads`` bounds the pool used for the pre-task hook and DB writes.
+    """
+
+    def __init__(self, max_tasks: int, blocking_threads: int):
+        self.loop = asyncio.new_event_loop()
+        self.blocking = ThreadPoolExecutor(max_workers=max(1, blocking_threads), thread_name_prefix="task-io")
+        self.loop.set_default_executor(self.blocking)
+        self._slots = asyncio.Semaphore(max(1, max_tasks))
+        self._thread = Thread(target=self.loop.run_forever, name="task-loop", daemon=True)
+        self._thread.start()
+
+    def submit(self, task: TaskSpec, inflight: Dict[int, Set[int]]) -> None:
+        asyncio.run_coroutine_threadsafe(self._run_and_clear(task, inflight), self.loop)
+
+    async def _run_and_clear(self, task: TaskSpec, inflight: Dict[int, Set[int]]) -> None:
+        async with self._slots:
+            EXECUTOR_QUEUE_DEPTH.dec()
+            try:
+                await run_task_async(task)
+            except Exception as exc:
+                logger.exception("failed to record result for plan=%s task=%s: %s", task.plan_id, task.id, exc)
+            finally:
+                inflight.get(task.plan_id, set()).discard(task.id)
+                WAKE.set()
+
+    async def _drain(self) -> None:
+        current = asyncio.current_task()
+        await asyncio.gather(*(t for t in asyncio.all_tasks() if t is not current), return_exceptions=True)
+        await close_async_clients()
+
+    def shutdown(self, wait: bool = True) -> None:
+        if wait:
+            asyncio.run_coroutine_threadsafe(self._drain(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.blocking.shutdown(wait=wait)
+        self.loop.close()
+
+
+def _listen_for_wakeups() -> None:
+    while not SHUTDOWN.is_set():
+        pubsub = None
+        try:
+            pubsub = REDIS.pubsub(ignore_subscribe_messages=True)
+            # Plan state channels only; live log channels are never matched.
+            pattern = f"{settings.redis_channel}:plan:*"
+            pubsub.subscribe(settings.redis_channel)
+            pubsub.psubscribe(pattern)
+            LISTENER_CONNECTED.set()
+            logger.info("listening for dispatch events on %s and %s", settings.redis_channel, pattern)
+            while not SHUTDOWN.is_set():
+                msg = pubsub.get_message(timeout=1.0)
+                if not msg:
+                    continue
+                try:
+                    event = json.loads(msg.get("data") or "{}").get("event")
+                except (TypeError, ValueError, AttributeError):
+                    continue
+                if event in WAKE_EVENTS:
+                    WAKE.set()
+        except Exception as exc:
+            logger.warning("event listener disconnected: %s", exc.__class__.__name__)
+        finally:
+            LISTENER_CONNECTED.clear()
+            if pubsub is not None:
+                try:
+                    pubsub.close()
+                except Exception:
+                    pass
+        SHUTDOWN.wait(POLL_SECONDS)
+
+
+def _wait_for_wakeup(retry_after: Optional[float] = None) -> None:
+    # While the event listener is healthy, polling is only a safety net for
+    # missed events; otherwise fall back to the regular poll interval.
+    timeout = FALLBACK_POLL_SECONDS if LISTENER_CONNECTED.is_set() else POLL_SECONDS
+    if retry_after is not None:
+        # Work is waiting on the Oozie limiter: come back when it has a slot.
+        timeout = min(timeout, retry_after)
+    if WAKE.wait(timeout) and WAKE_DEBOUNCE_MS > 0:
+        # Let a burst of completions settle so they are handled in one tick.
+        SHUTDOWN.wait(WAKE_DEBOUNCE_MS / 1000.0)
 
 
 def _handle_signal(signum, _frame) -> None:
     logger.info("received signal %s, shutting down worker loop", signum)
     SHUTDOWN.set()
+    WAKE.set()
+
+
+def _inflight_ids(inflight: Dict[int, Set[int]]) -> List[int]:
+    # Executor threads discard ids concurrently; copy before iterating.
+    return [task_id for ids in list(inflight.values()) for task_id in ids.copy()]
+
+
+def _keep_claims_alive(inflight: Dict[int, Set[int]], stop: Event) -> None:
+    # Own thread, so leases stay fresh while the dispatch loop sleeps and
+    # while shutdown drains running tasks.
+    while not stop.wait(HEARTBEAT_SECONDS):
+        db = SessionLocal()
+        try:
+            renew_claims(db, WORKER_ID, _inflight_ids(inflight), now())
+            db.commit()
+        except Exception as exc:
+            db.rollback()
+            logger.warning("could not renew task claims: %s", exc)
+        finally:
+            db.close()
+
+
+def _publish_requeued(requeued: Dict[int, List[int]], reason: str) -> None:
+    for plan_id, task_ids in requeued.items():
+        logger.warning("requeued %d task(s) of plan=%s (%s): %s", len(task_ids), plan_id, reason, task_ids)
+        publish({"event": "tasks_requeued", "plan_id": plan_id, "task_ids": task_ids, "resync": True, "worker_id": WORKER_ID})
+
+
+def dispatch(
+    db,
+    demands: List[PlanDemand],
+    free: int,
+    inflight: Dict[int, Set[int]],
+    submit: Callable,
+    oozie_urls: Dict[int, str],
+) -> Optional[float]:
+    """Claim tasks for up to ``free`` executor slots, shared between plans by WORKER_SCHEDULER.
+
+    Work is only claimed for slots that are free, so tasks left PENDING stay
+    available to other workers instead of queueing behind this one. Each
+    claim first takes a slot of the plan's Oozie server limiter, so a task
+    never sits RUNNING on an executor thread waiting for one.
+
+    Returns how long until the limiter expects a slot when it held work back,
+    else None.
+    """
+    retry_after: Optional[float] = None
+    while free > 0 and demands:
+        allocation = allocate(free, demands, WORKER_SCHEDULER)
+        claimed: Dict[int, int] = {}
+        for demand in demands:
+            share = allocation.get(demand.plan_id, 0)
+            if not share:
+                continue
+            oozie_url = _server_url(oozie_urls.get(demand.plan_id, ""))
+            leases, wait = oozie_limiter.acquire(oozie_url, share, SLOT_LEASE_SECONDS)
+            if len(leases) < share:
+                wait = _slot_wait(wait)
+                retry_after = wait if retry_after is None else min(retry_after, wait)
+            specs: List[TaskSpec] = []
+            submitted = 0
+            try:
+                if leases:
+                    specs = claim_tasks(db, demand.plan_id, len(leases))
+                for spec, lease in zip(specs, leases):
+                    inflight[demand.plan_id].add(spec.id)
+                    EXECUTOR_QUEUE_DEPTH.inc()
+                    submit(spec._replace(lease=lease), inflight)
+                    submitted += 1
+            finally:
+                # Slots no task took (fewer claimed, or the claim failed) go
+                # back now rather than when their lease expires.
+                for lease in leases[submitted:]:
+                    oozie_limiter.cancel(oozie_url, lease)
+            claimed[demand.plan_id] = len(specs)
+            free -= len(specs)
+        if not any(claimed.values()):
+            return retry_after
+        # A plan that got less than its share (another worker claimed first, or
+        # it hit max_concurrency) drops out; its slots go round again to the rest.
+        remaining = []
+        for d in demands:
+            got = claimed.get(d.plan_id, 0)
+            if got == allocation.get(d.plan_id, 0) and d.want > got:
+                remaining.append(d._replace(running=d.running + got, want=d.want - got))
+        demands = remaining
+    return retry_after
 
 
 def main_loop() -> None:
-    executor = ThreadPoolExecutor(max_workers=max(1, WORKER_MAX_THREADS))
+    if WORKER_SCHEDULER not in SCHEDULER_POLICIES:
+        raise SystemExit(f"WORKER_SCHEDULER must be one of {', '.join(SCHEDULER_POLICIES)}")
+    # Same checks as the API on the shared env file, e.g. the Oozie limiter bounds.
+    settings.validate_runtime()
+    if WORKER_ENGINE == "asyncio":
+        executor: Any = AsyncExecutor(WORKER_MAX_ASYNC_TASKS, WORKER_MAX_THREADS)
+        submit = executor.submit
+        capacity = max(1, WORKER_MAX_ASYNC_TASKS)
+    else:
+        executor = ThreadPoolExecutor(max_workers=max(1, WORKER_MAX_THREADS))
+        capacity = max(1, WORKER_MAX_THREADS)
+
+        def submit(spec: TaskSpec, inflight: Dict[int, Set[int]]) -> None:
+            executor.submit(_run_and_clear, spec, inflight)
+
+    logger.info("task engine: %s, scheduler: %s", WORKER_ENGINE, WORKER_SCHEDULER)
+    if settings.task_claim_lease_seconds < 3 * HEARTBEAT_SECONDS:
+        logger.warning(
+            "TASK_CLAIM_LEASE_SECONDS=%s is under three WORKER_HEARTBEAT_SECONDS; live tasks may be requeued",
+            settings.task_claim_lease_seconds,
+        )
+    # Every executor thread may hold a connection to the same Oozie server.
+    oozie_registry.configure(pool_maxsize=max(1, WORKER_MAX_THREADS))
+    oozie_async_registry.configure(pool_maxsize=max(1, WORKER_MAX_THREADS))
     inflight: Dict[int, Set[int]] = {}
+    last_heartbeat = 0.0
+
+    db = SessionLocal()
+    try:
+        # Claims under this WORKER_ID are from an earlier process that died.
+        requeued = requeue_worker_claims(db, WORKER_ID)
+        db.commit()
+    finally:
+        db.close()
+    _publish_requeued(requeued, f"restart of {WORKER_ID}")
+    claims_stop = Event()
+    claims_thread = Thread(target=_keep_claims_alive, args=(inflight, claims_stop), name="claim-heartbeat", daemon=True)
+    claims_thread.start()
+
+    if EVENT_DRIVEN:
+        Thread(target=_listen_for_wakeups, name="event-listener", daemon=True).start()
 
     try:
         while not SHUTDOWN.is_set():
+            WAKE.clear()
+            tick_started = time.perf_counter()
+            retry_after: Optional[float] = None
             db = SessionLocal()
             try:
-                plans = db.query(Plan).filter(Plan.status == "RUNNING").all()
-                for p in plans:
-                    inflight.setdefault(p.id, set())
-
-                    cap = max(1, int(p.max_concurrency or 1))
-                    current = len(inflight[p.id])
-                    if current < cap:
-                        pending = (
-                            db.query(Task)
-                            .filter(Task.plan_id == p.id, Task.status == "PENDING")
-                            .order_by(Task.id.asc())
-                            .limit(cap - current)
-                            .all()
+                # Ticks can run many times a second under load; one heartbeat
+                # and one sweep for expired claims per interval is enough.
+                if time.monotonic() - last_heartbeat >= HEARTBEAT_SECONDS:
+                    last_heartbeat = time.monotonic()
+                    publish({"event": "worker_heartbeat", "worker_id": WORKER_ID, "ts": str(now())})
+                    requeued = requeue_expired_claims(db, settings.task_claim_lease_seconds, now())
+                    db.commit()
+                    _publish_requeued(requeued, "claim lease expired")
+                    # Picks up tasks left SUBMITTED by a restart or by another worker.
+                    if not TRACKER.started and db.query(Task.id).filter(Task.status == "SUBMITTED").first():
+                        TRACKER.start()
+
+                plans = (
+                    db.query(
+                        Plan.id, Plan.max_concurrency, Plan.coord_batch_size, Plan.priority, Plan.weight, Plan.oozie_url
+                    )
+                    .filter(Plan.status == "RUNNING")
+                    .all()
+                )
+                snapshot = plan_status_counts(db, [plan.id for plan in plans])
+                demands = []
+                for plan in plans:
+                    local = inflight.setdefault(plan.id, set())
+                    counts = snapshot[plan.id]
+                    cap = max(1, int(plan.max_concurrency or 1))
+                    # RUNNING counts tasks, not batches; claim_tasks checks batched plans.
+                    if int(plan.coord_batch_size or 1) == 1:
+                        cap -= counts.get("RUNNING", 0)
+                    want = min(counts.get("PENDING", 0), cap)
+                    if want > 0:
+                        demands.append(
+                            PlanDemand(plan.id, int(plan.priority or 0), max(1, int(plan.weight or 1)), len(local), want)
+                        )
+                free = capacity - sum(len(ids) for ids in inflight.values())
+                retry_after = dispatch(
+                    db, demands, free, inflight, submit, {plan.id: plan.oozie_url for plan in plans}
+                )
+
+                for plan in plans:
+                    plan_id = plan.id
+                    local = inflight[plan_id]
+                    counts = snapshot[plan_id]
+                    total = sum(counts.values())
+                    done = sum(counts.get(s, 0) for s in TERMINAL_STATUSES)
+                    if done == total and not local:
+                        status = "FAILED" if counts.get("FAILED") else "COMPLETED"
+                        updated = (
+                            db.query(Plan)
+                            .filter(Plan.id == plan_id, Plan.status == "RUNNING")
+                            .update({Plan.status: status, Plan.updated_at: now()}, synchronize_session=False)
                         )
-                        for t in pending:
-                            inflight[p.id].add(t.id)
-                            executor.submit(_run_and_clear, p.id, t.id, inflight)
-
-                    total, done = plan_progress(db, p.id)
-                    if total == 0 and not inflight[p.id]:
-                        p.status = "COMPLETED"
-                        p.updated_at = now()
-                        db.commit()
-                        publish({"event": "plan_completed", "plan_id": p.id, "status": p.status, "worker_id": WORKER_ID})
-                    elif done == total and not inflight[p.id]:
-                        failed = db.query(Task).filter(Task.plan_id == p.id, Task.status == "FAILED").count()
-                        p.status = "FAILED" if failed else "COMPLETED"
-                        p.updated_at = now()
                         db.commit()
-                        publish({"event": "plan_completed", "plan_id": p.id, "status": p.status, "worker_id": WORKER_ID})
-
-                publish({"event": "worker_heartbeat", "worker_id": WORKER_ID, "ts": str(now())})
+                        if updated:
+                            publish(
+                                {
+                                    "event": "plan_completed",
+                                    "plan_id": plan_id,
+                                    "status": status,
+                                    "plan": {"id": plan_id, "status": status},
+                                    "worker_id": WORKER_ID,
+                                }
+                            )
+            except Exception as exc:
+                # A failed tick (e.g. the database went away) is retried on
+                # the next one; it must not stop the worker.
+                logger.exception("worker tick failed: %s", exc)
             finally:
                 db.close()
+                WORKER_TICK.observe(time.perf_counter() - tick_started)
+                WORKER_INFLIGHT.set(sum(len(ids) for ids in inflight.values()))
 
-            SHUTDOWN.wait(POLL_SECONDS)
+            _wait_for_wakeup(retry_after)
     finally:
         executor.shutdown(wait=True)
+        claims_stop.set()
+        claims_thread.join()
+        oozie_registry.close()
+        event_writer.close()
 
 
 if __name__ == "__main__":
     signal.signal(signal.SIGTERM, _handle_signal)
     signal.signal(signal.SIGINT, _handle_signal)
+    if METRICS_PORT > 0:
+        start_http_server(METRICS_PORT, addr=METRICS_ADDR)
+        logger.info("metrics listening on %s:%s", METRICS_ADDR, METRICS_PORT)
     main_loop()